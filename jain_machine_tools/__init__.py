@@ -1,4 +1,6 @@
 __version__ = "0.0.1"
 
-import jain_machine_tools.patches.reorder_override
-import jain_machine_tools.monkey_patches.rate_validation
+# Runtime patches, also outside requests and jobs (bench console / execute / migrate / run-tests)
+from jain_machine_tools.monkey_patches import apply_all
+
+apply_all()
@@ -0,0 +1,254 @@
+# Copyright (c) 2026, Jain Machine Tools and contributors
+# For license information, please see license.txt
+
+"""
+Bulk "invoice all due delivery plans"
+- Finds pending Delivery Planning Schedule rows due by a date (one query)
+- Builds one Sales Invoice per schedule, mapping each Sales Order once and copying
+  that template for every schedule of the order
+- Inserts (and optionally submits) invoices in chunks in a background job, each
+  invoice behind its own savepoint, with realtime progress and a per-invoice summary
+"""
+
+from collections import defaultdict
+
+import frappe
+from frappe import _
+from frappe.utils import cint, flt, getdate
+
+from jain_machine_tools.overrides.sales_order import make_sales_invoice
+
+BULK_INVOICE_PROGRESS_EVENT = "jmt_dps_bulk_invoice_progress"
+BULK_INVOICE_DONE_EVENT = "jmt_dps_bulk_invoice_done"
+BULK_INVOICE_SUMMARY_TTL = 7 * 24 * 60 * 60
+# Job ids, and the cache keys their summaries are stored under, start with this
+BULK_INVOICE_JOB_PREFIX = "jmt_dps_bulk_invoice::"
+
+
+@frappe.whitelist()
+def enqueue_due_delivery_plan_invoices(
+	due_date, company=None, customer=None, sales_order=None, submit=0, chunk_size=20
+):
+	"""
+	Queue invoice creation for every schedule with rows due by due_date.
+	Returns the job id and the number of schedules found.
+	"""
+	frappe.has_permission("Sales Invoice", "create", throw=True)
+	if cint(submit):
+		frappe.has_permission("Sales Invoice", "submit", throw=True)
+
+	filters = _get_filters(company, customer, sales_order)
+	rows = get_due_delivery_plan_rows(due_date, filters)
+	schedules = {row.delivery_planning_schedule for row in rows}
+	if not schedules:
+		return {"job_id": None, "schedules": 0}
+
+	job_id = f"{BULK_INVOICE_JOB_PREFIX}{frappe.generate_hash(length=10)}"
+	frappe.enqueue(
+		"jain_machine_tools.api.delivery_plan_invoicing.make_due_delivery_plan_invoices",
+		queue="long",
+		timeout=6 * 60 * 60,
+		job_id=job_id,
+		enqueue_after_commit=True,
+		due_date=due_date,
+		filters=filters,
+		submit=cint(submit),
+		chunk_size=cint(chunk_size) or 20,
+		bulk_job_id=job_id,
+		owner=frappe.session.user,
+	)
+
+	return {"job_id": job_id, "schedules": len(schedules)}
+
+
+@frappe.whitelist()
+def get_bulk_invoice_summary(job_id):
+	"""Summary of a finished bulk invoice run, kept for a week; for the user who queued it"""
+	if not isinstance(job_id, str) or not job_id.startswith(BULK_INVOICE_JOB_PREFIX):
+		frappe.throw(_("Invalid bulk invoice job: {0}").format(job_id))
+
+	frappe.has_permission("Sales Invoice", "read", throw=True)
+
+	summary = frappe.cache.get_value(job_id)
+	if summary and summary.get("owner") != frappe.session.user and "System Manager" not in frappe.get_roles():
+		frappe.throw(_("Not permitted to view this bulk invoice run"), frappe.PermissionError)
+
+	return summary
+
+
+def make_due_delivery_plan_invoices(
+	due_date, filters=None, submit=0, chunk_size=20, bulk_job_id=None, owner=None
+):
+	"""
+	Background job: one Sales Invoice per due schedule.
+	Commits after every chunk; a failed invoice is rolled back to its savepoint and
+	recorded, the rest of the chunk carries on.
+	"""
+	rows = get_due_delivery_plan_rows(due_date, filters)
+
+	rows_by_schedule = defaultdict(list)
+	for row in rows:
+		rows_by_schedule[(row.sales_order, row.delivery_planning_schedule)].append(row)
+
+	total = len(rows_by_schedule)
+	results = []
+	templates = {}
+
+	for i, ((sales_order, schedule), plan_rows) in enumerate(rows_by_schedule.items(), start=1):
+		result = {"sales_order": sales_order, "delivery_planning_schedule": schedule}
+
+		frappe.db.savepoint("jmt_dps_invoice")
+		try:
+			if sales_order not in templates:
+				templates[sales_order] = make_sales_invoice(sales_order)
+
+			invoice = build_delivery_plan_invoice(templates[sales_order], plan_rows)
+			invoice.insert()
+			if submit:
+				invoice.submit()
+
+			result.update({"sales_invoice": invoice.name, "status": "Success"})
+		except Exception as e:
+			frappe.db.rollback(save_point="jmt_dps_invoice")
+			frappe.clear_messages()
+			result.update({"sales_invoice": None, "status": "Failed", "error": _get_error_message(e)})
+
+		results.append(result)
+
+		if i % chunk_size == 0 or i == total:
+			frappe.db.commit()
+			frappe.publish_realtime(
+				BULK_INVOICE_PROGRESS_EVENT,
+				{"job_id": bulk_job_id, "processed": i, "total": total},
+				user=frappe.session.user,
+			)
+
+	summary = {
+		"job_id": bulk_job_id,
+		"owner": owner or frappe.session.user,
+		"due_date": str(due_date),
+		"total": total,
+		"succeeded": sum(1 for row in results if row["status"] == "Success"),
+		"failed": sum(1 for row in results if row["status"] == "Failed"),
+		"invoices": results,
+	}
+	if bulk_job_id:
+		frappe.cache.set_value(bulk_job_id, summary, expires_in_sec=BULK_INVOICE_SUMMARY_TTL)
+
+	frappe.publish_realtime(BULK_INVOICE_DONE_EVENT, summary, user=frappe.session.user)
+	return summary
+
+
+def build_delivery_plan_invoice(template, plan_rows):
+	"""
+	Copy the Sales Order's mapped invoice and narrow it to one schedule's due rows:
+	items billed at the rows' remaining qty, other items dropped, plan rows selected.
+	"""
+	# so_detail is no_copy on Sales Invoice Item
+	invoice = frappe.copy_doc(template, ignore_no_copy=True)
+
+	qty_by_so_item = defaultdict(float)
+	for row in plan_rows:
+		qty_by_so_item[row.sales_order_item] += flt(row.available_qty)
+
+	items = [item for item in invoice.get("items") if item.so_detail in qty_by_so_item]
+	for idx, item in enumerate(items, start=1):
+		item.idx = idx
+		item.qty = qty_by_so_item[item.so_detail]
+		item.stock_qty = flt(item.qty) * flt(item.conversion_factor or 1)
+
+	invoice.set("items", items)
+	if not items:
+		frappe.throw(_("No Sales Order items left to invoice for these delivery plan rows"))
+
+	invoice.set("delivery_plan_details", [])
+	for row in plan_rows:
+		invoice.append(
+			"delivery_plan_details",
+			{
+				"delivery_planning_schedule": row.delivery_planning_schedule,
+				"delivery_planning_schedule_item": row.delivery_planning_schedule_item,
+				"sales_order_item": row.sales_order_item,
+				"item_code": row.item_code,
+				"delivery_date": row.delivery_date,
+				"planned_qty": row.planned_qty,
+				"qty": row.available_qty,
+				"uom": row.uom,
+			},
+		)
+
+	return invoice
+
+
+def get_due_delivery_plan_rows(due_date, filters=None):
+	"""
+	Pending Delivery Planning Schedule rows due by due_date with qty left to invoice.
+	Qty already on draft Sales Invoices counts as taken, so running again does not
+	make a second draft for the same rows.
+	"""
+	filters = filters or {}
+	conditions = [
+		"dps.docstatus < 2",
+		"so.docstatus = 1",
+		"so.status NOT IN ('Closed', 'On Hold', 'Completed')",
+		"dpsi.sales_order_item IS NOT NULL",
+		"dpsi.delivery_date <= %(due_date)s",
+		"dpsi.planned_qty - IFNULL(dpsi.invoiced_qty, 0) - IFNULL(draft.qty, 0) > 1e-9",
+	]
+	values = {"due_date": getdate(due_date)}
+
+	for fieldname, column in (
+		("company", "so.company"),
+		("customer", "so.customer"),
+		("sales_order", "dps.sales_order"),
+	):
+		if filters.get(fieldname):
+			conditions.append(f"{column} = %({fieldname})s")
+			values[fieldname] = filters[fieldname]
+
+	return frappe.db.sql(
+		f"""
+		SELECT
+			dps.sales_order,
+			dps.name AS delivery_planning_schedule,
+			dpsi.name AS delivery_planning_schedule_item,
+			dpsi.sales_order_item,
+			dpsi.item_code,
+			dpsi.delivery_date,
+			dpsi.planned_qty,
+			dpsi.uom,
+			dpsi.planned_qty - IFNULL(dpsi.invoiced_qty, 0) - IFNULL(draft.qty, 0) AS available_qty
+		FROM `tabDelivery Planning Schedule Item` dpsi
+		INNER JOIN `tabDelivery Planning Schedule` dps
+			ON dps.name = dpsi.parent
+		INNER JOIN `tabSales Order` so
+			ON so.name = dps.sales_order
+		LEFT JOIN (
+			SELECT sidp.delivery_planning_schedule_item, SUM(sidp.qty) AS qty
+			FROM `tabSales Invoice Delivery Plan` sidp
+			INNER JOIN `tabSales Invoice` si
+				ON si.name = sidp.parent
+				AND sidp.parenttype = 'Sales Invoice'
+			WHERE si.docstatus = 0
+			GROUP BY sidp.delivery_planning_schedule_item
+		) draft
+			ON draft.delivery_planning_schedule_item = dpsi.name
+		WHERE {' AND '.join(conditions)}
+		ORDER BY dps.sales_order, dps.name, dpsi.idx
+		""",
+		values,
+		as_dict=True,
+	)
+
+
+def _get_filters(company=None, customer=None, sales_order=None):
+	return {
+		fieldname: value
+		for fieldname, value in (("company", company), ("customer", customer), ("sales_order", sales_order))
+		if value
+	}
+
+
+def _get_error_message(exc):
+	message = str(exc) or exc.__class__.__name__
+	return frappe.utils.strip_html(message)[:500]
@@ -12,6 +12,9 @@ def update_serial_warranty_on_submit(doc, method=None):
 	Updates warranty_expiry_date for all serial numbers in THIS Sales Invoice only,
 	based on item warranty configuration.
 
+	Set-based: one Item query, one query expanding every bundle of the invoice, then
+	one UPDATE per distinct expiry date.
+
 	Args:
 		doc: Sales Invoice document
 		method: Hook method (on_submit)
@@ -23,45 +26,71 @@ def update_serial_warranty_on_submit(doc, method=None):
 	if not doc.items:
 		return
 
-	for item in doc.items:
-		# Skip if item doesn't have serial and batch bundle
-		# This ensures we only update serial numbers that are in THIS Sales Invoice
-		if not item.serial_and_batch_bundle:
-			continue
+	# Skip rows without serial and batch bundle
+	# This ensures we only update serial numbers that are in THIS Sales Invoice
+	bundle_items = {
+		item.serial_and_batch_bundle: item.item_code
+		for item in doc.items
+		if item.serial_and_batch_bundle
+	}
+	if not bundle_items:
+		return
 
-		# Get item warranty configuration
-		item_doc = frappe.get_cached_doc("Item", item.item_code)
+	expiry_by_item = get_warranty_expiry_by_item(set(bundle_items.values()), doc.posting_date)
+	if not expiry_by_item:
+		return
 
-		# Skip if item doesn't have serial_no enabled or warranty fields not configured
-		if not item_doc.has_serial_no:
-			continue
+	bundles = [bundle for bundle, item_code in bundle_items.items() if item_code in expiry_by_item]
+	serials_by_expiry = {}
+	for bundle, serial_numbers in get_serial_numbers_from_bundles(bundles).items():
+		expiry = expiry_by_item[bundle_items[bundle]]
+		serials_by_expiry.setdefault(expiry, []).extend(serial_numbers)
+
+	updated = 0
+	for warranty_expiry, serial_numbers in serials_by_expiry.items():
+		updated += update_serial_warranty_dates(serial_numbers, warranty_expiry)
 
+	if updated:
+		frappe.logger().info(
+			f"Sales Invoice {doc.name}: updated warranty expiry date for {updated} serial numbers "
+			f"across {len(serials_by_expiry)} expiry dates"
+		)
+
+
+def get_warranty_expiry_by_item(item_codes, posting_date):
+	"""
+	Warranty expiry date per item for items whose warranty starts from the Sales Invoice posting date.
+
+	Returns:
+		Dict: {item_code: expiry date}, items without a complete warranty configuration left out
+	"""
+	items = frappe.get_all(
+		"Item",
+		filters={"name": ("in", list(item_codes)), "has_serial_no": 1},
+		fields=["name", "warranty_start_from", "company_warranty_period", "warranty_uom"],
+	)
+
+	expiry_by_item = {}
+	for item in items:
 		# All warranty fields must be configured
-		if not item_doc.warranty_start_from or not item_doc.company_warranty_period or not item_doc.warranty_uom:
+		if not item.warranty_start_from or not item.company_warranty_period or not item.warranty_uom:
 			continue
 
 		# Only process if warranty starts from Sales Invoice Posting Date
-		if item_doc.warranty_start_from != "Sales Invoice Posting Date":
+		if item.warranty_start_from != "Sales Invoice Posting Date":
 			continue
 
-		# Calculate warranty expiry date
 		warranty_expiry = calculate_warranty_expiry_date(
-			doc.posting_date,
-			item_doc.warranty_start_from,
-			item_doc.company_warranty_period,
-			item_doc.warranty_uom
+			posting_date,
+			item.warranty_start_from,
+			item.company_warranty_period,
+			item.warranty_uom
 		)
 
-		if not warranty_expiry:
-			continue
-
-		# Get all serial numbers from THIS item's bundle
-		# This ensures we only update serial numbers sold in THIS Sales Invoice
-		serial_numbers = get_serial_numbers_from_bundle(item.serial_and_batch_bundle)
+		if warranty_expiry:
+			expiry_by_item[item.name] = warranty_expiry
 
-		# Update warranty expiry date for each serial number in this Sales Invoice
-		for serial_no in serial_numbers:
-			update_serial_warranty_date(serial_no, warranty_expiry)
+	return expiry_by_item
 
 
 def calculate_warranty_expiry_date(posting_date, warranty_start_from, warranty_period, warranty_uom):
@@ -100,52 +129,64 @@ def calculate_warranty_expiry_date(posting_date, warranty_start_from, warranty_p
 	return expiry_date
 
 
-def get_serial_numbers_from_bundle(bundle_name):
+def get_serial_numbers_from_bundles(bundle_names):
 	"""
-	Get all serial numbers from a Serial and Batch Bundle.
+	Get all serial numbers from Serial and Batch Bundles in one query.
 
 	Args:
-		bundle_name: Name of the Serial and Batch Bundle
+		bundle_names: Names of the Serial and Batch Bundles
 
 	Returns:
-		List: List of serial number names
+		Dict: {bundle name: [serial number names]}
 	"""
-	serial_numbers = frappe.db.sql("""
-		SELECT serial_no
+	if not bundle_names:
+		return {}
+
+	entries = frappe.db.sql("""
+		SELECT parent, serial_no
 		FROM `tabSerial and Batch Entry`
-		WHERE parent = %(bundle)s
+		WHERE parent IN %(bundles)s
 			AND serial_no IS NOT NULL
 			AND serial_no != ''
-		ORDER BY idx
-	""", {'bundle': bundle_name}, as_dict=True)
+		ORDER BY parent, idx
+	""", {'bundles': tuple(bundle_names)}, as_dict=True)
 
-	return [entry.serial_no for entry in serial_numbers]
+	serial_numbers = {}
+	for entry in entries:
+		serial_numbers.setdefault(entry.parent, []).append(entry.serial_no)
 
+	return serial_numbers
 
-def update_serial_warranty_date(serial_no, warranty_expiry_date):
+
+def update_serial_warranty_dates(serial_numbers, warranty_expiry_date):
 	"""
-	Update warranty_expiry_date for a serial number.
+	Set warranty_expiry_date on a group of serial numbers with one UPDATE.
 	Uses the standard ERPNext warranty_expiry_date field.
 
 	Args:
-		serial_no: Serial number name
+		serial_numbers: Serial number names
 		warranty_expiry_date: Date to set as warranty expiry
+
+	Returns:
+		Int: Number of serial numbers in the group, 0 if the update failed
 	"""
-	try:
-		# Update the standard warranty_expiry_date field
-		frappe.db.set_value(
-			"Serial No",
-			serial_no,
-			"warranty_expiry_date",
-			warranty_expiry_date,
-			update_modified=False
-		)
+	if not serial_numbers:
+		return 0
 
-		frappe.logger().info(
-			f"Updated warranty expiry date for Serial No {serial_no} to {warranty_expiry_date}"
-		)
+	try:
+		frappe.db.sql("""
+			UPDATE `tabSerial No`
+			SET warranty_expiry_date = %(warranty_expiry_date)s
+			WHERE name IN %(serial_numbers)s
+		""", {
+			'warranty_expiry_date': warranty_expiry_date,
+			'serial_numbers': tuple(set(serial_numbers)),
+		})
 	except Exception as e:
 		frappe.log_error(
-			f"Failed to update warranty for Serial No {serial_no}: {str(e)}",
+			f"Failed to update warranty to {warranty_expiry_date} for {len(serial_numbers)} Serial Nos: {str(e)}",
 			"Serial Warranty Update Error"
 		)
+		return 0
+
+	return len(set(serial_numbers))
@@ -1,18 +1,15 @@
 import frappe
 
+from jain_machine_tools.utils.warehouse_cache import get_leaf_warehouses
+
 
 @frappe.whitelist()
 def get_warehouse_names():
 	"""
 	Return active, non-group warehouse names for dropdown selection.
-	Uses get_all so users without Warehouse read permission can still fetch names.
+	Read from the shared warehouse cache, so users without Warehouse read permission can still fetch names.
 	"""
-	return frappe.get_all(
-		"Warehouse",
-		filters={"disabled": 0, "is_group": 0},
-		pluck="name",
-		order_by="name asc",
-	)
+	return get_leaf_warehouses()
 
 
 @frappe.whitelist()
@@ -22,19 +19,7 @@ def get_warehouse_names_query(doctype, txt, searchfield, start, page_len, filter
 	Link-field query for warehouses.
 	Returns names even when user does not have Warehouse master access.
 	"""
-	return frappe.db.sql(
-		"""
-		SELECT name
-		FROM `tabWarehouse`
-		WHERE disabled = 0
-			AND is_group = 0
-			AND name LIKE %(txt)s
-		ORDER BY name ASC
-		LIMIT %(start)s, %(page_len)s
-		""",
-		{
-			"txt": f"%{txt}%",
-			"start": start,
-			"page_len": page_len,
-		},
-	)
+	txt = (txt or "").replace("%", "").lower()
+	start = int(start or 0)
+	matches = [(name,) for name in get_leaf_warehouses() if txt in name.lower()]
+	return matches[start : start + int(page_len or 20)]
@@ -0,0 +1,43 @@
+# Copyright (c) 2026, Praxon Technovation and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from jain_machine_tools.api.delivery_plan_invoicing import (
+	BULK_INVOICE_JOB_PREFIX,
+	get_bulk_invoice_summary,
+)
+
+
+def _make_user(email):
+	if not frappe.db.exists("User", email):
+		user = frappe.get_doc({"doctype": "User", "email": email, "first_name": email.split("@")[0]})
+		user.append("roles", {"role": "Accounts User"})
+		user.insert(ignore_permissions=True)
+	return email
+
+
+class TestDeliveryPlanInvoicing(FrappeTestCase):
+	def test_bulk_invoice_summary_access(self):
+		owner = _make_user("jmt-bulk-owner@example.com")
+		other = _make_user("jmt-bulk-other@example.com")
+		self.addCleanup(frappe.set_user, "Administrator")
+
+		job_id = f"{BULK_INVOICE_JOB_PREFIX}{frappe.generate_hash(length=10)}"
+		summary = {"job_id": job_id, "owner": owner, "total": 0, "invoices": []}
+		frappe.cache.set_value(job_id, summary)
+		self.addCleanup(frappe.cache.delete_value, job_id)
+
+		# Only bulk invoice summaries can be read, not arbitrary cache keys
+		self.assertRaises(frappe.ValidationError, get_bulk_invoice_summary, "jmt_other_cache_key")
+
+		frappe.set_user(owner)
+		self.assertEqual(get_bulk_invoice_summary(job_id), summary)
+
+		frappe.set_user(other)
+		self.assertRaises(frappe.PermissionError, get_bulk_invoice_summary, job_id)
+
+		# System Manager
+		frappe.set_user("Administrator")
+		self.assertEqual(get_bulk_invoice_summary(job_id), summary)
@@ -0,0 +1,238 @@
+# Copyright (c) 2026, Jain Machine Tools and contributors
+# For license information, please see license.txt
+
+"""
+Historical warranty expiry backfill
+- Streams submitted stock-updating Sales Invoices newest first, keyset-paginated on
+  (posting_date, name), so the latest sale of a serial is the one that stamps it
+- Only fills serials without a warranty_expiry_date, using the same rules as the
+  Sales Invoice submit hook (calculate_warranty_expiry_date)
+- Commits and checkpoints after every chunk; pausing stops after the current chunk and
+  starting again resumes from the checkpoint
+- Dry run counts the serials that would be stamped, without writing or checkpointing
+
+	bench --site <site> execute jain_machine_tools.api.warranty_backfill.start_warranty_backfill --kwargs "{'dry_run': 1}"
+"""
+
+import json
+
+import frappe
+from frappe.utils import cint, getdate, now_datetime
+
+from jain_machine_tools.api.sales_invoice_warranty import (
+	calculate_warranty_expiry_date,
+	update_serial_warranty_dates,
+)
+
+BACKFILL_JOB_ID = "jmt_warranty_backfill"
+BACKFILL_CHECKPOINT_KEY = "jmt_warranty_backfill_checkpoint"
+BACKFILL_PAUSE_KEY = "jmt_warranty_backfill_pause"
+BACKFILL_DRY_RUN_KEY = "jmt_warranty_backfill_dry_run"
+DEFAULT_CHUNK_SIZE = 500
+
+
+@frappe.whitelist()
+def start_warranty_backfill(dry_run=0, chunk_size=DEFAULT_CHUNK_SIZE, restart=0):
+	"""Queue the backfill; resumes from the checkpoint unless restart is set"""
+	frappe.only_for("System Manager")
+
+	if cint(restart) and not cint(dry_run):
+		frappe.db.set_default(BACKFILL_CHECKPOINT_KEY, "")
+
+	frappe.cache.delete_value(BACKFILL_PAUSE_KEY)
+	frappe.enqueue(
+		"jain_machine_tools.api.warranty_backfill.run_warranty_backfill",
+		queue="long",
+		timeout=12 * 60 * 60,
+		job_id=BACKFILL_JOB_ID,
+		deduplicate=True,
+		enqueue_after_commit=True,
+		dry_run=cint(dry_run),
+		chunk_size=cint(chunk_size) or DEFAULT_CHUNK_SIZE,
+	)
+
+	return get_warranty_backfill_status()
+
+
+@frappe.whitelist()
+def pause_warranty_backfill():
+	"""Ask the running backfill to stop after its current chunk"""
+	frappe.only_for("System Manager")
+	frappe.cache.set_value(BACKFILL_PAUSE_KEY, 1)
+
+
+@frappe.whitelist()
+def get_warranty_backfill_status():
+	"""Checkpoint of the last real run and the result of the last dry run"""
+	frappe.only_for("System Manager")
+	return {
+		"checkpoint": get_checkpoint(),
+		"dry_run": frappe.cache.get_value(BACKFILL_DRY_RUN_KEY),
+	}
+
+
+def run_warranty_backfill(dry_run=0, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""Background job for start_warranty_backfill"""
+	warranty_items = get_warranty_items()
+
+	checkpoint = {} if dry_run else get_checkpoint()
+	if checkpoint.get("status") == "Completed":
+		return checkpoint
+
+	cursor = (checkpoint.get("posting_date"), checkpoint.get("sales_invoice"))
+	invoices = cint(checkpoint.get("invoices"))
+	serials = cint(checkpoint.get("serials"))
+	would_stamp = set()
+	status = "Completed"
+
+	while warranty_items:
+		if frappe.cache.get_value(BACKFILL_PAUSE_KEY):
+			frappe.cache.delete_value(BACKFILL_PAUSE_KEY)
+			status = "Paused"
+			break
+
+		chunk = get_invoice_chunk(cursor, chunk_size)
+		if not chunk:
+			break
+
+		serials_by_expiry = get_missing_serials_by_expiry(chunk, warranty_items)
+		if dry_run:
+			for serial_numbers in serials_by_expiry.values():
+				would_stamp.update(serial_numbers)
+		else:
+			for warranty_expiry, serial_numbers in serials_by_expiry.items():
+				serials += update_serial_warranty_dates(serial_numbers, warranty_expiry)
+
+		invoices += len(chunk)
+		cursor = (str(chunk[-1].posting_date), chunk[-1].name)
+
+		if not dry_run:
+			save_checkpoint(cursor, invoices, serials, "Running")
+			frappe.db.commit()
+
+	if dry_run:
+		result = {
+			"invoices": invoices,
+			"serials": len(would_stamp),
+			"items": len(warranty_items),
+			"status": status,
+			"finished_at": str(now_datetime()),
+		}
+		frappe.cache.set_value(BACKFILL_DRY_RUN_KEY, result)
+		return result
+
+	save_checkpoint(cursor, invoices, serials, status)
+	frappe.db.commit()
+	frappe.logger().info(
+		f"Warranty backfill {status.lower()}: {invoices} Sales Invoices, {serials} serial numbers stamped"
+	)
+	return get_checkpoint()
+
+
+def get_warranty_items():
+	"""{item_code: (period, uom)} for serialised items warrantied from the Sales Invoice posting date"""
+	items = frappe.get_all(
+		"Item",
+		filters={
+			"has_serial_no": 1,
+			"warranty_start_from": "Sales Invoice Posting Date",
+			"company_warranty_period": (">", 0),
+			"warranty_uom": ("is", "set"),
+		},
+		fields=["name", "company_warranty_period", "warranty_uom"],
+	)
+	return {item.name: (item.company_warranty_period, item.warranty_uom) for item in items}
+
+
+def get_invoice_chunk(cursor, chunk_size):
+	"""Next submitted stock-updating Sales Invoices after the cursor, newest first"""
+	posting_date, name = cursor
+	condition = ""
+	values = {"chunk_size": chunk_size}
+
+	if posting_date and name:
+		condition = (
+			"AND (posting_date < %(posting_date)s OR (posting_date = %(posting_date)s AND name < %(name)s))"
+		)
+		values.update({"posting_date": getdate(posting_date), "name": name})
+
+	return frappe.db.sql(
+		f"""
+		SELECT name, posting_date
+		FROM `tabSales Invoice`
+		WHERE docstatus = 1
+			AND update_stock = 1
+			{condition}
+		ORDER BY posting_date DESC, name DESC
+		LIMIT %(chunk_size)s
+		""",
+		values,
+		as_dict=True,
+	)
+
+
+def get_missing_serials_by_expiry(chunk, warranty_items):
+	"""
+	{expiry date: [serial numbers]} for serials in the chunk's bundles that have no
+	warranty_expiry_date yet, one query for the whole chunk
+	"""
+	posting_dates = {row.name: row.posting_date for row in chunk}
+	entries = frappe.db.sql(
+		"""
+		SELECT sii.parent, sii.item_code, sbe.serial_no
+		FROM `tabSales Invoice Item` sii
+		INNER JOIN `tabSerial and Batch Entry` sbe
+			ON sbe.parent = sii.serial_and_batch_bundle
+		INNER JOIN `tabSerial No` sn
+			ON sn.name = sbe.serial_no
+		WHERE sii.parent IN %(invoices)s
+			AND sii.item_code IN %(items)s
+			AND sn.warranty_expiry_date IS NULL
+		""",
+		{"invoices": tuple(posting_dates), "items": tuple(warranty_items)},
+		as_dict=True,
+	)
+
+	# Newest invoice first within the chunk too, so a resold serial keeps its latest sale
+	invoice_order = {row.name: i for i, row in enumerate(chunk)}
+	entries.sort(key=lambda entry: invoice_order[entry.parent])
+
+	expiries = {}
+	serials_by_expiry = {}
+	seen = set()
+	for entry in entries:
+		if entry.serial_no in seen:
+			continue
+		seen.add(entry.serial_no)
+
+		key = (posting_dates[entry.parent], entry.item_code)
+		if key not in expiries:
+			period, uom = warranty_items[entry.item_code]
+			expiries[key] = calculate_warranty_expiry_date(key[0], "Sales Invoice Posting Date", period, uom)
+
+		if expiries[key]:
+			serials_by_expiry.setdefault(expiries[key], []).append(entry.serial_no)
+
+	return serials_by_expiry
+
+
+def get_checkpoint():
+	checkpoint = frappe.db.get_default(BACKFILL_CHECKPOINT_KEY)
+	return json.loads(checkpoint) if checkpoint else {}
+
+
+def save_checkpoint(cursor, invoices, serials, status):
+	posting_date, name = cursor
+	frappe.db.set_default(
+		BACKFILL_CHECKPOINT_KEY,
+		json.dumps(
+			{
+				"posting_date": posting_date,
+				"sales_invoice": name,
+				"invoices": invoices,
+				"serials": serials,
+				"status": status,
+				"updated_at": str(now_datetime()),
+			}
+		),
+	)
@@ -0,0 +1,91 @@
+"""
+Benchmark: PNG vs SVG barcode output for label printing.
+
+For each label count, renders every barcode uncached and reports:
+
+- render_ms: time to render all barcodes (python-barcode ImageWriter vs SVGWriter
+  plus compact_svg)
+- payload_kb: size of the barcode markup a print format would embed; data URIs for
+  png and svg, inline SVG with one <symbol> per serial for svg_symbol
+- pdf_ms: wkhtmltopdf time for a sample of pdf_labels labels of each kind
+
+Labels are printed copies times (2 for the dual label format), so symbol reuse shows.
+
+	bench --site <site> execute jain_machine_tools.benchmarks.barcode_formats.run
+	bench --site <site> execute jain_machine_tools.benchmarks.barcode_formats.run --kwargs "{'label_counts': [1000], 'copies': 1}"
+"""
+
+import json
+import time
+
+from frappe.utils.pdf import get_pdf
+
+from jain_machine_tools.utils.barcode_cache import get_render_options, render_barcode, to_data_uri
+from jain_machine_tools.utils.barcode_svg import get_svg_symbol, get_svg_use
+
+DEFAULT_LABEL_COUNTS = (100, 1000)
+KINDS = ("png", "svg", "svg_symbol")
+
+
+def run(label_counts=DEFAULT_LABEL_COUNTS, copies=2, pdf_labels=200, repeat=3):
+	"""Time and size each output kind at each label count and print a JSON result per count"""
+	options = get_render_options()
+	results = []
+
+	for count in label_counts:
+		serial_numbers = [f"JMTB-SN-{i:07d}" for i in range(int(count))]
+		result = {"labels": int(count), "copies": int(copies)}
+
+		for image_format in ("png", "svg"):
+			images = {}
+			seconds = _best_of(
+				repeat,
+				lambda: images.update(
+					{
+						serial_no: render_barcode(serial_no, "Code128", options, image_format)
+						for serial_no in serial_numbers
+					}
+				),
+			)
+			result[f"{image_format}_render_ms"] = round(seconds * 1000, 2)
+
+			markup = build_markup(images, image_format, copies)
+			result[f"{image_format}_payload_kb"] = round(len(markup) / 1024, 1)
+			if image_format == "svg":
+				symbol_markup = build_markup(images, "svg_symbol", copies)
+				result["svg_symbol_payload_kb"] = round(len(symbol_markup) / 1024, 1)
+
+			sample = dict(list(images.items())[: int(pdf_labels)])
+			for kind in (image_format, "svg_symbol") if image_format == "svg" else (image_format,):
+				html = build_markup(sample, kind, copies)
+				result[f"{kind}_pdf_ms"] = round(_best_of(1, lambda: get_pdf(html)) * 1000, 2)
+
+		result["payload_ratio"] = round(result["png_payload_kb"] / result["svg_symbol_payload_kb"], 2)
+		results.append(result)
+		print(json.dumps(result))
+
+	return results
+
+
+def build_markup(images, kind, copies=1):
+	"""Barcode markup for every label, each printed copies times"""
+	parts = []
+	for i, image in enumerate(images.values()):
+		if kind == "svg_symbol":
+			symbol, width, height = get_svg_symbol(image, f"jmt-bc-{i}")
+			parts.append(symbol)
+			parts.extend([get_svg_use(f"jmt-bc-{i}", width, height)] * copies)
+		else:
+			parts.extend([f'<img src="{to_data_uri(image, kind)}" />'] * copies)
+
+	return "<html><body>" + "".join(f"<div>{part}</div>" for part in parts) + "</body></html>"
+
+
+def _best_of(repeat, fn):
+	best = None
+	for _ in range(max(1, int(repeat))):
+		started = time.perf_counter()
+		fn()
+		elapsed = time.perf_counter() - started
+		best = elapsed if best is None else min(best, elapsed)
+	return best
@@ -0,0 +1,113 @@
+"""
+Benchmark: handling-charges totals cost per save against line count.
+
+Builds unsaved documents in memory and times the totals work a save does:
+
+- legacy: the controller's ERPNext totals pass, then the full handling
+  charges recompute the validate hook used to run
+- engine: the controller's totals pass with the shared engine, after which
+  the validate hook skips
+
+	bench --site <site> execute jain_machine_tools.benchmarks.handling_charges.run
+	bench --site <site> execute jain_machine_tools.benchmarks.handling_charges.run --kwargs "{'doctype': 'Purchase Order'}"
+"""
+
+import json
+import random
+import time
+
+import erpnext
+import frappe
+from erpnext.controllers.taxes_and_totals import calculate_taxes_and_totals
+
+from jain_machine_tools.overrides.handling_charges import (
+	apply_handling_charges,
+	calculate_taxes_and_totals_with_handling,
+)
+
+DEFAULT_LINE_COUNTS = (10, 50, 100, 200, 400)
+
+
+def run(doctype="Quotation", line_counts=DEFAULT_LINE_COUNTS, repeat=5, seed=42):
+	"""Time legacy vs engine totals per save at each line count and print a JSON result per size"""
+	results = []
+	for lines in line_counts:
+		doc = make_document(doctype, int(lines), seed)
+
+		legacy_seconds = _best_of(repeat, lambda: save_totals_legacy(doc))
+		engine_seconds = _best_of(repeat, lambda: save_totals_engine(doc))
+
+		result = {
+			"doctype": doctype,
+			"lines": int(lines),
+			"legacy_ms": round(legacy_seconds * 1000, 2),
+			"engine_ms": round(engine_seconds * 1000, 2),
+			"speedup": round(legacy_seconds / engine_seconds, 2) if engine_seconds else None,
+		}
+		results.append(result)
+		print(json.dumps(result))
+
+	return results
+
+
+def save_totals_legacy(doc):
+	"""Totals work of one save before the shared engine"""
+	calculate_taxes_and_totals(doc)
+	calculate_taxes_and_totals_with_handling(doc)
+	doc.flags.pop("handling_charges_applied", None)
+
+
+def save_totals_engine(doc):
+	"""Totals work of one save with the engine inside the controller pass"""
+	calculate_taxes_and_totals_with_handling(doc)
+	apply_handling_charges(doc)
+
+
+def make_document(doctype, lines, seed=42):
+	"""Unsaved document with priced, discounted lines and a mix of handling charge types"""
+	rng = random.Random(seed)
+	company = erpnext.get_default_company() or frappe.get_all("Company", pluck="name", limit=1)[0]
+	currency = frappe.get_cached_value("Company", company, "default_currency")
+
+	doc = frappe.new_doc(doctype)
+	doc.update(
+		{
+			"company": company,
+			"currency": currency,
+			"conversion_rate": 1,
+			"price_list_currency": currency,
+			"plc_conversion_rate": 1,
+		}
+	)
+
+	for i in range(lines):
+		price_list_rate = rng.uniform(100, 5000)
+		handling_charges_type = rng.choice((None, "Percentage", "Amount"))
+		doc.append(
+			"items",
+			{
+				"item_code": f"BENCH-ITEM-{i:05d}",
+				"item_name": f"BENCH-ITEM-{i:05d}",
+				"qty": rng.randint(1, 20),
+				"conversion_factor": 1,
+				"price_list_rate": price_list_rate,
+				"discount_percentage": rng.choice((0, 5, 10)),
+				"handling_charges_type": handling_charges_type,
+				"handling_charges_percentage": rng.choice((2, 5))
+				if handling_charges_type == "Percentage"
+				else 0,
+				"handling_charges_amount": rng.uniform(10, 100) if handling_charges_type == "Amount" else 0,
+			},
+		)
+
+	return doc
+
+
+def _best_of(repeat, fn):
+	best = None
+	for _ in range(max(1, int(repeat))):
+		started = time.perf_counter()
+		fn()
+		elapsed = time.perf_counter() - started
+		best = elapsed if best is None else min(best, elapsed)
+	return best
@@ -0,0 +1,90 @@
+"""
+Benchmark: label sheet PDF through HTML + wkhtmltopdf vs written directly.
+
+For each label count, times building the whole PDF for synthetic labels:
+
+- html_ms: barcodes from the barcode cache (warmed by the first repeat), the label
+  sheet template, get_pdf
+- direct_ms: barcode module patterns, utils/label_pdf.build_label_pdf
+
+	bench --site <site> execute jain_machine_tools.benchmarks.label_pdf.run
+	bench --site <site> execute jain_machine_tools.benchmarks.label_pdf.run --kwargs "{'label_counts': [2000], 'image_format': 'svg'}"
+"""
+
+import json
+import time
+
+import frappe
+from frappe.utils.pdf import get_pdf
+
+from jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_label_sheet import (
+	LABEL_COLUMNS,
+	LABEL_SHEET_TEMPLATE,
+	paginate_labels,
+	render_label_images,
+)
+from jain_machine_tools.utils.label_pdf import build_label_pdf, get_barcode_modules, get_label_layout
+
+DEFAULT_LABEL_COUNTS = (100, 1000)
+
+
+def run(label_counts=DEFAULT_LABEL_COUNTS, image_format="png", repeat=2):
+	"""Time both paths at each label count and print a JSON result per count"""
+	results = []
+	for count in label_counts:
+		labels = make_labels(int(count))
+
+		html_seconds = _best_of(repeat, lambda: build_html_pdf(labels, image_format))
+		direct_seconds = _best_of(repeat, lambda: build_direct_pdf(labels))
+
+		result = {
+			"labels": int(count),
+			"image_format": image_format,
+			"html_ms": round(html_seconds * 1000, 2),
+			"direct_ms": round(direct_seconds * 1000, 2),
+			"speedup": round(html_seconds / direct_seconds, 2) if direct_seconds else None,
+		}
+		results.append(result)
+		print(json.dumps(result))
+
+	return results
+
+
+def make_labels(count):
+	return [
+		frappe._dict(
+			serial_no=f"JMTB-SN-{i:07d}",
+			item_code=f"BENCH-ITEM-{i % 50:05d}",
+			brand="BENCH BRAND",
+			manufacturing_date="17-10-2026",
+			expiry_date="17-10-2027",
+		)
+		for i in range(count)
+	]
+
+
+def build_html_pdf(labels, image_format="png"):
+	images = render_label_images([label.serial_no for label in labels], image_format=image_format)
+	for label in labels:
+		label.barcode_img = images.get(label.serial_no) or ""
+
+	html = frappe.render_template(
+		LABEL_SHEET_TEMPLATE,
+		{"doc": frappe._dict(), "pages": paginate_labels(labels), "columns": LABEL_COLUMNS},
+	)
+	return get_pdf(html, {"page-size": "A4", "margin-top": "8mm", "margin-bottom": "8mm"})
+
+
+def build_direct_pdf(labels):
+	direct_labels = [{**label, "modules": get_barcode_modules(label.serial_no)} for label in labels]
+	return build_label_pdf(direct_labels, get_label_layout())
+
+
+def _best_of(repeat, fn):
+	best = None
+	for _ in range(max(1, int(repeat))):
+		started = time.perf_counter()
+		fn()
+		elapsed = time.perf_counter() - started
+		best = elapsed if best is None else min(best, elapsed)
+	return best
@@ -0,0 +1,386 @@
+"""
+Benchmark: the auto reorder pipeline against a synthetic catalogue.
+
+Generates items (with variants), a multi-level warehouse tree, Item Reorder
+rows and Bins directly in the database of a test site, runs the pipeline in
+dry-run mode (MRs are built, never inserted) and reports per-phase wall time,
+query count and peak memory at each scale point as JSON:
+
+	bench --site <test-site> jmt-reorder-benchmark --scales 1000,10000,50000 --output after.json
+	bench --site <test-site> jmt-reorder-benchmark-diff before.json after.json
+
+Refuses to run unless the site has allow_tests or developer_mode set. All
+generated records are prefixed with JMTB and removed before each scale point.
+"""
+
+import json
+import random
+import time
+import tracemalloc
+
+import erpnext
+import frappe
+from frappe.utils import now_datetime
+
+from jain_machine_tools.stock.optimized_reorder import _execute_optimized_reorder
+from jain_machine_tools.stock.reorder_run_log import PHASES, ReorderRunTracker
+from jain_machine_tools.utils.warehouse_cache import invalidate_warehouse_tree
+
+PREFIX = "JMTB"
+DEFAULT_SCALES = (1_000, 10_000, 50_000)
+
+
+def run(
+	scales=DEFAULT_SCALES,
+	rows_per_item=3,
+	variant_ratio=0.2,
+	tree_depth=3,
+	tree_branching=4,
+	output=None,
+	keep_data=False,
+	seed=42,
+):
+	"""Generate, run and measure each scale point; returns (and optionally writes) the JSON result"""
+	_check_site()
+
+	results = {
+		"site": frappe.local.site,
+		"generated_at": str(now_datetime()),
+		"parameters": {
+			"rows_per_item": rows_per_item,
+			"variant_ratio": variant_ratio,
+			"tree_depth": tree_depth,
+			"tree_branching": tree_branching,
+			"seed": seed,
+		},
+		"scale_points": [],
+	}
+
+	try:
+		for scale in scales:
+			cleanup()
+			dataset = generate_dataset(
+				int(scale), rows_per_item, variant_ratio, tree_depth, tree_branching, seed
+			)
+			result = measure_pipeline()
+			result.update({"items": int(scale), **dataset})
+			results["scale_points"].append(result)
+			print(json.dumps(result))
+	finally:
+		if not keep_data:
+			cleanup()
+
+	if output:
+		with open(output, "w") as f:
+			json.dump(results, f, indent=1)
+
+	return results
+
+
+def measure_pipeline():
+	"""One dry run: wall time and query count per phase, peak traced memory"""
+	run_log = ReorderRunTracker(mode="Full Rescan")
+	queries = {}
+
+	db = frappe.db
+	original_sql = db.sql
+
+	def counting_sql(*args, **kwargs):
+		phase = run_log.current_phase or "other"
+		queries[phase] = queries.get(phase, 0) + 1
+		return original_sql(*args, **kwargs)
+
+	db.sql = counting_sql
+	tracemalloc.start()
+	started = time.perf_counter()
+	try:
+		material_requests = _execute_optimized_reorder(full_rescan=True, run_log=run_log, dry_run=True)
+	finally:
+		total_seconds = time.perf_counter() - started
+		_current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		db.sql = original_sql
+
+	counts = {
+		fieldname: run_log.values.get(fieldname) or 0
+		for fieldname in (
+			"items_considered",
+			"reorder_rows",
+			"bins_loaded",
+			"pending_reorder_bins",
+			"groups_planned",
+			"mr_lines",
+		)
+	}
+
+	return {
+		"total_seconds": round(total_seconds, 4),
+		"phase_seconds": {phase: round(run_log.values[f"{phase}_seconds"], 4) for phase in PHASES},
+		"queries": sum(queries.values()),
+		"phase_queries": queries,
+		"peak_memory_mb": round(peak / (1024 * 1024), 2),
+		"material_requests": len(material_requests or []),
+		"counts": counts,
+	}
+
+
+def generate_dataset(items, rows_per_item=3, variant_ratio=0.2, tree_depth=3, tree_branching=4, seed=42):
+	"""Bulk insert the synthetic catalogue; returns the generated row counts"""
+	rng = random.Random(seed)
+	company = erpnext.get_default_company() or frappe.get_all("Company", pluck="name", limit=1)[0]
+
+	groups, leaves = _generate_warehouse_tree(company, tree_depth, tree_branching)
+
+	templates = max(1, int(items * variant_ratio / 4)) if variant_ratio else 0
+	variants = templates * 4 if variant_ratio else 0
+	plain = max(0, items - templates - variants)
+
+	now = now_datetime()
+	meta = {"creation": now, "modified": now, "owner": "Administrator", "modified_by": "Administrator"}
+
+	item_rows = []
+	reorder_rows = []
+	bin_rows = []
+
+	def add_item(item_code, has_variants=0, variant_of=None):
+		item_rows.append(
+			(
+				item_code,
+				item_code,
+				item_code,
+				item_code,
+				"All Item Groups",
+				"Nos",
+				rng.choice(("Nos", "Nos", "Box")),
+				1,
+				0,
+				has_variants,
+				variant_of,
+				rng.randint(0, 14),
+				*meta.values(),
+			)
+		)
+
+	def add_reorder_rows(item_code):
+		for idx, warehouse in enumerate(rng.sample(leaves, min(rows_per_item, len(leaves))), start=1):
+			reorder_rows.append(
+				(
+					frappe.generate_hash(length=10),
+					item_code,
+					"Item",
+					"reorder_levels",
+					idx,
+					warehouse,
+					rng.choice(groups) if rng.random() < 0.25 else None,
+					rng.randint(10, 100),
+					rng.randint(0, 50),
+					rng.choice(("Purchase", "Purchase", "Transfer")),
+					*meta.values(),
+				)
+			)
+
+	def add_bins(item_code):
+		for warehouse in rng.sample(leaves, min(rows_per_item + 1, len(leaves))):
+			actual_qty = rng.uniform(0, 150)
+			bin_rows.append(
+				(
+					frappe.generate_hash(length=10),
+					item_code,
+					warehouse,
+					"Nos",
+					actual_qty,
+					actual_qty + rng.uniform(-20, 20),
+					*meta.values(),
+				)
+			)
+
+	for i in range(plain):
+		item_code = f"{PREFIX}-ITEM-{i:07d}"
+		add_item(item_code)
+		add_reorder_rows(item_code)
+		add_bins(item_code)
+
+	for t in range(templates):
+		template = f"{PREFIX}-TMPL-{t:06d}"
+		add_item(template, has_variants=1)
+		add_reorder_rows(template)
+		for v in range(4):
+			variant = f"{template}-V{v}"
+			add_item(variant, variant_of=template)
+			add_bins(variant)
+
+	meta_fields = list(meta)
+	frappe.db.bulk_insert(
+		"Item",
+		[
+			"name",
+			"item_code",
+			"item_name",
+			"description",
+			"item_group",
+			"stock_uom",
+			"purchase_uom",
+			"is_stock_item",
+			"disabled",
+			"has_variants",
+			"variant_of",
+			"lead_time_days",
+			*meta_fields,
+		],
+		item_rows,
+	)
+	frappe.db.bulk_insert(
+		"Item Reorder",
+		[
+			"name",
+			"parent",
+			"parenttype",
+			"parentfield",
+			"idx",
+			"warehouse",
+			"warehouse_group",
+			"warehouse_reorder_level",
+			"warehouse_reorder_qty",
+			"material_request_type",
+			*meta_fields,
+		],
+		reorder_rows,
+	)
+	frappe.db.bulk_insert(
+		"Bin",
+		["name", "item_code", "warehouse", "stock_uom", "actual_qty", "projected_qty", *meta_fields],
+		bin_rows,
+	)
+	frappe.db.commit()
+
+	return {
+		"generated": {
+			"items": len(item_rows),
+			"templates": templates,
+			"variants": variants,
+			"warehouses": len(groups) + len(leaves),
+			"leaf_warehouses": len(leaves),
+			"item_reorder_rows": len(reorder_rows),
+			"bins": len(bin_rows),
+		}
+	}
+
+
+def _generate_warehouse_tree(company, depth, branching):
+	"""Nested-set warehouse tree placed after every existing warehouse"""
+	abbr = frappe.get_cached_value("Company", company, "abbr")
+	next_lft = (frappe.db.sql("select max(rgt) from `tabWarehouse`")[0][0] or 0) + 1
+
+	now = now_datetime()
+	rows = []
+	groups = []
+	leaves = []
+
+	def add(label, parent, level):
+		nonlocal next_lft
+		name = f"{PREFIX} {label} - {abbr}"
+		lft = next_lft
+		next_lft += 1
+
+		is_group = level < depth
+		if is_group:
+			groups.append(name)
+			for child in range(branching):
+				add(f"{label}.{child}", name, level + 1)
+		else:
+			leaves.append(name)
+
+		rgt = next_lft
+		next_lft += 1
+		rows.append(
+			(
+				name,
+				f"{PREFIX} {label}",
+				company,
+				parent,
+				int(is_group),
+				0,
+				lft,
+				rgt,
+				now,
+				now,
+				"Administrator",
+				"Administrator",
+			)
+		)
+
+	add("Root", None, 0)
+
+	frappe.db.bulk_insert(
+		"Warehouse",
+		[
+			"name",
+			"warehouse_name",
+			"company",
+			"parent_warehouse",
+			"is_group",
+			"disabled",
+			"lft",
+			"rgt",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+		],
+		rows,
+	)
+	invalidate_warehouse_tree()
+
+	return groups, leaves
+
+
+def cleanup():
+	"""Remove every generated record"""
+	like = f"{PREFIX}%"
+	frappe.db.sql("delete from `tabItem Reorder` where parent like %s", like)
+	frappe.db.sql("delete from `tabBin` where item_code like %s", like)
+	frappe.db.sql("delete from `tabItem` where name like %s", like)
+	frappe.db.sql("delete from `tabWarehouse` where name like %s", like)
+	frappe.db.commit()
+	invalidate_warehouse_tree()
+
+
+def diff(before, after):
+	"""Compare two result files scale point by scale point; returns (and prints) the deltas"""
+	with open(before) as f:
+		before = {point["items"]: point for point in json.load(f)["scale_points"]}
+	with open(after) as f:
+		after = {point["items"]: point for point in json.load(f)["scale_points"]}
+
+	deltas = []
+	for items in sorted(set(before) & set(after)):
+		b, a = before[items], after[items]
+		delta = {
+			"items": items,
+			"total_seconds": _delta(b["total_seconds"], a["total_seconds"]),
+			"queries": _delta(b["queries"], a["queries"]),
+			"peak_memory_mb": _delta(b["peak_memory_mb"], a["peak_memory_mb"]),
+			"phase_seconds": {
+				phase: _delta(b["phase_seconds"].get(phase, 0), a["phase_seconds"].get(phase, 0))
+				for phase in PHASES
+			},
+		}
+		deltas.append(delta)
+		print(json.dumps(delta))
+
+	return deltas
+
+
+def _delta(before, after):
+	return {
+		"before": before,
+		"after": after,
+		"change_pct": round((after - before) * 100 / before, 1) if before else None,
+	}
+
+
+def _check_site():
+	if not (frappe.conf.get("allow_tests") or frappe.conf.get("developer_mode")):
+		frappe.throw(
+			"The reorder benchmark writes synthetic data; run it on a test site (allow_tests or developer_mode)"
+		)
@@ -0,0 +1,162 @@
+"""
+Benchmark: row-by-row reorder decisions vs the vectorized planner.
+
+Runs on synthetic in-memory reorder rows, so no site data is touched:
+
+	bench --site <site> execute jain_machine_tools.benchmarks.reorder_planner.run
+	bench --site <site> execute jain_machine_tools.benchmarks.reorder_planner.run --kwargs "{'sizes': [10000]}"
+"""
+
+import json
+import random
+import time
+from math import ceil
+
+import frappe
+
+from jain_machine_tools.stock.optimized_reorder import get_order_uom, process_item_for_reorder
+from jain_machine_tools.stock.reorder_planner import plan_material_requests
+
+DEFAULT_SIZES = (10_000, 100_000, 500_000)
+
+
+def run(sizes=DEFAULT_SIZES, warehouses=50, companies=3, repeat=3, seed=42):
+	"""Time both planners at each size and print a JSON result per size"""
+	results = []
+	for size in sizes:
+		dataset = make_dataset(int(size), warehouses, companies, seed)
+		python_seconds = _best_of(repeat, lambda: plan_row_by_row(**dataset))
+		vectorized_seconds = _best_of(repeat, lambda: plan_material_requests(**dataset))
+
+		_assert_same_plan(plan_row_by_row(**dataset), plan_material_requests(**dataset))
+
+		result = {
+			"reorder_rows": int(size),
+			"python_seconds": round(python_seconds, 4),
+			"vectorized_seconds": round(vectorized_seconds, 4),
+			"speedup": round(python_seconds / vectorized_seconds, 2) if vectorized_seconds else None,
+		}
+		results.append(result)
+		print(json.dumps(result))
+
+	return results
+
+
+def make_dataset(size, warehouses=50, companies=3, seed=42):
+	"""Synthetic planner inputs with roughly a third of the rows below their reorder level"""
+	rng = random.Random(seed)
+	warehouse_names = [f"BW-{i:03d}" for i in range(warehouses)]
+	warehouse_company = {wh: f"Bench Company {i % companies}" for i, wh in enumerate(warehouse_names)}
+	uoms = ["Nos", "Box", "Kg"]
+
+	items_to_consider = {}
+	item_warehouse_projected_qty = {}
+	conversion_factors = {}
+	rows_per_item = 5
+
+	for item_index in range(ceil(size / rows_per_item)):
+		item_code = f"BENCH-ITEM-{item_index:06d}"
+		purchase_uom = rng.choice(uoms)
+		if purchase_uom != "Nos":
+			conversion_factors[(item_code, purchase_uom)] = rng.choice((6.0, 12.0, 25.0))
+
+		reorder_levels = []
+		for warehouse in rng.sample(warehouse_names, rows_per_item):
+			reorder_level = rng.randint(10, 100)
+			reorder_levels.append(
+				frappe._dict(
+					{
+						"name": item_code,
+						"warehouse": warehouse,
+						"warehouse_group": None,
+						"material_request_type": rng.choice(("Purchase", "Purchase", "Transfer")),
+						"warehouse_reorder_level": reorder_level,
+						"warehouse_reorder_qty": rng.randint(0, 50),
+						"stock_uom": "Nos",
+						"purchase_uom": purchase_uom,
+						"item_name": item_code,
+						"item_group": "Products",
+						"brand": None,
+						"description": item_code,
+						"has_variants": 0,
+						"lead_time_days": rng.randint(0, 14),
+					}
+				)
+			)
+			item_warehouse_projected_qty.setdefault(item_code, {})[warehouse] = rng.uniform(
+				0, reorder_level * 3
+			)
+
+		items_to_consider[item_code] = reorder_levels
+
+	return {
+		"items_to_consider": items_to_consider,
+		"item_warehouse_projected_qty": item_warehouse_projected_qty,
+		"warehouse_company": warehouse_company,
+		"default_company": "Bench Company 0",
+		"uom_snapshot": frappe._dict(conversion_factors=conversion_factors, whole_number_uoms={"Nos", "Box"}),
+	}
+
+
+def plan_row_by_row(
+	items_to_consider, item_warehouse_projected_qty, warehouse_company, default_company, uom_snapshot
+):
+	"""
+	The Python path: process_item_for_reorder per row, then the same UOM
+	conversion MR construction applies per line, read from the snapshot
+	"""
+	material_requests = {}
+	for item_code, reorder_levels in items_to_consider.items():
+		for d in reorder_levels:
+			if d.has_variants:
+				continue
+
+			process_item_for_reorder(
+				item_code=item_code,
+				item_data=d,
+				item_warehouse_projected_qty=item_warehouse_projected_qty,
+				warehouse_company=warehouse_company,
+				default_company=default_company,
+				material_requests=material_requests,
+			)
+
+	for (_company, _warehouse, request_type), lines in material_requests.items():
+		for line in lines:
+			item = line["item_details"]
+			uom = get_order_uom(item, request_type)
+			conversion_factor = 1.0
+			if uom != item.stock_uom:
+				conversion_factor = uom_snapshot.conversion_factors.get((line["item_code"], uom)) or 1.0
+
+			qty = line["reorder_qty"] / conversion_factor
+			if uom in uom_snapshot.whole_number_uoms:
+				qty = ceil(qty)
+
+			line.update({"uom": uom, "conversion_factor": conversion_factor, "qty": qty})
+
+	return material_requests
+
+
+def _assert_same_plan(expected, actual):
+	if list(expected) != list(actual):
+		frappe.throw("Vectorized planner produced different MR groups")
+
+	for group_key, lines in expected.items():
+		for expected_line, actual_line in zip(lines, actual[group_key], strict=True):
+			for key in ("item_code", "warehouse", "uom"):
+				if expected_line[key] != actual_line[key]:
+					frappe.throw(f"Planner mismatch in {group_key}: {key}")
+
+			for key in ("reorder_qty", "conversion_factor", "qty"):
+				if abs(expected_line[key] - actual_line[key]) > 1e-9:
+					frappe.throw(f"Planner mismatch in {group_key}: {key}")
+
+
+def _best_of(repeat, fn):
+	best = None
+	for _ in range(max(1, int(repeat))):
+		started = time.perf_counter()
+		fn()
+		elapsed = time.perf_counter() - started
+		best = elapsed if best is None else min(best, elapsed)
+	return best
@@ -0,0 +1,104 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("jmt-reorder-benchmark")
+@click.option("--scales", default="1000,10000,50000", help="Comma-separated item counts to measure")
+@click.option("--rows-per-item", default=3, type=int, help="Item Reorder rows per item")
+@click.option("--variant-ratio", default=0.2, type=float, help="Share of items that are variants")
+@click.option("--tree-depth", default=3, type=int, help="Levels below the synthetic root warehouse")
+@click.option("--tree-branching", default=4, type=int, help="Children per group warehouse")
+@click.option("--output", help="Write the JSON result to this file")
+@click.option("--keep-data", is_flag=True, default=False, help="Leave the last synthetic dataset in place")
+@pass_context
+def reorder_benchmark(
+	context, scales, rows_per_item, variant_ratio, tree_depth, tree_branching, output, keep_data
+):
+	"""Measure the auto reorder pipeline on synthetic data (test sites only)"""
+	import frappe
+
+	from jain_machine_tools.benchmarks.reorder_pipeline import run
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		run(
+			scales=[int(scale) for scale in scales.split(",") if scale.strip()],
+			rows_per_item=rows_per_item,
+			variant_ratio=variant_ratio,
+			tree_depth=tree_depth,
+			tree_branching=tree_branching,
+			output=output,
+			keep_data=keep_data,
+		)
+	finally:
+		frappe.destroy()
+
+
+@click.command("jmt-reorder-benchmark-diff")
+@click.argument("before")
+@click.argument("after")
+def reorder_benchmark_diff(before, after):
+	"""Compare two jmt-reorder-benchmark result files"""
+	from jain_machine_tools.benchmarks.reorder_pipeline import diff
+
+	diff(before, after)
+
+
+@click.command("jmt-rebuild-dps-invoiced-qty")
+@click.option(
+	"--schedule", "schedules", multiple=True, help="Delivery Planning Schedule to rebuild (default: all)"
+)
+@pass_context
+def dps_invoiced_qty_rebuild(context, schedules):
+	"""Recompute Delivery Planning Schedule Item invoiced qty from submitted Sales Invoices"""
+	import frappe
+
+	from jain_machine_tools.overrides.sales_invoice import rebuild_dps_invoiced_qty
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		rebuild_dps_invoiced_qty(list(schedules) or None)
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+
+@click.command("jmt-check-dps-invoiced-qty")
+@click.option(
+	"--schedule", "schedules", multiple=True, help="Delivery Planning Schedule to check (default: all)"
+)
+@pass_context
+def dps_invoiced_qty_check(context, schedules):
+	"""List Delivery Planning Schedule Items whose invoiced qty is out of sync; exits 1 if any"""
+	import frappe
+
+	from jain_machine_tools.overrides.sales_invoice import check_dps_invoiced_qty
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		mismatches = check_dps_invoiced_qty(list(schedules) or None)
+	finally:
+		frappe.destroy()
+
+	for row in mismatches:
+		click.echo(
+			f"{row.delivery_planning_schedule} {row.delivery_planning_schedule_item}: "
+			f"invoiced_qty {row.invoiced_qty}, expected {row.expected_qty}"
+		)
+
+	if mismatches:
+		click.echo(f"{len(mismatches)} row(s) out of sync, run jmt-rebuild-dps-invoiced-qty to repair")
+		raise SystemExit(1)
+
+	click.echo("All Delivery Planning Schedule invoiced quantities are in sync")
+
+
+commands = [
+	reorder_benchmark,
+	reorder_benchmark_diff,
+	dps_invoiced_qty_rebuild,
+	dps_invoiced_qty_check,
+]
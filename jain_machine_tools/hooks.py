@@ -10,10 +10,6 @@ app_license = "mit"
 
 # required_apps = []
 
-boot_session = [
-    "jain_machine_tools.patches.reorder_override.override_erpnext_reorder"
-]
-
 # Each item in the list will be shown as an app in the apps page
 # add_to_apps_screen = [
 # 	{
@@ -107,7 +103,9 @@ doctype_js = {
 # add methods and filters to jinja environment
 jinja = {
     "methods": [
-        "jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_printing.get_barcode_image"
+        "jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_printing.get_barcode_image",
+        "jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_printing.get_barcode_svg",
+        "jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_printing.new_barcode_svg_scope",
     ]
 }
 
@@ -257,6 +255,25 @@ doc_events = {
     "Stock Entry": {
         "validate": "jain_machine_tools.api.serial_case_hooks.normalize_item_serial_fields"
     },
+    "Stock Ledger Entry": {
+        "on_submit": "jain_machine_tools.stock.optimized_reorder.mark_bin_dirty"
+    },
+    "Warehouse": {
+        "on_update": "jain_machine_tools.utils.warehouse_cache.invalidate_warehouse_tree",
+        "on_trash": "jain_machine_tools.utils.warehouse_cache.invalidate_warehouse_tree",
+        "after_rename": "jain_machine_tools.utils.warehouse_cache.invalidate_warehouse_tree"
+    },
+    "Custom Field": {
+        "on_update": "jain_machine_tools.utils.precision_cache.invalidate_precision_cache",
+        "on_trash": "jain_machine_tools.utils.precision_cache.invalidate_precision_cache"
+    },
+    "Property Setter": {
+        "on_update": "jain_machine_tools.utils.precision_cache.invalidate_precision_cache",
+        "on_trash": "jain_machine_tools.utils.precision_cache.invalidate_precision_cache"
+    },
+    "System Settings": {
+        "on_update": "jain_machine_tools.utils.precision_cache.invalidate_precision_cache"
+    },
     "Delivery Note": {
         "validate": "jain_machine_tools.overrides.quotation.validate_delivery_note"
     },
@@ -277,6 +294,10 @@ scheduler_events = {
 	"daily": [
 		"jain_machine_tools.stock.optimized_reorder.optimized_reorder_item"
 	],
+	# Full catalogue rescan as a fallback for changes the incremental run cannot see
+	"weekly": [
+		"jain_machine_tools.stock.optimized_reorder.run_full_reorder"
+	],
 }
 
 
@@ -311,12 +332,14 @@ override_whitelisted_methods = {
 
 # Request Events
 # ----------------
-before_request = ["jain_machine_tools.overrides.quotation.patch_insert_item_price"]
+# Runtime patches are applied once per process, on app import and here for processes
+# that have not imported the app yet; see monkey_patches/__init__.py
+before_request = ["jain_machine_tools.monkey_patches.apply_all"]
 # after_request = ["jain_machine_tools.utils.after_request"]
 
 # Job Events
 # ----------
-# before_job = ["jain_machine_tools.utils.before_job"]
+before_job = ["jain_machine_tools.monkey_patches.apply_all"]
 # after_job = ["jain_machine_tools.utils.after_job"]
 
 # User Data Protection
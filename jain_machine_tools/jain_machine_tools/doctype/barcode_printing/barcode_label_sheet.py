@@ -0,0 +1,312 @@
+# Copyright (c) 2026, Praxon Technovation and contributors
+# For license information, please see license.txt
+
+"""
+Label sheet PDF for a Barcode Printing document, built in a background job
+- Barcodes already in the barcode cache are reused; the rest are rendered in a
+  ProcessPoolExecutor sized to the available cores and stored back in the cache
+- Labels are laid out LABELS_PER_PAGE to an A4 page and printed with get_pdf
+- The PDF is attached to the Barcode Printing document; progress and the result are
+  published over realtime to the user who queued it
+
+Site config: jmt_label_sheet_workers caps the pool size.
+
+download_label_pdf is the fast path: the PDF is written directly (utils/label_pdf.py)
+with vector barcodes and streamed back in the response, no HTML or images involved.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import frappe
+from frappe import _
+from frappe.utils import cint, formatdate
+from frappe.utils.pdf import get_pdf
+from werkzeug.wrappers import Response
+
+from jain_machine_tools.utils.barcode_cache import (
+	IMAGE_FORMATS,
+	get_cache_key,
+	get_cached_image,
+	get_render_options,
+	render_barcode,
+	store_barcode,
+	to_data_uri,
+)
+from jain_machine_tools.utils.label_pdf import get_barcode_modules, get_label_layout, iter_label_pdf
+
+LABELS_PER_PAGE = 10
+LABEL_COLUMNS = 2
+LABEL_SHEET_TEMPLATE = (
+	"jain_machine_tools/jain_machine_tools/doctype/barcode_printing/barcode_label_sheet.html"
+)
+LABEL_SHEET_PROGRESS_EVENT = "jmt_label_sheet_progress"
+LABEL_SHEET_DONE_EVENT = "jmt_label_sheet_done"
+
+# Below this many uncached barcodes, starting worker processes costs more than it saves
+MIN_PARALLEL_RENDERS = 50
+PROGRESS_INTERVAL = 100
+
+
+@frappe.whitelist()
+def enqueue_label_sheet(barcode_printing, labels_per_page=LABELS_PER_PAGE, image_format="png"):
+	"""Queue the label sheet PDF for a Barcode Printing document, with PNG or SVG barcodes"""
+	doc = frappe.get_doc("Barcode Printing", barcode_printing)
+	doc.check_permission("print")
+
+	if not doc.table_hjbk:
+		frappe.throw(_("Add serial numbers before generating the label sheet"))
+
+	if image_format not in IMAGE_FORMATS:
+		frappe.throw(_("Unsupported barcode format: {0}").format(image_format))
+
+	job_id = f"jmt_label_sheet::{doc.name}"
+	frappe.enqueue(
+		"jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_label_sheet.make_label_sheet",
+		queue="long",
+		timeout=60 * 60,
+		job_id=job_id,
+		deduplicate=True,
+		enqueue_after_commit=True,
+		barcode_printing=doc.name,
+		labels_per_page=cint(labels_per_page) or LABELS_PER_PAGE,
+		image_format=image_format,
+	)
+
+	return {"job_id": job_id, "labels": len(doc.table_hjbk)}
+
+
+@frappe.whitelist()
+def download_label_pdf(barcode_printing, layout=None, layout_overrides=None):
+	"""
+	Label PDF written directly, streamed as it is generated.
+	layout is a LABEL_LAYOUTS preset name, layout_overrides a JSON dict of layout settings.
+	"""
+	doc = frappe.get_doc("Barcode Printing", barcode_printing)
+	doc.check_permission("print")
+
+	try:
+		layout = get_label_layout(layout, frappe.parse_json(layout_overrides) if layout_overrides else None)
+	except ValueError as e:
+		frappe.throw(str(e))
+
+	labels = get_labels(doc)
+	for label in labels:
+		# Encoded before streaming starts, so a bad serial cannot cut the PDF short
+		try:
+			label.modules = get_barcode_modules(label.serial_no)
+		except Exception as e:
+			frappe.log_error(f"Error generating barcode: {e!s}", "Barcode Generation Error")
+			label.modules = ""
+
+	return Response(
+		iter_label_pdf(labels, layout),
+		mimetype="application/pdf",
+		headers={"Content-Disposition": f'inline; filename="{doc.name}-labels.pdf"'},
+		direct_passthrough=True,
+	)
+
+
+def make_label_sheet(barcode_printing, labels_per_page=LABELS_PER_PAGE, image_format="png"):
+	"""Background job: render, lay out and attach the label sheet"""
+	user = frappe.session.user
+	job_id = f"jmt_label_sheet::{barcode_printing}"
+
+	def publish_progress(done, total):
+		frappe.publish_realtime(
+			LABEL_SHEET_PROGRESS_EVENT,
+			{"job_id": job_id, "processed": done, "total": total},
+			user=user,
+		)
+
+	try:
+		doc = frappe.get_doc("Barcode Printing", barcode_printing)
+		labels = get_labels(doc)
+		images = render_label_images(
+			[label.serial_no for label in labels], image_format=image_format, progress=publish_progress
+		)
+		for label in labels:
+			label.barcode_img = images.get(label.serial_no) or ""
+
+		pdf = get_pdf(
+			frappe.render_template(
+				LABEL_SHEET_TEMPLATE,
+				{"doc": doc, "pages": paginate_labels(labels, labels_per_page), "columns": LABEL_COLUMNS},
+			),
+			{
+				"page-size": "A4",
+				"margin-top": "8mm",
+				"margin-bottom": "8mm",
+				"margin-left": "0mm",
+				"margin-right": "0mm",
+			},
+		)
+		file_doc = attach_label_sheet(doc, pdf)
+		frappe.db.commit()
+	except Exception:
+		frappe.db.rollback()
+		frappe.log_error(
+			title="Barcode Label Sheet Error",
+			reference_doctype="Barcode Printing",
+			reference_name=barcode_printing,
+		)
+		frappe.publish_realtime(
+			LABEL_SHEET_DONE_EVENT,
+			{"job_id": job_id, "error": _("Label sheet could not be generated, see the Error Log")},
+			user=user,
+		)
+		return
+
+	frappe.publish_realtime(
+		LABEL_SHEET_DONE_EVENT,
+		{"job_id": job_id, "file_url": file_doc.file_url, "labels": len(labels)},
+		user=user,
+	)
+	return file_doc.file_url
+
+
+def get_labels(doc):
+	"""One label per table row, with the item brand looked up once per item and display dates"""
+	item_codes = {row.item_code for row in doc.table_hjbk if row.item_code}
+	brands = (
+		dict(
+			frappe.get_all(
+				"Item",
+				filters={"name": ("in", list(item_codes))},
+				fields=["name", "brand"],
+				as_list=True,
+			)
+		)
+		if item_codes
+		else {}
+	)
+
+	labels = []
+	for row in doc.table_hjbk:
+		serial_no = row.manual_serial_no if doc.type == "Opening Stock" else row.serial_no
+		labels.append(
+			frappe._dict(
+				serial_no=serial_no or "NO-SERIAL",
+				item_code=row.item_code,
+				brand=brands.get(row.item_code) or "",
+				manufacturing_date=formatdate(row.vendor_manufacturing_date)
+				if row.vendor_manufacturing_date
+				else "",
+				expiry_date=formatdate(row.warranty_expiry_date) if row.warranty_expiry_date else "",
+			)
+		)
+
+	return labels
+
+
+def render_label_images(
+	serial_numbers, barcode_type="Code128", options=None, image_format="png", progress=None
+):
+	"""
+	{serial_no: data URI} for every serial number; "" where the barcode could not be rendered.
+	Cache hits are served directly, misses are rendered in worker processes.
+	"""
+	options = get_render_options(options)
+	keys = {
+		serial_no: get_cache_key(serial_no, barcode_type, options, image_format)
+		for serial_no in serial_numbers
+	}
+	total = len(keys)
+
+	images = {}
+	misses = []
+	for serial_no, key in keys.items():
+		image = get_cached_image(key, image_format)
+		if image:
+			images[serial_no] = to_data_uri(image, image_format)
+		else:
+			misses.append(serial_no)
+
+	if progress:
+		progress(len(images), total)
+
+	for i, (serial_no, image) in enumerate(
+		_render_images(misses, barcode_type, options, image_format), start=1
+	):
+		if image:
+			image = to_data_uri(store_barcode(keys[serial_no], image, image_format), image_format)
+		images[serial_no] = image or ""
+
+		if progress and (i % PROGRESS_INTERVAL == 0 or i == len(misses)):
+			progress(total - len(misses) + i, total)
+
+	return images
+
+
+def paginate_labels(labels, labels_per_page=LABELS_PER_PAGE, columns=LABEL_COLUMNS):
+	"""Pages of rows of labels, the last row of each page padded with None"""
+	pages = []
+	for start in range(0, len(labels), labels_per_page):
+		page = labels[start : start + labels_per_page]
+		page += [None] * (-len(page) % columns)
+		pages.append([page[i : i + columns] for i in range(0, len(page), columns)])
+
+	return pages
+
+
+def attach_label_sheet(doc, pdf):
+	"""Attach the PDF as a private File, replacing the previous label sheet of the document"""
+	file_name = f"{doc.name}-labels.pdf"
+	for name in frappe.get_all(
+		"File",
+		filters={"attached_to_doctype": doc.doctype, "attached_to_name": doc.name, "file_name": file_name},
+		pluck="name",
+	):
+		frappe.delete_doc("File", name, ignore_permissions=True)
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"attached_to_doctype": doc.doctype,
+			"attached_to_name": doc.name,
+			"is_private": 1,
+			"content": pdf,
+		}
+	)
+	file_doc.save(ignore_permissions=True)
+	return file_doc
+
+
+def _render_images(serial_numbers, barcode_type, options, image_format):
+	"""Yield (serial_no, image bytes or None) in order, in a process pool when it pays off"""
+	if len(serial_numbers) < MIN_PARALLEL_RENDERS:
+		for serial_no in serial_numbers:
+			yield serial_no, _render_image(serial_no, barcode_type, options, image_format)
+		return
+
+	workers = _get_worker_count(len(serial_numbers))
+	# spawn, not fork: the job process holds DB / Redis connections and threads
+	with ProcessPoolExecutor(
+		max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+	) as executor:
+		images = executor.map(
+			_render_image,
+			serial_numbers,
+			repeat(barcode_type),
+			repeat(options),
+			repeat(image_format),
+			chunksize=max(1, len(serial_numbers) // (workers * 4)),
+		)
+		yield from zip(serial_numbers, images, strict=True)
+
+
+def _render_image(serial_no, barcode_type, options, image_format):
+	# Runs in the worker processes: no frappe.local here, and one bad serial must not fail the sheet
+	try:
+		return render_barcode(serial_no, barcode_type, options, image_format)
+	except Exception:
+		return None
+
+
+def _get_worker_count(renders):
+	cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+	limit = cint(frappe.conf.get("jmt_label_sheet_workers")) or cores or 1
+	return max(1, min(cores or 1, limit, renders))
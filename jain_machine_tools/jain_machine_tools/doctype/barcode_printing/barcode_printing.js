@@ -19,6 +19,15 @@ frappe.ui.form.on("Barcode Printing", {
 		});
 
 		toggle_warehouse_field(frm);
+
+		if (!frm.is_new() && (frm.doc.table_hjbk || []).length) {
+			frm.add_custom_button(__('Label Sheet PDF'), function() {
+				make_label_sheet(frm);
+			});
+			frm.add_custom_button(__('Quick Label PDF'), function() {
+				download_label_pdf(frm);
+			});
+		}
 	},
 
 	type(frm) {
@@ -60,45 +69,138 @@ frappe.ui.form.on("Barcode Printing", {
 			return;
 		}
 
-		// Fetch item rows from the selected document's child table.
+		// Fetch unprinted serial numbers page by page, so very large records stream in.
+		load_serial_number_page(frm, null, 0);
+	}
+});
+
+function load_serial_number_page(frm, cursor, loaded) {
+	frappe.call({
+		method: 'jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_printing.get_serial_numbers_page',
+		args: {
+			record: frm.doc.record,
+			doctype_name: frm.doc.type,
+			cursor: cursor
+		},
+		freeze: !cursor,
+		callback: function(r) {
+			const page = r.message || {};
+			const serial_numbers = page.serial_numbers || [];
+
+			if (!cursor) {
+				if (!serial_numbers.length) {
+					frappe.msgprint(__('No serial numbers found in the selected record'));
+					return;
+				}
+
+				// Clear existing rows in table
+				frm.clear_table('table_hjbk');
+			}
+
+			// Add serial numbers to the child table
+			serial_numbers.forEach(function(row) {
+				let child = frm.add_child('table_hjbk');
+				child.item_code = row.item_code;
+				child.serial_no = row.serial_no;
+				if (row.vendor_manufacturing_date) {
+					child.vendor_manufacturing_date = row.vendor_manufacturing_date;
+				}
+				if (row.warranty_expiry_date) {
+					child.warranty_expiry_date = row.warranty_expiry_date;
+				}
+			});
+
+			// Refresh the child table
+			frm.refresh_field('table_hjbk');
+			loaded += serial_numbers.length;
+
+			if (page.next_cursor) {
+				frappe.show_alert({
+					message: __('Loaded {0} row(s), loading more...', [loaded]),
+					indicator: 'blue'
+				}, 3);
+				load_serial_number_page(frm, page.next_cursor, loaded);
+				return;
+			}
+
+			frappe.show_alert({
+				message: __('Loaded {0} row(s)', [loaded]),
+				indicator: 'green'
+			}, 5);
+		}
+	});
+}
+
+function make_label_sheet(frm) {
+	frappe.prompt({
+		fieldname: 'image_format',
+		fieldtype: 'Select',
+		label: __('Barcode Format'),
+		options: [
+			{ value: 'png', label: __('PNG (raster)') },
+			{ value: 'svg', label: __('SVG (vector, smaller PDF)') }
+		],
+		default: 'png'
+	}, function(values) {
 		frappe.call({
-			method: 'jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_printing.get_serial_numbers',
+			method: 'jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_label_sheet.enqueue_label_sheet',
 			args: {
-				record: frm.doc.record,
-				doctype_name: frm.doc.type
+				barcode_printing: frm.doc.name,
+				image_format: values.image_format
 			},
+			freeze: true,
 			callback: function(r) {
-				if (r.message && r.message.length > 0) {
-					// Clear existing rows in table
-					frm.clear_table('table_hjbk');
-
-					// Add serial numbers to the child table
-					r.message.forEach(function(row) {
-						let child = frm.add_child('table_hjbk');
-						child.item_code = row.item_code;
-						child.serial_no = row.serial_no;
-						if (row.vendor_manufacturing_date) {
-							child.vendor_manufacturing_date = row.vendor_manufacturing_date;
-						}
-						if (row.warranty_expiry_date) {
-							child.warranty_expiry_date = row.warranty_expiry_date;
-						}
-					});
-
-					// Refresh the child table
-					frm.refresh_field('table_hjbk');
-
-					frappe.show_alert({
-						message: __('Loaded {0} row(s)', [r.message.length]),
-						indicator: 'green'
-					}, 5);
-				} else {
-					frappe.msgprint(__('No serial numbers found in the selected record'));
+				if (r.message) {
+					track_label_sheet_job(frm, r.message.job_id, r.message.labels);
 				}
 			}
 		});
-	}
-});
+	}, __('Label Sheet PDF'), __('Generate'));
+}
+
+function download_label_pdf(frm) {
+	frappe.prompt({
+		fieldname: 'layout',
+		fieldtype: 'Select',
+		label: __('Layout'),
+		options: ['A4 10 Up', 'A4 8 Up', 'Single 4x3 in'],
+		default: 'A4 10 Up'
+	}, function(values) {
+		const args = new URLSearchParams({
+			barcode_printing: frm.doc.name,
+			layout: values.layout
+		});
+		window.open('/api/method/jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_label_sheet.download_label_pdf?' + args.toString());
+	}, __('Quick Label PDF'), __('Download'));
+}
+
+function track_label_sheet_job(frm, job_id, total) {
+	const title = __('Generating Label Sheet');
+	frappe.show_progress(title, 0, total, __('Queued'));
+
+	const on_progress = function(data) {
+		if (data.job_id !== job_id) return;
+		frappe.show_progress(title, data.processed, data.total, __('{0} of {1} barcodes', [data.processed, data.total]));
+	};
+
+	const on_done = function(data) {
+		if (data.job_id !== job_id) return;
+		frappe.realtime.off('jmt_label_sheet_progress', on_progress);
+		frappe.realtime.off('jmt_label_sheet_done', on_done);
+		frappe.hide_progress();
+
+		if (data.error) {
+			frappe.msgprint(data.error);
+			return;
+		}
+
+		frm.reload_doc();
+		window.open(data.file_url);
+	};
+
+	frappe.realtime.on('jmt_label_sheet_progress', on_progress);
+	frappe.realtime.on('jmt_label_sheet_done', on_done);
+}
 
 function toggle_warehouse_field(frm) {
 	const grid = frm.get_field('table_hjbk').grid;
@@ -3,9 +3,15 @@
 
 import frappe
 from frappe.model.document import Document
-import base64
-from io import BytesIO
-from frappe.utils import add_months, getdate
+from frappe.utils import add_months, cint, getdate
+
+from jain_machine_tools.utils.barcode_cache import (
+	get_barcode,
+	get_barcode_data_uri,
+	get_cache_key,
+	get_render_options,
+)
+from jain_machine_tools.utils.barcode_svg import get_svg_symbol, get_svg_use
 
 
 class BarcodePrinting(Document):
@@ -26,52 +32,90 @@ class BarcodePrinting(Document):
 		update_barcode_status_for_document(self)
 
 
-def get_barcode_image(serial_no, barcode_type="Code128"):
+def get_barcode_image(serial_no, barcode_type="Code128", options=None, format="png"):
 	"""
 	Generate barcode image as base64 data URI.
+	Served from the barcode cache (utils/barcode_cache.py); only rendered on a miss.
 
 	Args:
 		serial_no: Serial number to encode
 		barcode_type: Type of barcode (default: Code128)
+		options: Optional python-barcode writer options overriding the label defaults
+		format: "png" (300 dpi raster) or "svg" (vector, a fraction of the size)
 
 	Returns:
 		Base64 encoded image data URI
 	"""
 	try:
-		import barcode
-		from barcode.writer import ImageWriter
-
-		# Get barcode class
-		barcode_class = barcode.get_barcode_class(barcode_type)
-
-		# Create barcode with image writer and better options
-		barcode_instance = barcode_class(str(serial_no), writer=ImageWriter())
-
-		# Generate barcode to BytesIO buffer with optimized settings
-		buffer = BytesIO()
-		barcode_instance.write(buffer, options={
-			'module_height': 10.0,  # Height of barcode bars in mm (reduced for 10 per page)
-			'module_width': 0.20,   # Width of narrowest bar in mm (slightly reduced)
-			'quiet_zone': 2.5,      # White space around barcode (reduced)
-			'font_size': 0,         # Don't render text below barcode (we'll show it separately)
-			'text_distance': 1.0,
-			'background': 'white',
-			'foreground': 'black',
-			'write_text': False,    # Disable text rendering in barcode
-			'dpi': 300,             # High DPI for better quality
-		})
-
-		# Get image data and encode as base64
-		buffer.seek(0)
-		image_data = base64.b64encode(buffer.read()).decode('utf-8')
-
-		return f"data:image/png;base64,{image_data}"
+		return get_barcode_data_uri(serial_no, barcode_type, options, format)
 
 	except Exception as e:
 		frappe.log_error(f"Error generating barcode: {str(e)}", "Barcode Generation Error")
 		return ""
 
 
+def get_barcode_svg(serial_no, barcode_type="Code128", options=None, reuse_scope=None):
+	"""
+	Generate barcode as inline SVG markup, for print formats.
+	With a reuse_scope from new_barcode_svg_scope(), the first call for a barcode in that
+	scope also emits its drawing as a <symbol>; later calls (e.g. the second copy on a
+	dual label) are a <use> reference to it. Any other reuse_scope gets plain SVG.
+
+	Args:
+		serial_no: Serial number to encode
+		barcode_type: Type of barcode (default: Code128)
+		options: Optional python-barcode writer options overriding the label defaults
+		reuse_scope: Scope returned by new_barcode_svg_scope() for this render (default: no reuse)
+
+	Returns:
+		SVG markup, empty string on failure
+	"""
+	try:
+		svg = get_barcode(serial_no, barcode_type, options, "svg")
+		if not reuse_scope:
+			return svg.decode("utf-8")
+
+		symbols = (getattr(frappe.local, "jmt_barcode_symbols", None) or {}).get(reuse_scope)
+		if symbols is None:
+			return svg.decode("utf-8")
+
+		symbol_id = "jmt-bc-" + get_cache_key(serial_no, barcode_type, get_render_options(options), "svg")[:16]
+		if symbol_id in symbols:
+			return get_svg_use(symbol_id, *symbols[symbol_id])
+
+		symbol = get_svg_symbol(svg, symbol_id)
+		if not symbol:
+			return svg.decode("utf-8")
+
+		markup, width, height = symbol
+		symbols[symbol_id] = (width, height)
+		return markup + get_svg_use(symbol_id, width, height)
+
+	except Exception as e:
+		frappe.log_error(f"Error generating barcode: {e!s}", "Barcode Generation Error")
+		return ""
+
+
+def new_barcode_svg_scope():
+	"""
+	Start the symbol scope for one rendered HTML document and return it, for print formats:
+	{% set scope = new_barcode_svg_scope() %} ... get_barcode_svg(serial_no, reuse_scope=scope)
+	Symbols of earlier renders in the same request or job are dropped, so a render never
+	<use>s a <symbol> that is only in another document.
+	"""
+	scope = frappe.generate_hash(length=10)
+	frappe.local.jmt_barcode_symbols = {scope: {}}
+	return scope
+
+
+# Child table holding the serial and batch bundles, and extra row conditions, per source doctype
+SERIAL_NUMBER_SOURCES = {
+	"Stock Entry": ("Stock Entry Detail", "AND row.t_warehouse IS NOT NULL AND row.t_warehouse != ''"),
+	"Purchase Receipt": ("Purchase Receipt Item", ""),
+}
+SERIAL_NUMBER_PAGE_LENGTH = 500
+
+
 @frappe.whitelist()
 def get_serial_numbers(record, item_code=None, doctype_name=None):
 	"""
@@ -88,12 +132,7 @@ def get_serial_numbers(record, item_code=None, doctype_name=None):
 	if not record:
 		frappe.throw("Please select a record")
 
-	# Determine doctype if not provided
-	if not doctype_name:
-		# Try to detect doctype from record name pattern or query
-		doc = frappe.get_doc("Barcode Printing", {"record": record})
-		doctype_name = doc.type if doc else "Stock Entry"
-
+	doctype_name = _get_record_doctype(record, doctype_name)
 	if doctype_name == "Stock Entry":
 		return get_serial_numbers_from_stock_entry(record, item_code)
 	elif doctype_name == "Purchase Receipt":
@@ -102,6 +141,38 @@ def get_serial_numbers(record, item_code=None, doctype_name=None):
 		frappe.throw(f"Unsupported document type: {doctype_name}")
 
 
+@frappe.whitelist()
+def get_serial_numbers_page(record, doctype_name=None, item_code=None, cursor=None, page_length=SERIAL_NUMBER_PAGE_LENGTH):
+	"""
+	One page of unprinted serial numbers, for loading very large records in steps.
+
+	Args:
+		record: Stock Entry or Purchase Receipt name
+		doctype_name: Type of document (Stock Entry or Purchase Receipt)
+		item_code: Optional item code to filter
+		cursor: next_cursor of the previous page, None for the first page
+		page_length: Serial numbers per page
+
+	Returns:
+		Dict: {"serial_numbers": [...], "next_cursor": cursor of the next page or None}
+	"""
+	if not record:
+		frappe.throw("Please select a record")
+
+	doctype_name = _get_record_doctype(record, doctype_name)
+	if doctype_name not in SERIAL_NUMBER_SOURCES:
+		frappe.throw(f"Unsupported document type: {doctype_name}")
+
+	page_length = cint(page_length) or SERIAL_NUMBER_PAGE_LENGTH
+	serial_numbers, next_cursor = _get_unprinted_serial_numbers(
+		doctype_name, record, item_code, cursor=cursor, page_length=page_length
+	)
+	if not serial_numbers and not cursor:
+		_check_item_rows(doctype_name, record, item_code)
+
+	return {"serial_numbers": serial_numbers, "next_cursor": next_cursor}
+
+
 def get_serial_numbers_from_stock_entry(record, item_code):
 	"""
 	Fetch serial numbers from Stock Entry Detail for the given item_code.
@@ -114,60 +185,9 @@ def get_serial_numbers_from_stock_entry(record, item_code):
 	Returns:
 		List of serial numbers
 	"""
-	# Get Stock Entry Detail items with serial numbers
-	items = frappe.db.sql("""
-		SELECT
-			sed.item_code,
-			sed.serial_and_batch_bundle,
-			sed.t_warehouse
-		FROM `tabStock Entry Detail` sed
-		WHERE
-			sed.parent = %(record)s
-			AND (%(item_code)s IS NULL OR %(item_code)s = '' OR sed.item_code = %(item_code)s)
-			AND sed.t_warehouse IS NOT NULL
-			AND sed.t_warehouse != ''
-	""", {
-		'record': record,
-		'item_code': item_code
-	}, as_dict=True)
-
-	if not items:
-		if item_code:
-			frappe.throw(f"No items found with target warehouse for Item: {item_code} in {record}")
-		return []
-
-	serial_numbers = []
-
-	# Use Stock Entry posting date as vendor manufacturing date.
-	posting_date = frappe.db.get_value("Stock Entry", record, "posting_date")
-	manufacturing_date = getdate(posting_date) if posting_date else None
-	expiry_date = add_months(manufacturing_date, 12) if manufacturing_date else None
-
-	# Get serial numbers from serial_and_batch_bundle
-	for item in items:
-		if item.serial_and_batch_bundle:
-			# Get serial numbers from Serial and Batch Bundle
-			# Exclude serial numbers that already have barcode_generated = 1
-			bundle_entries = frappe.db.sql("""
-				SELECT sbe.serial_no
-				FROM `tabSerial and Batch Entry` sbe
-				INNER JOIN `tabSerial No` sn ON sn.name = sbe.serial_no
-				WHERE sbe.parent = %(bundle)s
-				AND sbe.serial_no IS NOT NULL
-				AND sbe.serial_no != ''
-				AND (sn.barcode_generated IS NULL OR sn.barcode_generated = 0)
-				ORDER BY sbe.idx
-			""", {
-				'bundle': item.serial_and_batch_bundle
-			}, as_dict=True)
-
-			for entry in bundle_entries:
-				serial_numbers.append({
-					'item_code': item.item_code,
-					'serial_no': entry.serial_no,
-					'vendor_manufacturing_date': manufacturing_date,
-					'warranty_expiry_date': expiry_date
-				})
+	serial_numbers, _next_cursor = _get_unprinted_serial_numbers("Stock Entry", record, item_code)
+	if not serial_numbers:
+		_check_item_rows("Stock Entry", record, item_code)
 
 	return serial_numbers
 
@@ -184,61 +204,106 @@ def get_serial_numbers_from_purchase_receipt(record, item_code):
 	Returns:
 		List of serial numbers
 	"""
-	# Get Purchase Receipt Item with serial numbers
-	items = frappe.db.sql("""
-		SELECT
-			pri.item_code,
-			pri.serial_and_batch_bundle
-		FROM `tabPurchase Receipt Item` pri
-		WHERE
-			pri.parent = %(record)s
-			AND (%(item_code)s IS NULL OR %(item_code)s = '' OR pri.item_code = %(item_code)s)
-			AND pri.serial_and_batch_bundle IS NOT NULL
-			AND pri.serial_and_batch_bundle != ''
-	""", {
-		'record': record,
-		'item_code': item_code
-	}, as_dict=True)
+	serial_numbers, _next_cursor = _get_unprinted_serial_numbers("Purchase Receipt", record, item_code)
+	if not serial_numbers:
+		_check_item_rows("Purchase Receipt", record, item_code)
+
+	return serial_numbers
+
+
+def _get_unprinted_serial_numbers(doctype_name, record, item_code=None, cursor=None, page_length=None):
+	"""
+	Serial numbers without barcode_generated across every bundle of the record, in one query.
+	Ordered by (item row idx, bundle entry idx) and keyset-paginated on that pair.
+
+	Returns:
+		Tuple: (serial number rows, next cursor or None)
+	"""
+	child_doctype, row_conditions = SERIAL_NUMBER_SOURCES[doctype_name]
+	values = {"record": record, "item_code": item_code}
 
-	if not items:
-		if item_code:
-			frappe.throw(f"No items found with serial numbers for Item: {item_code} in {record}")
-		return []
+	keyset = ""
+	if cursor:
+		row_idx, entry_idx = (cint(part) for part in str(cursor).split(":", 1))
+		keyset = "AND (row.idx > %(row_idx)s OR (row.idx = %(row_idx)s AND sbe.idx > %(entry_idx)s))"
+		values.update({"row_idx": row_idx, "entry_idx": entry_idx})
 
-	serial_numbers = []
+	limit = ""
+	if page_length:
+		limit = "LIMIT %(page_length)s"
+		values["page_length"] = cint(page_length)
 
-	# Use Purchase Receipt posting date as vendor manufacturing date.
-	posting_date = frappe.db.get_value("Purchase Receipt", record, "posting_date")
+	entries = frappe.db.sql(f"""
+		SELECT
+			row.idx AS row_idx,
+			sbe.idx AS entry_idx,
+			row.item_code,
+			sbe.serial_no,
+			parent.posting_date
+		FROM `tab{child_doctype}` row
+		INNER JOIN `tab{doctype_name}` parent ON parent.name = row.parent
+		INNER JOIN `tabSerial and Batch Entry` sbe ON sbe.parent = row.serial_and_batch_bundle
+		INNER JOIN `tabSerial No` sn ON sn.name = sbe.serial_no
+		WHERE
+			row.parent = %(record)s
+			AND (%(item_code)s IS NULL OR %(item_code)s = '' OR row.item_code = %(item_code)s)
+			{row_conditions}
+			AND row.serial_and_batch_bundle IS NOT NULL
+			AND row.serial_and_batch_bundle != ''
+			AND sbe.serial_no IS NOT NULL
+			AND sbe.serial_no != ''
+			AND (sn.barcode_generated IS NULL OR sn.barcode_generated = 0)
+			{keyset}
+		ORDER BY row.idx, sbe.idx
+		{limit}
+	""", values, as_dict=True)
+
+	# Use the record's posting date as vendor manufacturing date.
+	posting_date = entries[0].posting_date if entries else None
 	manufacturing_date = getdate(posting_date) if posting_date else None
 	expiry_date = add_months(manufacturing_date, 12) if manufacturing_date else None
 
-	# Get serial numbers from serial_and_batch_bundle
-	for item in items:
-		if item.serial_and_batch_bundle:
-			# Get serial numbers from Serial and Batch Bundle
-			# Exclude serial numbers that already have barcode_generated = 1
-			bundle_entries = frappe.db.sql("""
-				SELECT sbe.serial_no
-				FROM `tabSerial and Batch Entry` sbe
-				INNER JOIN `tabSerial No` sn ON sn.name = sbe.serial_no
-				WHERE sbe.parent = %(bundle)s
-				AND sbe.serial_no IS NOT NULL
-				AND sbe.serial_no != ''
-				AND (sn.barcode_generated IS NULL OR sn.barcode_generated = 0)
-				ORDER BY sbe.idx
-			""", {
-				'bundle': item.serial_and_batch_bundle
-			}, as_dict=True)
+	serial_numbers = [
+		{
+			'item_code': entry.item_code,
+			'serial_no': entry.serial_no,
+			'vendor_manufacturing_date': manufacturing_date,
+			'warranty_expiry_date': expiry_date
+		}
+		for entry in entries
+	]
 
-			for entry in bundle_entries:
-				serial_numbers.append({
-					'item_code': item.item_code,
-					'serial_no': entry.serial_no,
-					'vendor_manufacturing_date': manufacturing_date,
-					'warranty_expiry_date': expiry_date
-				})
+	next_cursor = None
+	if page_length and len(entries) == cint(page_length):
+		next_cursor = f"{entries[-1].row_idx}:{entries[-1].entry_idx}"
 
-	return serial_numbers
+	return serial_numbers, next_cursor
+
+
+def _check_item_rows(doctype_name, record, item_code):
+	"""Keep the old error when the item has no matching rows at all in the record"""
+	if not item_code:
+		return
+
+	child_doctype, _row_conditions = SERIAL_NUMBER_SOURCES[doctype_name]
+	if doctype_name == "Stock Entry":
+		filters = {"parent": record, "item_code": item_code, "t_warehouse": ("is", "set")}
+		message = f"No items found with target warehouse for Item: {item_code} in {record}"
+	else:
+		filters = {"parent": record, "item_code": item_code, "serial_and_batch_bundle": ("is", "set")}
+		message = f"No items found with serial numbers for Item: {item_code} in {record}"
+
+	if not frappe.db.exists(child_doctype, filters):
+		frappe.throw(message)
+
+
+def _get_record_doctype(record, doctype_name=None):
+	if doctype_name:
+		return doctype_name
+
+	# Try to detect doctype from record name pattern or query
+	doc = frappe.get_doc("Barcode Printing", {"record": record})
+	return doc.type if doc else "Stock Entry"
 
 
 def update_barcode_status_for_document(doc):
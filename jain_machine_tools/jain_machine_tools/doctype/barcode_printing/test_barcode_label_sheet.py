@@ -0,0 +1,50 @@
+# Copyright (c) 2026, Praxon Technovation and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_label_sheet import (
+	paginate_labels,
+	render_label_images,
+)
+
+
+class TestBarcodeLabelSheet(FrappeTestCase):
+	def test_paginate_labels(self):
+		pages = paginate_labels(list(range(23)), labels_per_page=10, columns=2)
+
+		self.assertEqual(len(pages), 3)
+		self.assertEqual(pages[0], [[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]])
+		self.assertEqual(pages[2], [[20, 21], [22, None]])
+		self.assertEqual(
+			[label for page in pages for row in page for label in row if label is not None], list(range(23))
+		)
+
+		self.assertEqual(paginate_labels([0, 1, 2], labels_per_page=3, columns=2), [[[0, 1], [2, None]]])
+		self.assertEqual(paginate_labels([]), [])
+
+	def test_render_label_images(self):
+		# Unique serials, so the first call cannot be served from an earlier run's cache
+		prefix = frappe.generate_hash(length=8).upper()
+		serial_numbers = [f"{prefix}-{i}" for i in range(5)]
+		progress = []
+
+		images = render_label_images(
+			[*serial_numbers, "नमस्ते"], image_format="svg", progress=lambda *args: progress.append(args)
+		)
+
+		for serial_no in serial_numbers:
+			self.assertTrue(images[serial_no].startswith("data:image/svg+xml;base64,"))
+		# Not encodable in Code128: left blank, the rest of the sheet still renders
+		self.assertEqual(images["नमस्ते"], "")
+		self.assertEqual(progress[0], (0, 6))
+		self.assertEqual(progress[-1], (6, 6))
+
+		# Second run is served from the cache before anything is rendered
+		progress.clear()
+		cached = render_label_images(
+			serial_numbers, image_format="svg", progress=lambda *args: progress.append(args)
+		)
+		self.assertEqual(cached, {serial_no: images[serial_no] for serial_no in serial_numbers})
+		self.assertEqual(progress, [(5, 5)])
@@ -1,9 +1,130 @@
 # Copyright (c) 2025, Praxon Technovation and Contributors
 # See license.txt
 
-# import frappe
+import frappe
+from erpnext.stock.doctype.item.test_item import make_item
+from erpnext.stock.doctype.purchase_receipt.test_purchase_receipt import make_purchase_receipt
 from frappe.tests.utils import FrappeTestCase
 
+from jain_machine_tools.jain_machine_tools.doctype.barcode_printing.barcode_printing import (
+	_get_unprinted_serial_numbers,
+	get_barcode_svg,
+	new_barcode_svg_scope,
+)
+
+
+def _make_serialized_purchase_receipt(rows=2, qty=3):
+	"""Submitted Purchase Receipt with rows item rows of qty auto-numbered serials, one bundle per row"""
+	item_code = make_item(
+		"_Test JMT Barcode Serial Item", {"has_serial_no": 1, "serial_no_series": "JMTBP-.#####"}
+	).name
+
+	receipt = make_purchase_receipt(item_code=item_code, qty=qty, do_not_submit=True)
+	first_row = receipt.items[0]
+	for _ in range(rows - 1):
+		receipt.append(
+			"items",
+			{
+				fieldname: first_row.get(fieldname)
+				for fieldname in (
+					"item_code",
+					"qty",
+					"received_qty",
+					"rate",
+					"uom",
+					"stock_uom",
+					"conversion_factor",
+					"warehouse",
+					"expense_account",
+					"cost_center",
+				)
+			},
+		)
+	receipt.save()
+	receipt.submit()
+	return receipt
+
+
+def _get_bundle_serial_numbers(receipt):
+	"""Serials of every item row, in (row idx, bundle entry idx) order"""
+	return [
+		frappe.get_all(
+			"Serial and Batch Entry",
+			filters={"parent": row.serial_and_batch_bundle},
+			order_by="idx",
+			pluck="serial_no",
+		)
+		for row in receipt.items
+	]
+
 
 class TestBarcodePrinting(FrappeTestCase):
-	pass
+	def test_serial_number_fetch_is_one_query(self):
+		receipt = _make_serialized_purchase_receipt()
+
+		with self.assertQueryCount(1):
+			serial_numbers, _next_cursor = _get_unprinted_serial_numbers("Purchase Receipt", receipt.name)
+		self.assertEqual(len(serial_numbers), 6)
+
+		with self.assertQueryCount(1):
+			_get_unprinted_serial_numbers("Purchase Receipt", receipt.name, cursor="1:2", page_length=100)
+
+	def test_serial_number_pages(self):
+		receipt = _make_serialized_purchase_receipt(rows=2, qty=3)
+		first_row, second_row = _get_bundle_serial_numbers(receipt)
+		self.assertEqual((len(first_row), len(second_row)), (3, 3))
+
+		# Already printed: left out of every page
+		printed = {first_row[0], second_row[1]}
+		for serial_no in printed:
+			frappe.db.set_value("Serial No", serial_no, "barcode_generated", 1)
+		expected = [serial_no for serial_no in first_row + second_row if serial_no not in printed]
+
+		serial_numbers, next_cursor = _get_unprinted_serial_numbers("Purchase Receipt", receipt.name)
+		self.assertEqual([row["serial_no"] for row in serial_numbers], expected)
+		self.assertIsNone(next_cursor)
+
+		# Page lengths that end inside a bundle, on a bundle boundary and past the end
+		for page_length in (1, 2, 3, 5):
+			serial_nos = []
+			cursor = None
+			while True:
+				serial_numbers, cursor = _get_unprinted_serial_numbers(
+					"Purchase Receipt", receipt.name, cursor=cursor, page_length=page_length
+				)
+				self.assertLessEqual(len(serial_numbers), page_length)
+				serial_nos.extend(row["serial_no"] for row in serial_numbers)
+				if not cursor:
+					break
+
+			# Every serial exactly once, in order
+			self.assertEqual(serial_nos, expected)
+
+		# The first page ends inside the first bundle, the second crosses into the next one
+		serial_numbers, cursor = _get_unprinted_serial_numbers(
+			"Purchase Receipt", receipt.name, page_length=1
+		)
+		self.assertEqual(cursor, "1:2")
+		serial_numbers, cursor = _get_unprinted_serial_numbers(
+			"Purchase Receipt", receipt.name, cursor=cursor, page_length=2
+		)
+		self.assertEqual([row["serial_no"] for row in serial_numbers], [first_row[2], second_row[0]])
+		self.assertEqual(cursor, "2:1")
+
+		serial_numbers, cursor = _get_unprinted_serial_numbers(
+			"Purchase Receipt", receipt.name, item_code="_Test Item"
+		)
+		self.assertEqual(serial_numbers, [])
+
+	def test_svg_symbols_are_scoped_to_one_render(self):
+		scope = new_barcode_svg_scope()
+		first = get_barcode_svg("SN-SCOPE-1", reuse_scope=scope)
+		second = get_barcode_svg("SN-SCOPE-1", reuse_scope=scope)
+		self.assertIn("<symbol", first)
+		self.assertNotIn("<symbol", second)
+		self.assertIn("<use", second)
+
+		# The next render must define the symbol again, not <use> one from the previous document
+		next_scope = new_barcode_svg_scope()
+		self.assertIn("<symbol", get_barcode_svg("SN-SCOPE-1", reuse_scope=next_scope))
+		self.assertNotIn("<use", get_barcode_svg("SN-SCOPE-1", reuse_scope=scope))
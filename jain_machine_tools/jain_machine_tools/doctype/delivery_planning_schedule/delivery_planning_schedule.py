@@ -6,10 +6,13 @@ from frappe import _
 from frappe.model.document import Document
 from frappe.utils import flt, nowdate
 
+from jain_machine_tools.utils.warehouse_cache import get_descendants, get_warehouse
+
 
 class DeliveryPlanningSchedule(Document):
 	def validate(self):
 		self.validate_sales_order()
+		self.set_invoiced_qty()
 		self.sync_item_stock_quantities()
 		self.validate_item_totals()
 
@@ -65,6 +68,25 @@ class DeliveryPlanningSchedule(Document):
 				).format("\n".join(mismatches))
 			)
 
+	def set_invoiced_qty(self):
+		"""
+		invoiced_qty is maintained by Sales Invoice submit / cancel; keep the stored value
+		so saving a form loaded before an invoice was submitted cannot overwrite it
+		"""
+		stored_qty = {}
+		if not self.is_new():
+			stored_qty = dict(
+				frappe.get_all(
+					"Delivery Planning Schedule Item",
+					filters={"parent": self.name, "parenttype": self.doctype},
+					fields=["name", "invoiced_qty"],
+					as_list=True,
+				)
+			)
+
+		for row in self.get("items") or []:
+			row.invoiced_qty = flt(stored_qty.get(row.name))
+
 	def sync_item_stock_quantities(self):
 		for row in self.get("items") or []:
 			projected_qty, actual_qty = get_bin_qty(row.item_code, row.warehouse)
@@ -184,6 +206,24 @@ def get_bin_qty(item_code=None, warehouse=None):
 	if not item_code or not warehouse:
 		return 0, 0
 
+	warehouse_details = get_warehouse(warehouse)
+	if warehouse_details and warehouse_details.is_group:
+		# Group warehouses have no Bin of their own; sum the enabled leaves below them
+		descendants = get_descendants(warehouse)
+		if not descendants:
+			return 0, 0
+
+		bin_data = frappe.db.sql(
+			"""
+			SELECT SUM(projected_qty) AS projected_qty, SUM(actual_qty) AS actual_qty
+			FROM `tabBin`
+			WHERE item_code = %s AND warehouse IN %s
+			""",
+			(item_code, tuple(descendants)),
+			as_dict=True,
+		)[0]
+		return flt(bin_data.get("projected_qty")), flt(bin_data.get("actual_qty"))
+
 	bin_data = frappe.db.get_value(
 		"Bin",
 		{"item_code": item_code, "warehouse": warehouse},
@@ -14,9 +14,9 @@ class ProformaInvoice(SellingController):
 		_autoname(self, "PI")
 
 	def calculate_taxes_and_totals(self):
-		"""Override to use custom calculation with handling charges support"""
-		from jain_machine_tools.overrides.quotation import custom_calculate_taxes_and_totals
-		custom_calculate_taxes_and_totals(self)
+		"""Override to use the shared handling charges totals engine"""
+		from jain_machine_tools.overrides.handling_charges import calculate_taxes_and_totals_with_handling
+		calculate_taxes_and_totals_with_handling(self)
 
 	def validate(self):
 		super().validate()
@@ -0,0 +1,8 @@
+// Copyright (c) 2026, Praxon Technovation and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Reorder Run Log", {
+// 	refresh(frm) {
+
+// 	},
+// });
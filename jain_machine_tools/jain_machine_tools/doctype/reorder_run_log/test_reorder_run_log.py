@@ -0,0 +1,94 @@
+# Copyright (c) 2026, Praxon Technovation and Contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from erpnext.stock.doctype.item.test_item import make_item
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, now_datetime
+
+from jain_machine_tools.stock.optimized_reorder import (
+	REORDER_DIRTY_BINS_KEY,
+	REORDER_HIGH_WATER_MARK_KEY,
+	_execute_optimized_reorder,
+	mark_bins_dirty,
+)
+from jain_machine_tools.stock.reorder_run_log import PHASES, STATUS_COMPLETED, ReorderRunTracker
+
+WAREHOUSE = "_Test Warehouse - _TC"
+
+
+def _make_reorder_item(item_code):
+	"""Stock item that is always below its reorder level in WAREHOUSE"""
+	return make_item(
+		item_code,
+		{
+			"is_stock_item": 1,
+			"reorder_levels": [
+				{
+					"warehouse": WAREHOUSE,
+					"warehouse_reorder_level": 1000000,
+					"warehouse_reorder_qty": 10,
+					"material_request_type": "Purchase",
+				}
+			],
+		},
+	).name
+
+
+def _get_run_log(run_id):
+	return frappe.get_doc("Reorder Run Log", {"run_id": run_id})
+
+
+class TestReorderRunLog(FrappeTestCase):
+	def test_dry_run_log(self):
+		item_code = _make_reorder_item("_Test JMT Run Log Item")
+
+		run_log = ReorderRunTracker(mode="Full Rescan")
+		mr_list = _execute_optimized_reorder(full_rescan=True, run_log=run_log, dry_run=True)
+		run_log.save(STATUS_COMPLETED)
+
+		log = _get_run_log(run_log.run_id)
+		self.assertEqual(log.status, STATUS_COMPLETED)
+		self.assertEqual(log.mode, "Full Rescan")
+
+		for phase in PHASES:
+			self.assertGreaterEqual(log.get(f"{phase}_seconds"), 0)
+		self.assertGreaterEqual(
+			log.total_seconds, sum(log.get(f"{phase}_seconds") for phase in PHASES) - 0.01
+		)
+		self.assertGreater(log.item_load_seconds + log.bin_load_seconds, 0)
+
+		self.assertGreaterEqual(log.items_considered, 1)
+		self.assertGreaterEqual(log.reorder_rows, log.items_considered)
+		self.assertEqual(log.groups_planned, len(mr_list))
+		self.assertEqual(log.material_requests_created, len(mr_list))
+		self.assertEqual(log.mr_lines, sum(len(mr.items) for mr in mr_list))
+		self.assertEqual(log.errors_count, 0)
+		self.assertIn(item_code, {row.item_code for mr in mr_list for row in mr.items})
+
+	def test_failed_material_requests_are_counted(self):
+		item_code = _make_reorder_item("_Test JMT Run Log Error Item")
+		dirty_bin = (item_code, WAREHOUSE)
+
+		# High-water mark in the future: the run considers the dirty bins only
+		frappe.db.set_default(REORDER_HIGH_WATER_MARK_KEY, str(add_days(now_datetime(), 1)))
+		mark_bins_dirty([dirty_bin])
+		self.addCleanup(frappe.cache.srem, REORDER_DIRTY_BINS_KEY, json.dumps(list(dirty_bin)))
+
+		run_log = ReorderRunTracker(mode="Incremental")
+		# Messages left over from the fixtures would be counted as the failure's messages
+		frappe.local.message_log = []
+		with patch(
+			"jain_machine_tools.stock.optimized_reorder.make_cumulative_material_request",
+			side_effect=frappe.ValidationError("MR insert failed"),
+		):
+			_execute_optimized_reorder(run_log=run_log)
+		run_log.save(STATUS_COMPLETED)
+
+		log = _get_run_log(run_log.run_id)
+		self.assertEqual(log.groups_planned, 1)
+		self.assertEqual(log.material_requests_created, 0)
+		self.assertEqual(log.errors_count, 1)
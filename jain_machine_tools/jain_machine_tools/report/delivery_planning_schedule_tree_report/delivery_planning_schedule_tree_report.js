@@ -25,6 +25,12 @@ frappe.query_reports["Delivery Planning Schedule Tree Report"] = {
         }
     ],
 
+    onload: function(report) {
+        report.page.add_inner_button(__("Invoice Due Plans"), function() {
+            jmt_invoice_due_plans(report);
+        });
+    },
+
     after_datatable_render: function(datatable_obj) {
         // Attach click handler on every render (report refresh / filter change)
         $(datatable_obj.wrapper)
@@ -64,6 +70,116 @@ function jmt_open_sales_invoice(dps_name, so_name, $btn) {
     });
 }
 
+function jmt_invoice_due_plans(report) {
+    const dialog = new frappe.ui.Dialog({
+        title: __("Invoice All Due Delivery Plans"),
+        fields: [
+            {
+                fieldname: "due_date",
+                fieldtype: "Date",
+                label: __("Due By"),
+                default: frappe.datetime.get_today(),
+                reqd: 1
+            },
+            {
+                fieldname: "company",
+                fieldtype: "Link",
+                label: __("Company"),
+                options: "Company"
+            },
+            {
+                fieldname: "customer",
+                fieldtype: "Link",
+                label: __("Customer"),
+                options: "Customer"
+            },
+            {
+                fieldname: "sales_order",
+                fieldtype: "Link",
+                label: __("Sales Order"),
+                options: "Sales Order",
+                default: report.get_filter_value("sales_order")
+            },
+            {
+                fieldname: "submit",
+                fieldtype: "Check",
+                label: __("Submit Invoices"),
+                description: __("Leave unchecked to create draft Sales Invoices")
+            }
+        ],
+        primary_action_label: __("Create Invoices"),
+        primary_action: function(values) {
+            dialog.hide();
+            frappe.call({
+                method: "jain_machine_tools.api.delivery_plan_invoicing.enqueue_due_delivery_plan_invoices",
+                args: values,
+                freeze: true,
+                callback: function(r) {
+                    if (!r.message || !r.message.job_id) {
+                        frappe.msgprint(__("No pending delivery plan rows are due by {0}.", [frappe.datetime.str_to_user(values.due_date)]));
+                        return;
+                    }
+                    jmt_track_bulk_invoice_job(report, r.message.job_id, r.message.schedules);
+                }
+            });
+        }
+    });
+    dialog.show();
+}
+
+function jmt_track_bulk_invoice_job(report, job_id, total) {
+    const title = __("Creating Sales Invoices");
+    frappe.show_progress(title, 0, total, __("Queued"));
+
+    const on_progress = function(data) {
+        if (data.job_id !== job_id) return;
+        frappe.show_progress(title, data.processed, data.total, __("{0} of {1} schedules", [data.processed, data.total]));
+    };
+
+    const on_done = function(summary) {
+        if (summary.job_id !== job_id) return;
+        frappe.realtime.off("jmt_dps_bulk_invoice_progress", on_progress);
+        frappe.realtime.off("jmt_dps_bulk_invoice_done", on_done);
+        frappe.hide_progress();
+        jmt_show_bulk_invoice_summary(summary);
+        report.refresh();
+    };
+
+    frappe.realtime.on("jmt_dps_bulk_invoice_progress", on_progress);
+    frappe.realtime.on("jmt_dps_bulk_invoice_done", on_done);
+}
+
+function jmt_show_bulk_invoice_summary(summary) {
+    const rows = (summary.invoices || []).map(function(row) {
+        const invoice = row.sales_invoice
+            ? `<a href="/app/sales-invoice/${encodeURIComponent(row.sales_invoice)}">${frappe.utils.escape_html(row.sales_invoice)}</a>`
+            : "";
+        const indicator = row.status === "Success" ? "green" : "red";
+        return `<tr>
+            <td>${frappe.utils.escape_html(row.delivery_planning_schedule)}</td>
+            <td>${frappe.utils.escape_html(row.sales_order)}</td>
+            <td>${invoice}</td>
+            <td><span class="indicator-pill ${indicator}">${__(row.status)}</span></td>
+            <td>${frappe.utils.escape_html(row.error || "")}</td>
+        </tr>`;
+    }).join("");
+
+    frappe.msgprint({
+        title: __("{0} created, {1} failed", [summary.succeeded, summary.failed]),
+        wide: true,
+        message: `<table class="table table-bordered table-sm">
+            <thead><tr>
+                <th>${__("Delivery Planning Schedule")}</th>
+                <th>${__("Sales Order")}</th>
+                <th>${__("Sales Invoice")}</th>
+                <th>${__("Status")}</th>
+                <th>${__("Error")}</th>
+            </tr></thead>
+            <tbody>${rows}</tbody>
+        </table>`
+    });
+}
+
 function jmt_open_dps_print(dps_name) {
     const url = `/printview?doctype=${encodeURIComponent("Delivery Planning Schedule")}&name=${encodeURIComponent(dps_name)}&trigger_print=1&format=Standard&no_letterhead=0`;
     window.open(url, "_blank");
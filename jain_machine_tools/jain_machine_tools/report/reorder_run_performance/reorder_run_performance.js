@@ -0,0 +1,31 @@
+// Copyright (c) 2026, Praxon Technovation and contributors
+// For license information, please see license.txt
+
+frappe.query_reports["Reorder Run Performance"] = {
+	"filters": [
+		{
+			fieldname: "from_date",
+			label: "From Date",
+			fieldtype: "Date",
+			default: frappe.datetime.add_days(frappe.datetime.get_today(), -30),
+		},
+		{
+			fieldname: "to_date",
+			label: "To Date",
+			fieldtype: "Date",
+			default: frappe.datetime.get_today(),
+		},
+		{
+			fieldname: "mode",
+			label: "Mode",
+			fieldtype: "Select",
+			options: "\nIncremental\nFull Rescan",
+		},
+		{
+			fieldname: "status",
+			label: "Status",
+			fieldtype: "Select",
+			options: "\nCompleted\nQueued\nFailed\nSkipped",
+		}
+	]
+};
@@ -0,0 +1,111 @@
+# Copyright (c) 2026, Praxon Technovation and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.utils import add_days, getdate
+
+PHASE_COLUMNS = (
+	("item_load_seconds", "Item Load (s)"),
+	("bin_load_seconds", "Bin Load (s)"),
+	("rollup_seconds", "Rollup (s)"),
+	("netting_seconds", "Netting (s)"),
+	("planning_seconds", "Planning (s)"),
+	("mr_insert_seconds", "MR Insert (s)"),
+)
+
+
+def execute(filters=None):
+	filters = frappe._dict(filters or {})
+	columns = get_columns()
+	data = get_data(filters)
+	return columns, data, None, get_chart(data)
+
+
+def get_columns():
+	return [
+		{
+			"label": "Run Log",
+			"fieldname": "name",
+			"fieldtype": "Link",
+			"options": "Reorder Run Log",
+			"width": 110,
+		},
+		{"label": "Started At", "fieldname": "started_at", "fieldtype": "Datetime", "width": 160},
+		{"label": "Mode", "fieldname": "mode", "fieldtype": "Data", "width": 100},
+		{"label": "Status", "fieldname": "status", "fieldtype": "Data", "width": 100},
+		{"label": "Total (s)", "fieldname": "total_seconds", "fieldtype": "Float", "width": 90},
+		*[
+			{"label": label, "fieldname": fieldname, "fieldtype": "Float", "width": 110}
+			for fieldname, label in PHASE_COLUMNS
+		],
+		{"label": "Items", "fieldname": "items_considered", "fieldtype": "Int", "width": 80},
+		{"label": "Reorder Rows", "fieldname": "reorder_rows", "fieldtype": "Int", "width": 110},
+		{"label": "Bins", "fieldname": "bins_loaded", "fieldtype": "Int", "width": 80},
+		{
+			"label": "Pending Reorder Bins",
+			"fieldname": "pending_reorder_bins",
+			"fieldtype": "Int",
+			"width": 140,
+		},
+		{"label": "MR Lines", "fieldname": "mr_lines", "fieldtype": "Int", "width": 90},
+		{"label": "MRs Created", "fieldname": "material_requests_created", "fieldtype": "Int", "width": 100},
+		{"label": "Errors", "fieldname": "errors_count", "fieldtype": "Int", "width": 70},
+		{"label": "ms / Reorder Row", "fieldname": "ms_per_row", "fieldtype": "Float", "width": 120},
+	]
+
+
+def get_data(filters):
+	log_filters = []
+	if filters.get("from_date"):
+		log_filters.append(["started_at", ">=", getdate(filters.from_date)])
+	if filters.get("to_date"):
+		log_filters.append(["started_at", "<", add_days(getdate(filters.to_date), 1)])
+	if filters.get("mode"):
+		log_filters.append(["mode", "=", filters.mode])
+	if filters.get("status"):
+		log_filters.append(["status", "=", filters.status])
+
+	data = frappe.get_all(
+		"Reorder Run Log",
+		filters=log_filters,
+		fields=[
+			"name",
+			"started_at",
+			"mode",
+			"status",
+			"total_seconds",
+			*[fieldname for fieldname, _label in PHASE_COLUMNS],
+			"items_considered",
+			"reorder_rows",
+			"bins_loaded",
+			"pending_reorder_bins",
+			"mr_lines",
+			"material_requests_created",
+			"errors_count",
+		],
+		order_by="started_at desc",
+	)
+
+	for row in data:
+		# Normalised cost, so runs of different catalogue sizes compare
+		row.ms_per_row = (row.total_seconds or 0) * 1000 / row.reorder_rows if row.reorder_rows else None
+
+	return data
+
+
+def get_chart(data):
+	runs = [row for row in reversed(data) if row.status in ("Completed", "Queued")]
+	if not runs:
+		return None
+
+	return {
+		"data": {
+			"labels": [frappe.utils.format_datetime(row.started_at, "dd-MM HH:mm") for row in runs],
+			"datasets": [
+				{"name": label, "values": [row.get(fieldname) or 0 for row in runs]}
+				for fieldname, label in PHASE_COLUMNS
+			],
+		},
+		"type": "bar",
+		"barOptions": {"stacked": 1},
+	}
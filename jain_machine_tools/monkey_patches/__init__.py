@@ -1 +1,115 @@
+"""
+JMT runtime patch registry
+- Every monkey patch of Frappe / ERPNext / India Compliance code is listed in PATCHES
+- apply_all() applies them once per process. It runs when the app package is imported
+  (every bench command loads the app's commands, so console, execute, migrate and
+  run-tests are covered) and again from before_request / before_job, which after the
+  first successful call is a single flag check
+- Patch modules only define their patch, nothing is patched as a side effect of an import
 
+get_patch_status() lists which patches are applied and active in the serving process.
+"""
+
+import importlib
+
+import frappe
+
+# name: (patch function, patched module, attribute path in that module)
+PATCHES = {
+	"noop_erpnext_reorder_item": (
+		"jain_machine_tools.patches.reorder_override.override_erpnext_reorder",
+		"erpnext.stock.reorder_item",
+		"reorder_item",
+	),
+	"skip_item_price_for_non_standard_items": (
+		"jain_machine_tools.overrides.quotation.patch_insert_item_price",
+		"erpnext.stock.get_item_details",
+		"insert_item_price",
+	),
+	"allow_lower_rate_than_reference": (
+		"jain_machine_tools.monkey_patches.rate_validation.apply",
+		"erpnext.utilities.transaction_base",
+		"TransactionBase.validate_rate_with_reference_doc",
+	),
+	"skip_purchase_gst_mismatch_validation": (
+		"jain_machine_tools.monkey_patches.item_gst_details.apply",
+		"india_compliance.gst_india.overrides.transaction",
+		"ItemGSTDetails.update",
+	),
+}
+
+# Marker set on the installed replacement, used to report whether a patch is still in place
+PATCH_MARKER = "_jmt_patch"
+
+# {name: None when applied, error message when the patch raised}
+_applied = {}
+_all_applied = False
+
+
+def apply_all(*args, **kwargs):
+	"""
+	Apply every registered patch once per process.
+	Called on app import and as the before_request / before_job hook handler.
+	"""
+	global _all_applied
+
+	if _all_applied:
+		return
+
+	for name in PATCHES:
+		apply_patch(name)
+
+	# A patch that failed before a site was connected is retried by the next call
+	_all_applied = all(name in _applied for name in PATCHES)
+
+
+def apply_patch(name):
+	"""Apply one registered patch unless this process already applied it"""
+	if name in _applied:
+		return
+
+	patch_method, module, attribute = PATCHES[name]
+	try:
+		frappe.get_attr(patch_method)()
+		setattr(_resolve(module, attribute), PATCH_MARKER, name)
+		_applied[name] = None
+	except Exception as e:
+		# On app import there may be no site to log to yet; leave it for the hooks
+		if not getattr(frappe.local, "db", None):
+			return
+
+		_applied[name] = str(e)
+		frappe.log_error(title=f"JMT runtime patch {name} failed")
+
+
+@frappe.whitelist()
+def get_patch_status():
+	"""Registered patches with their state in the process serving this request"""
+	frappe.only_for("System Manager")
+
+	status = []
+	for name, (patch_method, module, attribute) in PATCHES.items():
+		try:
+			active = getattr(_resolve(module, attribute), PATCH_MARKER, None) == name
+		except Exception:
+			active = False
+
+		status.append(
+			{
+				"name": name,
+				"patch": patch_method,
+				"target": f"{module}.{attribute}",
+				"applied": name in _applied and _applied[name] is None,
+				"active": active,
+				"error": _applied.get(name),
+			}
+		)
+
+	return status
+
+
+def _resolve(module, attribute):
+	obj = importlib.import_module(module)
+	for part in attribute.split("."):
+		obj = getattr(obj, part)
+	return obj
@@ -40,4 +40,5 @@ def _patched_validate_rate_with_reference_doc(self, ref_details):
 		frappe.throw(stop_actions, as_list=True)
 
 
-TransactionBase.validate_rate_with_reference_doc = _patched_validate_rate_with_reference_doc
+def apply():
+	TransactionBase.validate_rate_with_reference_doc = _patched_validate_rate_with_reference_doc
@@ -0,0 +1,288 @@
+# Copyright (c) 2026, Jain Machine Tools and contributors
+# For license information, please see license.txt
+
+"""
+Handling charges totals engine shared by selling, buying and Proforma Invoice documents.
+
+The engine replaces ERPNext's calculate_taxes_and_totals for these doctypes, so
+handling charges are applied inside the controller's own totals pass. The
+validate hooks only recompute when that pass did not run with the engine.
+"""
+
+import hashlib
+
+from erpnext.controllers.taxes_and_totals import calculate_taxes_and_totals
+from frappe.utils import flt
+
+from jain_machine_tools.utils.precision_cache import get_child_precision_map
+
+# Set on doc.flags by every engine pass, consumed by apply_handling_charges
+HANDLING_CHARGES_APPLIED_FLAG = "handling_charges_applied"
+
+# Row inputs that decide the rate and handling charges of an item row
+FINGERPRINT_ITEM_FIELDS = (
+	"item_code",
+	"uom",
+	"qty",
+	"conversion_factor",
+	"price_list_rate",
+	"margin_type",
+	"margin_rate_or_amount",
+	"discount_percentage",
+	"discount_amount",
+	"rate",
+	"handling_charges_type",
+	"handling_charges_percentage",
+	"handling_charges_amount",
+)
+
+# Header fields that re-price every row when they change
+FULL_RECOMPUTE_FIELDS = (
+	"currency",
+	"conversion_rate",
+	"selling_price_list",
+	"buying_price_list",
+	"price_list_currency",
+	"plc_conversion_rate",
+	"ignore_pricing_rule",
+)
+
+# Doctypes whose AccountsController.calculate_taxes_and_totals also updates sales team figures
+SALES_TEAM_DOCTYPES = ("Sales Order", "Delivery Note", "Sales Invoice", "POS Invoice")
+
+
+class HandlingChargesTaxesAndTotals(calculate_taxes_and_totals):
+	"""
+	ERPNext taxes and totals with JMT handling charges applied after discount
+	"""
+
+	def __init__(self, doc, precisions=None):
+		# Item row precisions, resolved before super().__init__ runs the totals pass
+		self.item_precisions = precisions if precisions is not None else get_child_precision_map(doc)
+		super().__init__(doc)
+
+	def calculate(self):
+		super().calculate()
+		self.doc.flags[HANDLING_CHARGES_APPLIED_FLAG] = True
+
+	def calculate_item_values(self):
+		"""
+		Override to add handling charges calculation after discount.
+		Sequence: price_list_rate → margin → discount → handling_charges → rate
+
+		Root cause of discount bug (ERPNext taxes_and_totals.py line 179):
+		  `if not item.rate or (item.pricing_rules and discount_percentage > 0):`
+		ERPNext only recalculates rate from price_list_rate when item.rate is falsy.
+		If item.rate is pre-set (truthy), discounts are silently skipped.
+		Fix: clear item.rate before calling super() so ERPNext always applies
+		price_list_rate + discount correctly.
+
+		Rows whose fingerprint (pricing inputs) is unchanged since the last save
+		keep their rate: ERPNext gets the stored discounted rate instead of 0 and
+		handling charges are not recomputed, only the row amounts are re-derived.
+		"""
+		full_recompute = self.needs_full_recompute()
+		unchanged_rates = {}
+
+		for item in self.doc.get("items"):
+			if not full_recompute and self.is_row_unchanged(item):
+				# Stored rate after discount, so ERPNext's discount_amount stays right
+				unchanged_rates[item.name] = flt(item.rate)
+				item.rate = flt(item.base_rate_before_handling_charges)
+
+			# Clear item.rate so ERPNext always recalculates from price_list_rate + discount.
+			# Only clear when price_list_rate exists (manually-set rates with no price list are preserved).
+			elif item.price_list_rate:
+				item.rate = 0
+
+		# Standard ERPNext calculation: price_list_rate → margin → discount → item.rate
+		super().calculate_item_values()
+
+		# Snapshot the discounted rate as the base for handling charges, then
+		# apply JMT handling charges on top of it
+		for item in self.doc.get("items"):
+			if item.name in unchanged_rates:
+				self.set_row_amounts(item, unchanged_rates[item.name])
+			else:
+				item.base_rate_before_handling_charges = flt(item.rate)
+				self.calculate_handling_charges(item)
+
+			item.handling_charges_fingerprint = get_row_fingerprint(item, self.doc)
+
+	def needs_full_recompute(self):
+		"""New documents and header changes that re-price every row re-derive all rows"""
+		if self.doc.is_new() or not self.doc.get_doc_before_save():
+			return True
+
+		return any(
+			self.doc.meta.has_field(fieldname) and self.doc.has_value_changed(fieldname)
+			for fieldname in FULL_RECOMPUTE_FIELDS
+		)
+
+	def is_row_unchanged(self, item):
+		# Pricing rules can change the rate without any input on the row changing
+		if item.get("pricing_rules") or not item.get("base_rate_before_handling_charges"):
+			return False
+
+		fingerprint = item.get("handling_charges_fingerprint")
+		return bool(fingerprint) and fingerprint == get_row_fingerprint(item, self.doc)
+
+	def calculate_handling_charges(self, item):
+		"""
+		Calculate handling charges and update item rate and amount
+
+		Calculation flow:
+		1. Get rate after discount (stored in base_rate_before_handling_charges)
+		2. Calculate handling charges based on type (Percentage or Amount)
+		3. Add handling charges to rate
+		4. Recalculate amount = rate * qty
+		"""
+		# Get custom fields
+		handling_charges_type = item.get("handling_charges_type")
+		handling_charges_percentage = flt(item.get("handling_charges_percentage"))
+		handling_charges_amount = flt(item.get("handling_charges_amount"))
+
+		# Get the rate before handling charges (stored in persistent field)
+		rate_before_handling = flt(item.get("base_rate_before_handling_charges") or item.rate)
+
+		if rate_before_handling <= 0:
+			return
+
+		# Calculate handling charges value
+		handling_value = 0
+
+		# Only calculate if type is selected AND value is greater than 0
+		if handling_charges_type == "Percentage" and handling_charges_percentage > 0:
+			# Calculate as percentage of rate after discount
+			handling_value = rate_before_handling * (handling_charges_percentage / 100.0)
+
+		elif handling_charges_type == "Amount" and handling_charges_amount > 0:
+			# Use fixed amount
+			handling_value = handling_charges_amount
+
+		item.handling_charges_value = flt(
+			handling_value * item.qty, self.row_precision(item, "handling_charges_value")
+		)
+
+		# Always recalculate from base rate (even if handling_value is 0)
+		# This ensures removal of handling charges works correctly when set to 0
+		self.set_row_amounts(item, rate_before_handling + handling_value)
+
+	def row_precision(self, item, fieldname):
+		return _safe_precision(item, fieldname, precisions=self.item_precisions)
+
+	def set_row_amounts(self, item, rate):
+		"""Set the final rate on the row and re-derive its amounts from it"""
+		item.rate = flt(rate, self.row_precision(item, "rate"))
+
+		# Recalculate amounts with updated rate
+		item.net_rate = item.rate
+		item.amount = flt(item.rate * item.qty, self.row_precision(item, "amount"))
+		item.net_amount = item.amount
+
+		# Update base currency values
+		item.base_rate = flt(item.rate * self.doc.conversion_rate, self.row_precision(item, "base_rate"))
+		item.base_net_rate = item.base_rate
+		item.base_amount = flt(
+			item.amount * self.doc.conversion_rate, self.row_precision(item, "base_amount")
+		)
+		item.base_net_amount = item.base_amount
+
+		# Update taxable_value for India Compliance GST calculation
+		# This ensures GST is calculated on the rate WITH handling charges
+		item.taxable_value = item.base_net_amount
+
+	def calculate_totals(self):
+		"""
+		Override to handle missing 'category' attribute in Sales Taxes and Charges
+		This is a compatibility fix for different ERPNext versions
+		"""
+		try:
+			# Try the parent method first
+			super().calculate_totals()
+		except AttributeError as e:
+			# If 'category' attribute is missing, handle manually
+			if "'category'" in str(e) or "fieldtype" in str(e):
+				# Safe calculation without category attribute
+				self.doc.grand_total = flt(self.doc.get("grand_total_export") or self.doc.net_total)
+				self.doc.grand_total += flt(self.doc.get("total_taxes_and_charges"))
+
+				self.doc.base_grand_total = flt(
+					self.doc.grand_total * self.doc.conversion_rate, self.doc.precision("base_grand_total")
+				)
+
+				# Round if needed
+				if self.doc.get("is_rounded_total_disabled"):
+					self.doc.rounded_total = self.doc.grand_total
+					self.doc.base_rounded_total = self.doc.base_grand_total
+				else:
+					self.doc.rounded_total = round(self.doc.grand_total)
+					self.doc.base_rounded_total = round(self.doc.base_grand_total)
+					self.doc.rounding_adjustment = flt(
+						self.doc.rounded_total - self.doc.grand_total,
+						self.doc.precision("rounding_adjustment"),
+					)
+					self.doc.base_rounding_adjustment = flt(
+						self.doc.base_rounded_total - self.doc.base_grand_total,
+						self.doc.precision("base_rounding_adjustment"),
+					)
+			else:
+				# Re-raise if it's a different AttributeError
+				raise
+
+
+class HandlingChargesMixin:
+	"""
+	Controller mixin: the document's own totals pass runs the handling charges engine
+	"""
+
+	def calculate_taxes_and_totals(self):
+		HandlingChargesTaxesAndTotals(self)
+
+		if self.doctype in SALES_TEAM_DOCTYPES:
+			self.calculate_commission()
+			self.calculate_contribution()
+
+
+def _safe_precision(item, fieldname, default=2, precisions=None):
+	"""
+	Safely get precision for a field — returns default if field doesn't exist in the doctype.
+	Needed when calculate_handling_charges runs on Proforma Invoice Item which may not have
+	all custom fields that Quotation Item has.
+
+	With a precision map (utils/precision_cache.py) this is a dict lookup, no meta access.
+	"""
+	if precisions is not None:
+		return precisions.get(fieldname, default)
+
+	try:
+		return item.precision(fieldname)
+	except AttributeError:
+		return default
+
+
+def get_row_fingerprint(item, doc):
+	"""Short hash of the row's pricing inputs and the document's conversion rate"""
+	values = [item.get(fieldname) for fieldname in FINGERPRINT_ITEM_FIELDS]
+	values.append(doc.get("conversion_rate"))
+
+	normalised = "|".join(
+		str(flt(value, 9)) if isinstance(value, int | float) else str(value or "") for value in values
+	)
+	return hashlib.sha1(normalised.encode()).hexdigest()[:20]
+
+
+def calculate_taxes_and_totals_with_handling(doc, precisions=None):
+	"""Run a full totals pass with handling charges"""
+	HandlingChargesTaxesAndTotals(doc, precisions=precisions)
+
+
+def apply_handling_charges(doc):
+	"""
+	Validate-hook entry point: skip the full recompute when the controller's totals
+	pass already ran the engine during this save
+	"""
+	if doc.flags.pop(HANDLING_CHARGES_APPLIED_FLAG, None):
+		return
+
+	calculate_taxes_and_totals_with_handling(doc)
@@ -61,11 +61,14 @@ def _autoname(doc, prefix):
 # ---------------------------------------------------------------------------
 # Override classes — one per doctype.
 # Each class inherits from the original ERPNext class so that ALL existing
-# behaviour (validate, submit hooks, etc.) is preserved. We only add autoname.
+# behaviour (validate, submit hooks, etc.) is preserved. We add autoname and,
+# for documents with handling charges, the shared totals engine.
 # ---------------------------------------------------------------------------
 
 from erpnext.stock.doctype.material_request.material_request import MaterialRequest
 
+from jain_machine_tools.overrides.handling_charges import HandlingChargesMixin
+
 
 class JMTMaterialRequest(MaterialRequest):
 	def autoname(self):
@@ -91,7 +94,7 @@ class JMTSupplierQuotation(SupplierQuotation):
 from erpnext.buying.doctype.purchase_order.purchase_order import PurchaseOrder
 
 
-class JMTPurchaseOrder(PurchaseOrder):
+class JMTPurchaseOrder(HandlingChargesMixin, PurchaseOrder):
 	def autoname(self):
 		_autoname(self, "PO")
 
@@ -115,7 +118,7 @@ class JMTOpportunity(Opportunity):
 from erpnext.selling.doctype.quotation.quotation import Quotation
 
 
-class JMTQuotation(Quotation):
+class JMTQuotation(HandlingChargesMixin, Quotation):
 	def autoname(self):
 		_autoname(self, "QN")
 
@@ -123,7 +126,7 @@ class JMTQuotation(Quotation):
 from erpnext.selling.doctype.sales_order.sales_order import SalesOrder
 
 
-class JMTSalesOrder(SalesOrder):
+class JMTSalesOrder(HandlingChargesMixin, SalesOrder):
 	def autoname(self):
 		_autoname(self, "SO")
 
@@ -131,7 +134,7 @@ class JMTSalesOrder(SalesOrder):
 from erpnext.accounts.doctype.sales_invoice.sales_invoice import SalesInvoice
 
 
-class JMTSalesInvoice(SalesInvoice):
+class JMTSalesInvoice(HandlingChargesMixin, SalesInvoice):
 	def autoname(self):
 		# Credit Note (return against Sales Invoice) gets CN prefix
 		prefix = "CN" if self.get("is_return") else "IN"
@@ -141,7 +144,7 @@ class JMTSalesInvoice(SalesInvoice):
 from erpnext.stock.doctype.delivery_note.delivery_note import DeliveryNote
 
 
-class JMTDeliveryNote(DeliveryNote):
+class JMTDeliveryNote(HandlingChargesMixin, DeliveryNote):
 	def autoname(self):
 		_autoname(self, "DL")
 
@@ -157,7 +160,7 @@ class JMTStockEntry(StockEntry):
 from erpnext.stock.doctype.purchase_receipt.purchase_receipt import PurchaseReceipt
 
 
-class JMTPurchaseReceipt(PurchaseReceipt):
+class JMTPurchaseReceipt(HandlingChargesMixin, PurchaseReceipt):
 	def autoname(self):
 		_autoname(self, "PR")
 
@@ -165,7 +168,7 @@ class JMTPurchaseReceipt(PurchaseReceipt):
 from erpnext.accounts.doctype.purchase_invoice.purchase_invoice import PurchaseInvoice
 
 
-class JMTPurchaseInvoice(PurchaseInvoice):
+class JMTPurchaseInvoice(HandlingChargesMixin, PurchaseInvoice):
 	def autoname(self):
 		# Debit Note (return against Purchase Invoice) gets DN prefix
 		prefix = "DN" if self.get("is_return") else "PINV"
@@ -4,138 +4,43 @@
 import frappe
 from frappe import _
 from frappe.utils import flt
-from erpnext.controllers.taxes_and_totals import calculate_taxes_and_totals
-
-# ─── Monkey Patch: Suppress India Compliance GST Mismatch Validation ──────────
-from india_compliance.gst_india.overrides.transaction import ItemGSTDetails
-
-_original_update = ItemGSTDetails.update
-
-def _patched_update(self, doc):
-	if doc.doctype in ("Purchase Receipt", "Purchase Invoice"):
-		self.doc = doc
-		if not self.doc.get("items"):
-			return
-		self.get_item_defaults()
-		self.set_tax_amount_precisions(doc.doctype)
-		if self.dont_recompute_tax_is_set():
-			self.set_item_code_wise_tax_details()
-			self.update_tax_details_by_item_code()
-		else:
-			self.set_item_name_wise_tax_details()
-		# validate_item_gst_details() intentionally skipped for Purchase Receipt
-		return
-
-	_original_update(self, doc)
-
-ItemGSTDetails.update = _patched_update
-# ─────────────────────────────────────────────────────────────────────────────
-
-
-class CustomPurchaseTaxesAndTotals(calculate_taxes_and_totals):
-	"""
-	Custom override to add handling charges calculation to Purchase Order Item
-	"""
-
-	def calculate_item_values(self):
-		"""
-		Override to add handling charges calculation after discount.
-		Sequence: price_list_rate → margin → discount → handling_charges → rate
-
-		Fix: ERPNext only recalculates item.rate from price_list_rate when item.rate
-		is falsy (taxes_and_totals.py: `if not item.rate`). Pre-setting item.rate
-		causes discounts to be silently skipped. Clear item.rate first so ERPNext
-		always applies price_list_rate + discount correctly.
-		"""
-		for item in self.doc.get("items"):
-			if item.price_list_rate:
-				item.rate = 0
-
-		super(CustomPurchaseTaxesAndTotals, self).calculate_item_values()
-
-		for item in self.doc.get("items"):
-			item.base_rate_before_handling_charges = flt(item.rate)
-
-		for item in self.doc.get("items"):
-			self.calculate_handling_charges(item)
-
-	def calculate_handling_charges(self, item):
-		"""
-		Calculate handling charges and update item rate and amount
-
-		Calculation flow:
-		1. Get rate after discount (stored in base_rate_before_handling_charges)
-		2. Calculate handling charges based on type (Percentage or Amount)
-		3. Add handling charges to rate
-		4. Recalculate amount = rate * qty
-		"""
-		# Get custom fields
-		handling_charges_type = item.get("handling_charges_type")
-		handling_charges_percentage = flt(item.get("handling_charges_percentage"))
-		handling_charges_amount = flt(item.get("handling_charges_amount"))
-
-		# Get the rate before handling charges (stored in persistent field)
-		rate_before_handling = flt(item.get("base_rate_before_handling_charges") or item.rate)
-
-		if rate_before_handling <= 0:
-			return
-
-		# Calculate handling charges value
-		handling_value = 0
-
-		# Only calculate if type is selected AND value is greater than 0
-		if handling_charges_type == "Percentage" and handling_charges_percentage > 0:
-			# Calculate as percentage of rate after discount
-			handling_value = rate_before_handling * (handling_charges_percentage / 100.0)
-
-		elif handling_charges_type == "Amount" and handling_charges_amount > 0:
-			# Use fixed amount
-			handling_value = handling_charges_amount
-
-		item.handling_charges_value = flt(handling_value * item.qty, item.precision("handling_charges_value"))
 
-		# Always recalculate from base rate (even if handling_value is 0)
-		# This ensures removal of handling charges works correctly when set to 0
-		item.rate = flt(rate_before_handling + handling_value, item.precision("rate"))
+from jain_machine_tools.overrides.handling_charges import (
+	HandlingChargesTaxesAndTotals,
+	apply_handling_charges,
+	calculate_taxes_and_totals_with_handling,
+)
 
-		# Recalculate amounts with updated rate
-		item.net_rate = item.rate
-		item.amount = flt(item.rate * item.qty, item.precision("amount"))
-		item.net_amount = item.amount
+# India Compliance GST mismatch suppression for Purchase Receipt / Purchase Invoice
+# lives in monkey_patches/item_gst_details.py, applied by the patch registry
 
-		# Update base currency values
-		item.base_rate = flt(item.rate * self.doc.conversion_rate, item.precision("base_rate"))
-		item.base_net_rate = item.base_rate
-		item.base_amount = flt(item.amount * self.doc.conversion_rate, item.precision("base_amount"))
-		item.base_net_amount = item.base_amount
 
-		# Update taxable_value for India Compliance GST calculation
-		# This ensures GST is calculated on the rate WITH handling charges
-		item.taxable_value = item.base_net_amount
+# Kept for code importing the pre-engine class names
+CustomPurchaseTaxesAndTotals = HandlingChargesTaxesAndTotals
 
 
 def custom_calculate_taxes_and_totals(doc):
 	"""
-	Custom function to use our CustomPurchaseTaxesAndTotals class
+	Full taxes and totals pass with handling charges (shared engine)
 	"""
-	CustomPurchaseTaxesAndTotals(doc)
+	calculate_taxes_and_totals_with_handling(doc)
 
 
 # Validation hooks
 def validate_purchase_order(doc, method=None):
 	"""
 	Hook for Purchase Order validation
-	Replaces standard taxes_and_totals calculation with custom one
+	Handling charges are applied by the document's own totals pass (see
+	overrides/handling_charges.py); recomputed here only if that did not run
 	"""
-	# Use custom calculation class
-	custom_calculate_taxes_and_totals(doc)
+	apply_handling_charges(doc)
 
 
 def validate_purchase_invoice(doc, method=None):
 	"""
 	Hook for Purchase Invoice validation
 	"""
-	custom_calculate_taxes_and_totals(doc)
+	apply_handling_charges(doc)
 	validate_purchase_invoice_against_po(doc)
 
 
@@ -143,7 +48,7 @@ def validate_purchase_receipt(doc, method=None):
 	"""
 	Hook for Purchase Receipt validation
 	"""
-	custom_calculate_taxes_and_totals(doc)
+	apply_handling_charges(doc)
 	validate_purchase_receipt_against_po(doc)
 
 
@@ -4,155 +4,29 @@
 import frappe
 from frappe import _
 from frappe.utils import flt
-from erpnext.controllers.taxes_and_totals import calculate_taxes_and_totals
 
+from jain_machine_tools.overrides.handling_charges import (
+	HandlingChargesTaxesAndTotals,
+	apply_handling_charges,
+	calculate_taxes_and_totals_with_handling,
+)
 
-class CustomTaxesAndTotals(calculate_taxes_and_totals):
-	"""
-	Custom override to add handling charges calculation to Quotation Item
-	"""
-
-	def calculate_item_values(self):
-		"""
-		Override to add handling charges calculation after discount.
-		Sequence: price_list_rate → margin → discount → handling_charges → rate
-
-		Root cause of discount bug (ERPNext taxes_and_totals.py line 179):
-		  `if not item.rate or (item.pricing_rules and discount_percentage > 0):`
-		ERPNext only recalculates rate from price_list_rate when item.rate is falsy.
-		If item.rate is pre-set (truthy), discounts are silently skipped.
-		Fix: clear item.rate before calling super() so ERPNext always applies
-		price_list_rate + discount correctly.
-		"""
-		# Clear item.rate so ERPNext always recalculates from price_list_rate + discount.
-		# Only clear when price_list_rate exists (manually-set rates with no price list are preserved).
-		for item in self.doc.get("items"):
-			if item.price_list_rate:
-				item.rate = 0
-
-		# Standard ERPNext calculation: price_list_rate → margin → discount → item.rate
-		super(CustomTaxesAndTotals, self).calculate_item_values()
-
-		# After ERPNext has applied discounts, snapshot item.rate as the base for
-		# handling charges. This must happen before calculate_handling_charges so
-		# charges are applied on the already-discounted rate.
-		for item in self.doc.get("items"):
-			item.base_rate_before_handling_charges = flt(item.rate)
-
-		# Apply JMT handling charges on top of the discounted rate
-		for item in self.doc.get("items"):
-			self.calculate_handling_charges(item)
-
-	def calculate_handling_charges(self, item):
-		"""
-		Calculate handling charges and update item rate and amount
-
-		Calculation flow:
-		1. Get rate after discount (stored in _rate_before_handling_charges)
-		2. Calculate handling charges based on type (Percentage or Amount)
-		3. Add handling charges to rate
-		4. Recalculate amount = rate * qty
-		"""
-		# Get custom fields
-		handling_charges_type = item.get("handling_charges_type")
-		handling_charges_percentage = flt(item.get("handling_charges_percentage"))
-		handling_charges_amount = flt(item.get("handling_charges_amount"))
-
-		# Get the rate before handling charges (stored in persistent field)
-		rate_before_handling = flt(item.get("base_rate_before_handling_charges") or item.rate)
-
-		if rate_before_handling <= 0:
-			return
 
-		# Calculate handling charges value
-		handling_value = 0
-
-		# Only calculate if type is selected AND value is greater than 0
-		if handling_charges_type == "Percentage" and handling_charges_percentage > 0:
-			# Calculate as percentage of rate after discount
-			handling_value = rate_before_handling * (handling_charges_percentage / 100.0)
-
-		elif handling_charges_type == "Amount" and handling_charges_amount > 0:
-			# Use fixed amount
-			handling_value = handling_charges_amount
-		item.handling_charges_value = flt(handling_value * item.qty, _safe_precision(item, "handling_charges_value"))
-
-		# Always recalculate from base rate (even if handling_value is 0)
-		# This ensures removal of handling charges works correctly when set to 0
-		item.rate = flt(rate_before_handling + handling_value, _safe_precision(item, "rate"))
-
-		# Recalculate amounts with updated rate
-		item.net_rate = item.rate
-		item.amount = flt(item.rate * item.qty, _safe_precision(item, "amount"))
-		item.net_amount = item.amount
-
-		# Update base currency values
-		item.base_rate = flt(item.rate * self.doc.conversion_rate, _safe_precision(item, "base_rate"))
-		item.base_net_rate = item.base_rate
-		item.base_amount = flt(item.amount * self.doc.conversion_rate, _safe_precision(item, "base_amount"))
-		item.base_net_amount = item.base_amount
-
-		# Update taxable_value for India Compliance GST calculation
-		# This ensures GST is calculated on the rate WITH handling charges
-		item.taxable_value = item.base_net_amount
-
-	def calculate_totals(self):
-		"""
-		Override to handle missing 'category' attribute in Sales Taxes and Charges
-		This is a compatibility fix for different ERPNext versions
-		"""
-		try:
-			# Try the parent method first
-			super(CustomTaxesAndTotals, self).calculate_totals()
-		except AttributeError as e:
-			# If 'category' attribute is missing, handle manually
-			if "'category'" in str(e) or "fieldtype" in str(e):
-				# Safe calculation without category attribute
-				from frappe.utils import flt
-
-				self.doc.grand_total = flt(self.doc.get("grand_total_export") or self.doc.net_total)
-				self.doc.grand_total += flt(self.doc.get("total_taxes_and_charges"))
-
-				self.doc.base_grand_total = flt(self.doc.grand_total * self.doc.conversion_rate, self.doc.precision("base_grand_total"))
-
-				# Round if needed
-				if self.doc.get("is_rounded_total_disabled"):
-					self.doc.rounded_total = self.doc.grand_total
-					self.doc.base_rounded_total = self.doc.base_grand_total
-				else:
-					from erpnext import get_default_cost_center
-					self.doc.rounded_total = round(self.doc.grand_total)
-					self.doc.base_rounded_total = round(self.doc.base_grand_total)
-					self.doc.rounding_adjustment = flt(self.doc.rounded_total - self.doc.grand_total, self.doc.precision("rounding_adjustment"))
-					self.doc.base_rounding_adjustment = flt(self.doc.base_rounded_total - self.doc.base_grand_total, self.doc.precision("base_rounding_adjustment"))
-			else:
-				# Re-raise if it's a different AttributeError
-				raise
-
-
-def _safe_precision(item, fieldname, default=2):
-	"""
-	Safely get precision for a field — returns default if field doesn't exist in the doctype.
-	Needed when calculate_handling_charges runs on Proforma Invoice Item which may not have
-	all custom fields that Quotation Item has.
-	"""
-	try:
-		return item.precision(fieldname)
-	except AttributeError:
-		return default
+# Kept for code importing the pre-engine class names
+CustomTaxesAndTotals = HandlingChargesTaxesAndTotals
 
 
 def custom_calculate_taxes_and_totals(doc):
 	"""
-	Custom function to use our CustomTaxesAndTotals class
+	Full taxes and totals pass with handling charges (shared engine)
 	"""
-	CustomTaxesAndTotals(doc)
+	calculate_taxes_and_totals_with_handling(doc)
 
 
 def patch_insert_item_price():
 	"""
 	Monkey patch ERPNext's insert_item_price function to prevent creation for Non-Standard items
-	This is called after migrate to override the function at runtime
+	Registered in monkey_patches, applied once per process
 	"""
 	import erpnext.stock.get_item_details as item_details_module
 
@@ -315,10 +189,11 @@ def _validate_rate_not_above_price_list(doc):
 def validate_quotation(doc, method=None):
 	"""
 	Hook for Quotation validation
-	Replaces standard taxes_and_totals calculation with custom one
+	Handling charges are applied by the document's own totals pass (see
+	overrides/handling_charges.py); recomputed here only if that did not run
 	"""
 	_fetch_rm_from_customer(doc)
-	custom_calculate_taxes_and_totals(doc)
+	apply_handling_charges(doc)
 	_validate_rate_not_above_price_list(doc)
 
 
@@ -327,7 +202,7 @@ def validate_sales_order(doc, method=None):
 	Hook for Sales Order validation
 	"""
 	_fetch_rm_from_customer(doc)
-	custom_calculate_taxes_and_totals(doc)
+	apply_handling_charges(doc)
 	_validate_rate_not_above_price_list(doc)
 
 
@@ -335,14 +210,14 @@ def validate_sales_invoice(doc, method=None):
 	"""
 	Hook for Sales Invoice validation
 	"""
-	custom_calculate_taxes_and_totals(doc)
+	apply_handling_charges(doc)
 
 
 def validate_delivery_note(doc, method=None):
 	"""
 	Hook for Delivery Note validation
 	"""
-	custom_calculate_taxes_and_totals(doc)
+	apply_handling_charges(doc)
 
 
 def validate_proforma_invoice(doc, method=None):
@@ -350,7 +225,7 @@ def validate_proforma_invoice(doc, method=None):
 	Hook for Proforma Invoice validation
 	"""
 	_fetch_rm_from_customer(doc)
-	custom_calculate_taxes_and_totals(doc)
+	apply_handling_charges(doc)
 
 
 # ========================================
@@ -1,38 +1,79 @@
 from collections import defaultdict
+from functools import cached_property
 
 import frappe
 from frappe import _
 from frappe.utils import flt
 
-from jain_machine_tools.overrides.quotation import custom_calculate_taxes_and_totals
+from jain_machine_tools.overrides.handling_charges import apply_handling_charges
+
+# Source of truth for invoiced_qty: plan row qty on submitted Sales Invoices
+_INVOICED_QTY_BY_PLAN_ROW_QUERY = """
+	SELECT
+		sidp.delivery_planning_schedule_item,
+		SUM(sidp.qty) AS invoiced_qty
+	FROM `tabSales Invoice Delivery Plan` sidp
+	INNER JOIN `tabSales Invoice` si ON si.name = sidp.parent
+	WHERE si.docstatus = 1
+		AND sidp.delivery_planning_schedule_item IS NOT NULL
+	GROUP BY sidp.delivery_planning_schedule_item
+"""
 
 
 def validate_sales_invoice(doc, method=None):
 	"""
 	Hook for Sales Invoice validation.
 	"""
-	custom_calculate_taxes_and_totals(doc)
-	validate_sales_invoice_order_qty(doc)
-	validate_delivery_planning_schedule(doc)
+	apply_handling_charges(doc)
+
+	context = SalesInvoiceValidationContext(doc)
+	validate_sales_invoice_order_qty(doc, context)
+	validate_delivery_planning_schedule(doc, context)
+
+
+class SalesInvoiceValidationContext:
+	"""
+	Data the Sales Invoice checks read, loaded once per validate with set-based queries
+	- so_items: linked Sales Order Items (parent, rate), one query
+	- sales_order: resolved from the header or so_items, no query
+	- available_plans: selectable Delivery Planning Schedule rows, one query
+
+	Each part loads on first use, so the query count does not grow with line count
+	and checks that return early skip the loads they do not need.
+	"""
+
+	def __init__(self, doc):
+		self.doc = doc
+
+	@cached_property
+	def so_items(self):
+		return _get_sales_order_item_map(self.doc.get("items"))
 
+	@cached_property
+	def sales_order(self):
+		return _get_sales_order_from_invoice(self.doc, self.so_items)
 
-def validate_sales_invoice_order_qty(doc):
+	@cached_property
+	def available_plans(self):
+		if not self.sales_order:
+			return []
+
+		return get_available_delivery_plan_rows(self.sales_order, sales_invoice=self.doc.name)
+
+
+def validate_sales_invoice_order_qty(doc, context=None):
 	"""
 	Ensure Sales Invoice item rate does not exceed the linked Sales Order item values.
 	(Quantity validation against SO is removed as per new requirements)
 	"""
+	context = context or SalesInvoiceValidationContext(doc)
 	mismatches = []
 
 	for row in doc.get("items", []):
 		if not row.get("so_detail"):
 			continue
 
-		so_item = frappe.db.get_value(
-			"Sales Order Item",
-			row.so_detail,
-			["parent", "rate"],
-			as_dict=True,
-		)
+		so_item = context.so_items.get(row.so_detail)
 
 		if not so_item:
 			continue
@@ -60,77 +101,263 @@ def validate_sales_invoice_order_qty(doc):
 
 def update_delivery_planning_schedule_status(doc, method=None):
 	"""
-	Update the status of linked Delivery Planning Schedule and its items.
+	Update invoiced qty and status of linked Delivery Planning Schedules and their items.
 	Triggered on on_submit and on_cancel of Sales Invoice.
+
+	invoiced_qty is updated in the invoice's transaction; status is recomputed after
+	commit by a background job (in this transaction when jmt_dps_status_sync is set
+	in site config, or in tests).
 	"""
 	if not doc.get("delivery_plan_details"):
 		return
 
-	dps_names = set()
-	for row in doc.delivery_plan_details:
-		if row.delivery_planning_schedule:
-			dps_names.add(row.delivery_planning_schedule)
+	dps_names = sorted(
+		{row.delivery_planning_schedule for row in doc.delivery_plan_details if row.delivery_planning_schedule}
+	)
+
+	_lock_delivery_planning_schedules(dps_names)
+	update_dps_invoiced_qty(doc.delivery_plan_details, cancel=doc.docstatus == 2)
+
+	if frappe.flags.in_test or frappe.conf.get("jmt_dps_status_sync"):
+		update_dps_status(dps_names)
+	else:
+		enqueue_dps_status_update(dps_names)
+
+
+def update_dps_invoiced_qty(plan_rows, cancel=False):
+	"""
+	Add (submit) or subtract (cancel) the invoice's plan row qty on Delivery Planning Schedule Item
+	invoiced_qty, in the same transaction as the Sales Invoice.
+
+	On submit the remaining qty is checked again in the UPDATE itself: validate read it
+	before the schedule locks were taken, so another invoice may have used it since.
+	"""
+	qty_by_plan_row = defaultdict(float)
+	for row in plan_rows:
+		if row.get("delivery_planning_schedule_item"):
+			qty_by_plan_row[row.delivery_planning_schedule_item] += flt(row.get("qty"))
+
+	# Sorted, so concurrent invoices against the same schedule lock rows in the same order
+	for plan_row in sorted(qty_by_plan_row):
+		qty = qty_by_plan_row[plan_row]
+		if cancel:
+			frappe.db.sql(
+				"""
+				UPDATE `tabDelivery Planning Schedule Item`
+				SET invoiced_qty = IFNULL(invoiced_qty, 0) - %s
+				WHERE name = %s
+				""",
+				(qty, plan_row),
+			)
+			continue
+
+		if qty <= 0:
+			continue
+
+		frappe.db.sql(
+			"""
+			UPDATE `tabDelivery Planning Schedule Item`
+			SET invoiced_qty = IFNULL(invoiced_qty, 0) + %(qty)s
+			WHERE name = %(plan_row)s
+				AND planned_qty - IFNULL(invoiced_qty, 0) >= %(qty)s - 1e-9
+			""",
+			{"qty": qty, "plan_row": plan_row},
+		)
+		if not frappe.db._cursor.rowcount:
+			frappe.throw(
+				_(
+					"Delivery Plan row {0} does not have {1} qty left to invoice. "
+					"It may have been invoiced by another Sales Invoice, please reload and try again."
+				).format(plan_row, qty),
+				title=_("Insufficient Planned Quantity"),
+			)
+
+
+def enqueue_dps_status_update(dps_names):
+	"""
+	Recompute DPS status after the current transaction commits, one job per schedule.
+
+	A schedule with a job still waiting in the queue is skipped: that job has not read
+	anything yet, and its row locks make it read after this transaction commits, so it
+	also covers this invoice. A job that has already started may have read before this
+	invoice, so a follow-up job is queued under its own id rather than reusing (and
+	overwriting) the running job's.
+	"""
+	from frappe.utils.background_jobs import create_job_id, get_job
 
 	for dps_name in dps_names:
-		dps = frappe.get_doc("Delivery Planning Schedule", dps_name)
-		_update_dps_status(dps)
+		job_id = f"jmt_dps_status::{dps_name}"
+		job = get_job(create_job_id(job_id))
+		status = job.get_status() if job else None
+		if status == "queued":
+			continue
+
+		if status == "started":
+			job_id = f"{job_id}::{frappe.generate_hash(length=8)}"
+
+		frappe.enqueue(
+			"jain_machine_tools.overrides.sales_invoice.update_dps_status_job",
+			queue="short",
+			job_id=job_id,
+			deduplicate=True,
+			enqueue_after_commit=True,
+			delivery_planning_schedule=dps_name,
+		)
+
 
+def update_dps_status_job(delivery_planning_schedule):
+	"""Background job for enqueue_dps_status_update"""
+	dps_names = [delivery_planning_schedule]
+	_lock_delivery_planning_schedules(dps_names)
+	update_dps_status(dps_names)
+	frappe.db.commit()
 
-def _update_dps_status(dps):
+
+def update_dps_status(dps_names):
 	"""
-	Calculate and update status for DPS and its items.
+	Set-based status recompute for Delivery Planning Schedules and their items.
+	One UPDATE for item status, one grouped read, one UPDATE ... CASE for the schedules.
+	Callers hold the schedule locks (_lock_delivery_planning_schedules).
 	"""
-	# Get already invoiced quantities for this DPS
-	invoiced_qty_map = _get_total_invoiced_qty_for_dps(dps.name)
+	if not dps_names:
+		return
 
-	all_completed = True
-	any_completed = False
-	any_partial = False
+	dps_names = tuple(dps_names)
 
-	for item in dps.get("items"):
-		invoiced_qty = flt(invoiced_qty_map.get(item.name, 0))
-		planned_qty = flt(item.planned_qty)
+	frappe.db.sql(
+		"""
+		UPDATE `tabDelivery Planning Schedule Item`
+		SET status = CASE
+			WHEN IFNULL(invoiced_qty, 0) >= planned_qty - 1e-9 THEN 'Completed'
+			ELSE 'Pending'
+		END
+		WHERE parent IN %(dps_names)s
+			AND parenttype = 'Delivery Planning Schedule'
+		""",
+		{"dps_names": dps_names},
+	)
 
-		if invoiced_qty >= planned_qty - 1e-9:
-			item.status = "Completed"
-			any_completed = True
-		else:
-			item.status = "Pending"
-			all_completed = False
-			if invoiced_qty > 1e-9:
-				any_partial = True
+	counts = {
+		row.parent: row
+		for row in frappe.db.sql(
+			"""
+			SELECT
+				parent,
+				COUNT(*) AS total_rows,
+				SUM(CASE WHEN IFNULL(invoiced_qty, 0) >= planned_qty - 1e-9 THEN 1 ELSE 0 END) AS completed_rows,
+				SUM(CASE WHEN IFNULL(invoiced_qty, 0) > 1e-9 THEN 1 ELSE 0 END) AS invoiced_rows
+			FROM `tabDelivery Planning Schedule Item`
+			WHERE parent IN %(dps_names)s
+				AND parenttype = 'Delivery Planning Schedule'
+			GROUP BY parent
+			""",
+			{"dps_names": dps_names},
+			as_dict=True,
+		)
+	}
 
-		item.db_set("status", item.status, update_modified=False)
+	cases = []
+	values = {"dps_names": dps_names}
+	for i, dps_name in enumerate(dps_names):
+		values[f"name_{i}"] = dps_name
+		values[f"status_{i}"] = _get_overall_dps_status(counts.get(dps_name))
+		cases.append(f"WHEN %(name_{i})s THEN %(status_{i})s")
 
-	if all_completed:
-		overall_status = "Completed"
-	elif any_completed or any_partial:
-		overall_status = "Partial"
-	else:
-		overall_status = "Pending"
+	frappe.db.sql(
+		f"""
+		UPDATE `tabDelivery Planning Schedule`
+		SET status = CASE name {' '.join(cases)} ELSE status END
+		WHERE name IN %(dps_names)s
+		""",
+		values,
+	)
 
-	dps.db_set("status", overall_status, update_modified=False)
 
+def _get_overall_dps_status(counts):
+	# A schedule without rows counts as completed, as before
+	if not counts or counts.completed_rows >= counts.total_rows:
+		return "Completed"
+	if counts.completed_rows or counts.invoiced_rows:
+		return "Partial"
+	return "Pending"
 
-def _get_total_invoiced_qty_for_dps(dps_name):
+
+def _lock_delivery_planning_schedules(dps_names):
 	"""
-	Helper to get total invoiced quantity across all submitted SIs for a DPS.
+	Lock the schedule rows in name order before touching their items, so invoices and
+	status jobs working on the same schedules queue up instead of deadlocking
 	"""
-	result = frappe.db.sql(
+	if not dps_names:
+		return
+
+	frappe.db.sql(
 		"""
+		SELECT name
+		FROM `tabDelivery Planning Schedule`
+		WHERE name IN %(dps_names)s
+		ORDER BY name
+		FOR UPDATE
+		""",
+		{"dps_names": tuple(dps_names)},
+	)
+
+
+def rebuild_dps_invoiced_qty(delivery_planning_schedules=None):
+	"""
+	Recompute Delivery Planning Schedule Item invoiced_qty from submitted Sales Invoices,
+	then the statuses derived from it. All schedules, or only the given ones. Used for
+	backfill and to repair drift found by check_dps_invoiced_qty.
+	"""
+	condition = ""
+	values = {}
+	if delivery_planning_schedules:
+		condition = "WHERE dpsi.parent IN %(delivery_planning_schedules)s"
+		values["delivery_planning_schedules"] = tuple(delivery_planning_schedules)
+
+	frappe.db.sql(
+		f"""
+		UPDATE `tabDelivery Planning Schedule Item` dpsi
+		LEFT JOIN ({_INVOICED_QTY_BY_PLAN_ROW_QUERY}) invoiced
+			ON invoiced.delivery_planning_schedule_item = dpsi.name
+		SET dpsi.invoiced_qty = IFNULL(invoiced.invoiced_qty, 0)
+		{condition}
+		""",
+		values,
+	)
+
+	update_dps_status(
+		delivery_planning_schedules or frappe.get_all("Delivery Planning Schedule", pluck="name")
+	)
+
+
+def check_dps_invoiced_qty(delivery_planning_schedules=None):
+	"""
+	Return Delivery Planning Schedule Items whose invoiced_qty differs from the qty on
+	submitted Sales Invoices, as dicts with both values.
+	"""
+	condition = ""
+	values = {}
+	if delivery_planning_schedules:
+		condition = "AND dpsi.parent IN %(delivery_planning_schedules)s"
+		values["delivery_planning_schedules"] = tuple(delivery_planning_schedules)
+
+	return frappe.db.sql(
+		f"""
 		SELECT
-			sii.delivery_planning_schedule_item,
-			SUM(sii.qty) as total_qty
-		FROM `tabSales Invoice Delivery Plan` sii
-		INNER JOIN `tabSales Invoice` si ON si.name = sii.parent
-		WHERE sii.delivery_planning_schedule = %s
-			AND si.docstatus = 1
-		GROUP BY sii.delivery_planning_schedule_item
+			dpsi.parent AS delivery_planning_schedule,
+			dpsi.name AS delivery_planning_schedule_item,
+			IFNULL(dpsi.invoiced_qty, 0) AS invoiced_qty,
+			IFNULL(invoiced.invoiced_qty, 0) AS expected_qty
+		FROM `tabDelivery Planning Schedule Item` dpsi
+		LEFT JOIN ({_INVOICED_QTY_BY_PLAN_ROW_QUERY}) invoiced
+			ON invoiced.delivery_planning_schedule_item = dpsi.name
+		WHERE ABS(IFNULL(dpsi.invoiced_qty, 0) - IFNULL(invoiced.invoiced_qty, 0)) > 1e-9
+			{condition}
+		ORDER BY dpsi.parent, dpsi.idx
 		""",
-		dps_name,
-		as_dict=True
+		values,
+		as_dict=True,
 	)
-	return {row.delivery_planning_schedule_item: row.total_qty for row in result}
 
 
 # @frappe.whitelist()
@@ -174,23 +401,20 @@ def _get_total_invoiced_qty_for_dps(dps_name):
 	return res
 
 
-def validate_delivery_planning_schedule(doc):
+def validate_delivery_planning_schedule(doc, context=None):
 	"""
 	Validate Sales Invoice item quantities against selected Delivery Planning Schedule rows.
 	"""
-	sales_order = _get_sales_order_from_invoice(doc)
-	if not sales_order:
+	context = context or SalesInvoiceValidationContext(doc)
+	if not context.sales_order:
 		return
 
 	selected_plans = doc.get("delivery_plan_details") or []
-	available_plans = get_available_delivery_plan_rows(sales_order, sales_invoice=doc.name)
-
-	if not available_plans and not selected_plans:
-		return
-
 	if not selected_plans:
 		return
 
+	available_plans = context.available_plans
+
 	available_plan_map = {
 		(row.delivery_planning_schedule_item, row.sales_order_item): row for row in available_plans
 	}
@@ -272,22 +496,21 @@ def validate_delivery_planning_schedule(doc):
 		)
 
 
-def _get_sales_order_from_invoice(doc):
+def _get_sales_order_from_invoice(doc, so_items=None):
 	"""
 	Resolve the originating Sales Order from the invoice header or item rows.
 	"""
 	if doc.get("sales_order"):
 		return doc.sales_order
 
+	if so_items is None:
+		so_items = _get_sales_order_item_map(doc.get("items"))
+
 	sales_orders = []
 	for row in doc.get("items", []):
-		so_item = row.get("so_detail")
-		if not so_item:
-			continue
-
-		parent = frappe.db.get_value("Sales Order Item", so_item, "parent")
-		if parent:
-			sales_orders.append(parent)
+		so_item = so_items.get(row.get("so_detail"))
+		if so_item and so_item.parent:
+			sales_orders.append(so_item.parent)
 
 	if not sales_orders:
 		return None
@@ -303,6 +526,28 @@ def _get_sales_order_from_invoice(doc):
 	return unique_sales_orders[0]
 
 
+def _get_sales_order_item_map(items):
+	"""
+	{Sales Order Item name: (parent, rate)} for every so_detail on the invoice rows, one query.
+	"""
+	so_details = list({row.get("so_detail") for row in items or [] if row.get("so_detail")})
+	if not so_details:
+		return {}
+
+	return {
+		row.name: row
+		for row in frappe.db.sql(
+			"""
+			SELECT name, parent, rate
+			FROM `tabSales Order Item`
+			WHERE name IN %(so_details)s
+			""",
+			{"so_details": so_details},
+			as_dict=True,
+		)
+	}
+
+
 def _build_invoice_qty_map(items):
 	"""
 	Aggregate Sales Invoice quantities by linked Sales Order Item.
@@ -348,74 +593,28 @@ def _format_item_label(row):
 	return item_code or item_name or _("Row #{0}").format(row.get("idx"))
 
 
-def _get_invoiced_qty_by_plan_row(sales_order, exclude_sales_invoice=None):
-	"""
-	Return already invoiced qty grouped by Delivery Planning Schedule child row.
-	"""
-	conditions = [
-		"si.docstatus = 1",
-		"sii.delivery_planning_schedule_item IS NOT NULL",
-		"sii.sales_order_item IS NOT NULL",
-	]
-	values = []
-
-	if exclude_sales_invoice:
-		conditions.append("si.name != %s")
-		values.append(exclude_sales_invoice)
-
-	conditions.append(
-		"""
-		EXISTS (
-			SELECT 1
-			FROM `tabSales Invoice Item` sii_ref
-			WHERE sii_ref.parent = si.name
-				AND sii_ref.so_detail IN (
-					SELECT soi.name
-					FROM `tabSales Order Item` soi
-					WHERE soi.parent = %s
-				)
-		)
-		"""
-	)
-	values.append(sales_order)
-
-	return {
-		(row.delivery_planning_schedule_item, row.sales_order_item): flt(row.invoiced_qty)
-		for row in frappe.db.sql(
-			f"""
-			SELECT
-				sii.delivery_planning_schedule_item,
-				sii.sales_order_item,
-				SUM(sii.qty) AS invoiced_qty
-			FROM `tabSales Invoice Delivery Plan` sii
-			INNER JOIN `tabSales Invoice` si
-				ON si.name = sii.parent
-			WHERE {' AND '.join(conditions)}
-			GROUP BY sii.delivery_planning_schedule_item, sii.sales_order_item
-			""",
-			values,
-			as_dict=True,
-		)
-	}
-
-
 @frappe.whitelist()
 def get_available_delivery_plan_rows(sales_order, sales_invoice=None, posting_date=None):
 	"""
 	Return selectable Delivery Planning Schedule rows for a Sales Order with remaining qty.
-	Filters by delivery_date <= posting_date and status == "Pending".
+	Filters by delivery_date <= posting_date.
+
+	Remaining qty comes from the maintained invoiced_qty, so this is a single read. Only
+	submitted invoices count toward it, so the draft sales_invoice never needs excluding.
+	Row status is not used: it is recomputed after commit by a background job, so right
+	after a cancel it can still say Completed while invoiced_qty is already reduced.
 	"""
 	if not sales_order:
 		return []
 
-	invoiced_qty_map = _get_invoiced_qty_by_plan_row(sales_order, exclude_sales_invoice=sales_invoice)
-
-	conditions = ["dps.sales_order = %s", "dps.docstatus < 2", "dpsi.sales_order_item IS NOT NULL"]
+	conditions = [
+		"dps.sales_order = %s",
+		"dps.docstatus < 2",
+		"dpsi.sales_order_item IS NOT NULL",
+		"dpsi.planned_qty - IFNULL(dpsi.invoiced_qty, 0) > 1e-9",
+	]
 	values = [sales_order]
 
-	# Filter by Pending status
-	conditions.append("dpsi.status = 'Pending'")
-
 	# Filter by Posting Date
 	if posting_date:
 		conditions.append("dpsi.delivery_date <= %s")
@@ -430,7 +629,8 @@ def get_available_delivery_plan_rows(sales_order, sales_invoice=None, posting_da
 			dpsi.item_code,
 			dpsi.delivery_date,
 			dpsi.planned_qty,
-			dpsi.uom
+			dpsi.uom,
+			IFNULL(dpsi.invoiced_qty, 0) AS already_invoiced_qty
 		FROM `tabDelivery Planning Schedule Item` dpsi
 		INNER JOIN `tabDelivery Planning Schedule` dps
 			ON dps.name = dpsi.parent
@@ -441,19 +641,8 @@ def get_available_delivery_plan_rows(sales_order, sales_invoice=None, posting_da
 		as_dict=True,
 	)
 
-	available_rows = []
 	for row in rows:
-		already_invoiced_qty = flt(
-			invoiced_qty_map.get((row.delivery_planning_schedule_item, row.sales_order_item))
-		)
-		available_qty = flt(row.planned_qty) - already_invoiced_qty
-
-		if available_qty <= 1e-9:
-			continue
-
-		row.already_invoiced_qty = already_invoiced_qty
-		row.available_qty = available_qty
-		row.qty = available_qty
-		available_rows.append(row)
+		row.available_qty = flt(row.planned_qty) - flt(row.already_invoiced_qty)
+		row.qty = row.available_qty
 
-	return available_rows
+	return rows
@@ -0,0 +1,176 @@
+# Copyright (c) 2026, Praxon Technovation and Contributors
+# See license.txt
+
+import frappe
+from erpnext.selling.doctype.sales_order.test_sales_order import make_sales_order
+from frappe.tests.utils import FrappeTestCase, change_settings
+from frappe.utils import nowdate
+
+from jain_machine_tools.overrides.sales_invoice import (
+	SalesInvoiceValidationContext,
+	get_available_delivery_plan_rows,
+	update_dps_invoiced_qty,
+	validate_delivery_planning_schedule,
+	validate_sales_invoice_order_qty,
+)
+
+WAREHOUSE = "_Test Warehouse - _TC"
+
+
+def _make_sales_order_with_plan(lines):
+	"""Submitted Sales Order with lines rows of _Test Item and a Delivery Planning Schedule over all of them"""
+	sales_order = make_sales_order(
+		item_list=[
+			{"item_code": "_Test Item", "qty": 2, "rate": 1, "warehouse": WAREHOUSE} for _ in range(lines)
+		],
+	)
+
+	schedule = frappe.get_doc(
+		{
+			"doctype": "Delivery Planning Schedule",
+			"sales_order": sales_order.name,
+			"schedule_date": nowdate(),
+			"items": [
+				{
+					"item_code": row.item_code,
+					"sales_order_item": row.name,
+					"delivery_date": nowdate(),
+					"planned_qty": row.qty,
+					"uom": row.uom,
+					"warehouse": row.warehouse,
+				}
+				for row in sales_order.items
+			],
+		}
+	).insert()
+
+	return sales_order, schedule
+
+
+def _make_sales_invoice(sales_order, schedule):
+	"""Unsaved Sales Invoice billing one of each Sales Order row against its plan row"""
+	return frappe.get_doc(
+		{
+			"doctype": "Sales Invoice",
+			"company": sales_order.company,
+			"customer": sales_order.customer,
+			"items": [
+				{
+					"item_code": row.item_code,
+					"qty": 1,
+					"rate": row.rate,
+					"sales_order": sales_order.name,
+					"so_detail": row.name,
+				}
+				for row in sales_order.items
+			],
+			"delivery_plan_details": [
+				{
+					"delivery_planning_schedule": schedule.name,
+					"delivery_planning_schedule_item": plan_row.name,
+					"sales_order_item": plan_row.sales_order_item,
+					"item_code": plan_row.item_code,
+					"qty": 1,
+				}
+				for plan_row in schedule.items
+			],
+		}
+	)
+
+
+class TestSalesInvoiceValidation(FrappeTestCase):
+	@change_settings("Selling Settings", {"allow_multiple_items": 1})
+	def test_context_query_count_is_constant(self):
+		for lines in (10, 100):
+			sales_order, schedule = _make_sales_order_with_plan(lines)
+			doc = _make_sales_invoice(sales_order, schedule)
+			context = SalesInvoiceValidationContext(doc)
+
+			# Sales Order Items + available plan rows, regardless of line count
+			with self.assertQueryCount(2):
+				context.so_items
+				context.sales_order
+				context.available_plans
+
+			self.assertEqual(len(context.so_items), lines)
+			self.assertEqual(context.sales_order, sales_order.name)
+			self.assertEqual(
+				{row.delivery_planning_schedule_item for row in context.available_plans},
+				{row.name for row in schedule.items},
+			)
+
+			with self.assertQueryCount(0):
+				validate_sales_invoice_order_qty(doc, context)
+				validate_delivery_planning_schedule(doc, context)
+
+	@change_settings("Selling Settings", {"allow_multiple_items": 1})
+	def test_plan_qty_must_match_invoice_qty(self):
+		sales_order, schedule = _make_sales_order_with_plan(2)
+		doc = _make_sales_invoice(sales_order, schedule)
+		doc.delivery_plan_details[0].qty = 2
+
+		context = SalesInvoiceValidationContext(doc)
+		self.assertRaises(frappe.ValidationError, validate_delivery_planning_schedule, doc, context)
+
+	def test_invoiced_qty_cannot_exceed_planned_qty(self):
+		_sales_order, schedule = _make_sales_order_with_plan(1)
+		plan_row = schedule.items[0].name
+
+		update_dps_invoiced_qty([frappe._dict(delivery_planning_schedule_item=plan_row, qty=2)])
+		self.assertEqual(frappe.db.get_value("Delivery Planning Schedule Item", plan_row, "invoiced_qty"), 2)
+
+		# Another invoice validated against the same remaining qty before this one submitted
+		self.assertRaises(
+			frappe.ValidationError,
+			update_dps_invoiced_qty,
+			[frappe._dict(delivery_planning_schedule_item=plan_row, qty=1)],
+		)
+		self.assertEqual(frappe.db.get_value("Delivery Planning Schedule Item", plan_row, "invoiced_qty"), 2)
+
+		update_dps_invoiced_qty([frappe._dict(delivery_planning_schedule_item=plan_row, qty=2)], cancel=True)
+		self.assertEqual(frappe.db.get_value("Delivery Planning Schedule Item", plan_row, "invoiced_qty"), 0)
+
+	def test_available_plans_follow_invoiced_qty_not_status(self):
+		sales_order, schedule = _make_sales_order_with_plan(1)
+		plan_row = schedule.items[0].name
+
+		# Invoice cancelled: invoiced_qty is back to 0, status not recomputed yet
+		frappe.db.set_value(
+			"Delivery Planning Schedule Item", plan_row, {"status": "Completed", "invoiced_qty": 0}
+		)
+		rows = get_available_delivery_plan_rows(sales_order.name)
+		self.assertEqual([row.delivery_planning_schedule_item for row in rows], [plan_row])
+		self.assertEqual(rows[0].available_qty, 2)
+
+		# Fully invoiced, status not recomputed yet
+		frappe.db.set_value(
+			"Delivery Planning Schedule Item", plan_row, {"status": "Pending", "invoiced_qty": 2}
+		)
+		self.assertEqual(get_available_delivery_plan_rows(sales_order.name), [])
+
+	def test_sales_order_resolved_from_prefetched_items(self):
+		doc = frappe.get_doc(
+			{
+				"doctype": "Sales Invoice",
+				"items": [
+					{"item_code": "_Test Item", "qty": 1, "rate": 100, "so_detail": f"_Test SO Detail {i}"}
+					for i in range(2)
+				],
+			}
+		)
+
+		context = SalesInvoiceValidationContext(doc)
+		context.so_items = {
+			"_Test SO Detail 0": frappe._dict(name="_Test SO Detail 0", parent="SO-1", rate=100),
+			"_Test SO Detail 1": frappe._dict(name="_Test SO Detail 1", parent="SO-1", rate=100),
+		}
+
+		with self.assertQueryCount(0):
+			self.assertEqual(context.sales_order, "SO-1")
+
+		context = SalesInvoiceValidationContext(doc)
+		context.so_items = {
+			"_Test SO Detail 0": frappe._dict(name="_Test SO Detail 0", parent="SO-1", rate=100),
+			"_Test SO Detail 1": frappe._dict(name="_Test SO Detail 1", parent="SO-2", rate=100),
+		}
+		self.assertRaises(frappe.ValidationError, lambda: context.sales_order)
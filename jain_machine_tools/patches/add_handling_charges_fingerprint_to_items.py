@@ -0,0 +1,40 @@
+import frappe
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+
+def execute():
+	"""
+	Add handling_charges_fingerprint (hidden) to the selling and buying item doctypes.
+	The totals engine stores a hash of each row's pricing inputs here and skips
+	rate / handling charges recomputation for rows whose hash is unchanged.
+	Proforma Invoice Item carries the field in its own doctype JSON.
+	"""
+	item_doctypes = [
+		"Quotation Item",
+		"Sales Order Item",
+		"Sales Invoice Item",
+		"Delivery Note Item",
+		"Purchase Order Item",
+		"Purchase Invoice Item",
+		"Purchase Receipt Item",
+	]
+
+	custom_fields = {
+		doctype: [
+			{
+				"fieldname": "handling_charges_fingerprint",
+				"label": "Handling Charges Fingerprint",
+				"fieldtype": "Data",
+				"insert_after": "handling_charges_value",
+				"hidden": 1,
+				"read_only": 1,
+				"print_hide": 1,
+				"report_hide": 1,
+				"no_copy": 1,
+			}
+		]
+		for doctype in item_doctypes
+	}
+
+	create_custom_fields(custom_fields, update=True)
+	frappe.db.commit()
@@ -0,0 +1,29 @@
+import frappe
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+
+def execute():
+	"""
+	Add custom_reorder_run_key (Data, read-only) to Material Request.
+	Set by sharded auto reorder runs so a retried shard job finds the MRs it already created.
+	"""
+	custom_fields = {
+		"Material Request": [
+			{
+				"fieldname": "custom_reorder_run_key",
+				"label": "Reorder Run Key",
+				"fieldtype": "Data",
+				"insert_after": "custom_custom_material_request_type",
+				"read_only": 1,
+				"hidden": 1,
+				"no_copy": 1,
+				"print_hide": 1,
+				"search_index": 1,
+			}
+		]
+	}
+
+	create_custom_fields(custom_fields, update=True)
+
+	frappe.clear_cache(doctype="Material Request")
+	frappe.db.commit()
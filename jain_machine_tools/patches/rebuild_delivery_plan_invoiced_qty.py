@@ -0,0 +1,8 @@
+from jain_machine_tools.overrides.sales_invoice import rebuild_dps_invoiced_qty
+
+
+def execute():
+	"""
+	Backfill Delivery Planning Schedule Item invoiced_qty from submitted Sales Invoices.
+	"""
+	rebuild_dps_invoiced_qty()
@@ -18,9 +18,10 @@ def override_erpnext_reorder(bootinfo=None):
     """
     Override ERPNext's default reorder_item function
     This prevents duplication (daily ERPNext + hourly JMT)
+    Registered in monkey_patches, applied once per process
 
     Args:
-        bootinfo: Optional bootinfo dict passed by frappe boot_session hook
+        bootinfo: Unused, kept for callers using the old boot_session signature
     """
     # Replace ERPNext's reorder_item with a no-op function
     # Our optimized version runs hourly from scheduler_events
@@ -32,7 +33,3 @@ def override_erpnext_reorder(bootinfo=None):
         return
 
     erpnext.stock.reorder_item.reorder_item = noop_reorder_item
-
-
-# Call override on module load
-override_erpnext_reorder()
\ No newline at end of file
@@ -2,51 +2,188 @@
 Optimized Auto Reorder System for JMT
 - Hourly execution instead of daily
 - Cumulative Material Requests (grouped by warehouse)
-- Warehouse hierarchy caching for performance
+- Warehouse hierarchy from the shared cache (utils/warehouse_cache.py)
+- Incremental runs: only items whose bins changed since the last run
+- Draft reorder MRs netted against projected qty to avoid repeat MRs
 - Reduced execution time
 """
 
+import hashlib
+import json
+from math import ceil
+
 import frappe
 from frappe import _
-from frappe.utils import add_days, cint, flt, nowdate
+from frappe.utils import add_days, cint, flt, now_datetime, nowdate
 from typing import Dict, List
 import erpnext
 
+from jain_machine_tools.stock.reorder_run_log import (
+    STATUS_COMPLETED,
+    STATUS_FAILED,
+    STATUS_QUEUED,
+    STATUS_SKIPPED,
+    ReorderRunTracker,
+    update_run_log,
+)
+from jain_machine_tools.utils.warehouse_cache import (
+    get_ancestors,
+    get_warehouse_company_map,
+    get_warehouse_tree,
+)
+
+# Redis set of (item_code, warehouse) bins touched since the last successful run
+REORDER_DIRTY_BINS_KEY = "jmt_reorder_dirty_bins"
+
+# System default holding the start time of the last successful run
+REORDER_HIGH_WATER_MARK_KEY = "jmt_reorder_high_water_mark"
+
+# Group-warehouse projected qty rollup strategies
+ROLLUP_MODE_SQL = "sql"  # one lft/rgt range query per referenced warehouse group
+ROLLUP_MODE_PYTHON = "python"  # walk the cached parent chain of every bin
 
-# Warehouse hierarchy cache (refreshed hourly)
-_warehouse_cache = {}
+# Reorder decision strategies
+PLANNER_VECTORIZED = "vectorized"  # columnar NumPy pass, see stock/reorder_planner.py
+PLANNER_PYTHON = "python"  # process_item_for_reorder once per reorder row
 
+# MR creation fan-out: one background job per company or per warehouse
+SHARD_BY_COMPANY = "company"
+SHARD_BY_WAREHOUSE = "warehouse"
 
-def optimized_reorder_item():
+# Redis lock that keeps scheduled runs from overlapping
+REORDER_LOCK_KEY = "jmt_reorder_run_lock"
+REORDER_LOCK_TTL = 3 * 60 * 60
+
+# Lifetime of a sharded run's Redis state and timeout of each shard job
+REORDER_RUN_TTL = 60 * 60
+
+
+def optimized_reorder_item(full_rescan=False, shard_by=None):
     """
     Optimized reorder item function
-    - Caches warehouse hierarchy
+    - Reads warehouse hierarchy from the shared cache
     - Creates cumulative MRs
     - Faster execution
+
+    By default only items whose bins (or reorder settings) changed since the
+    last successful run are re-evaluated. Pass full_rescan=True to evaluate
+    the whole catalogue.
+
+    shard_by ("company" or "warehouse", default from the
+    jmt_reorder_shard_by site config) moves MR creation to one background
+    job per shard.
     """
     # Check if auto_indent is enabled
     if not cint(frappe.db.get_value("Stock Settings", None, "auto_indent")):
         return
 
-    # Clear warehouse cache at the start of each run
-    global _warehouse_cache
-    _warehouse_cache = {}
+    shard_by = shard_by or frappe.conf.get("jmt_reorder_shard_by")
+    run_log = ReorderRunTracker(
+        mode="Full Rescan" if cint(full_rescan) else "Incremental", shard_by=shard_by
+    )
+
+    # A slow run must not overlap the next scheduled one and order twice
+    lock_token = acquire_reorder_lock()
+    if not lock_token:
+        run_log.save(STATUS_SKIPPED, error=_("Previous reorder run still in progress"))
+        return
+
+    handed_off = False
+    try:
+        result = _execute_optimized_reorder(
+            full_rescan=cint(full_rescan), shard_by=shard_by, run_log=run_log
+        )
 
-    return _execute_optimized_reorder()
+        if shard_by and result:
+            # Shard jobs are still creating MRs; the last one releases the lock
+            frappe.cache.set_value(
+                _reorder_run_cache_key(run_log.run_id, "lock"),
+                lock_token,
+                expires_in_sec=REORDER_LOCK_TTL,
+            )
+            handed_off = True
+            run_log.save(STATUS_QUEUED)
+        else:
+            run_log.save(STATUS_COMPLETED)
 
+        return result
 
-def _execute_optimized_reorder():
-    """Execute the optimized reorder logic"""
+    except Exception:
+        frappe.db.rollback()
+        run_log.save(STATUS_FAILED, error=frappe.get_traceback(with_context=True))
+        frappe.db.commit()
+        raise
+
+    finally:
+        if not handed_off:
+            release_reorder_lock(lock_token)
+
+
+def run_full_reorder():
+    """Fallback entry point that re-evaluates every reorderable item"""
+    return optimized_reorder_item(full_rescan=True)
+
+
+def acquire_reorder_lock():
+    """Take the run lock, returns the owner token or None when another run holds it"""
+    token = frappe.generate_hash(length=16)
+    if frappe.cache.set(
+        frappe.cache.make_key(REORDER_LOCK_KEY), token, nx=True, ex=REORDER_LOCK_TTL
+    ):
+        return token
+
+
+def release_reorder_lock(token):
+    """Release the run lock if it is still owned by token"""
+    key = frappe.cache.make_key(REORDER_LOCK_KEY)
+    if token and frappe.safe_decode(frappe.cache.get(key) or b"") == token:
+        frappe.cache.delete(key)
+
+
+def _execute_optimized_reorder(
+    full_rescan=False,
+    planner=PLANNER_VECTORIZED,
+    shard_by=None,
+    run_log=None,
+    dry_run=False,
+):
+    """
+    Execute the optimized reorder logic
+
+    dry_run builds the Material Requests without inserting them and leaves
+    the high-water mark and dirty set untouched (used by the benchmarks)
+    """
+    run_log = run_log or ReorderRunTracker(
+        mode="Full Rescan" if full_rescan else "Incremental", shard_by=shard_by
+    )
+
+    # Captured before anything is read so bins touched during this run are
+    # picked up again by the next one
+    run_started_at = now_datetime()
+    dirty_bins = set()
+    item_codes = None
+
+    if not full_rescan:
+        high_water_mark = frappe.db.get_default(REORDER_HIGH_WATER_MARK_KEY)
+
+        # Without a high-water mark there is nothing to diff against, so the
+        # first run always falls back to a full rescan
+        if high_water_mark:
+            with run_log.phase("item_load"):
+                dirty_bins = get_dirty_bins()
+                item_codes = get_changed_items_since(high_water_mark, dirty_bins)
+
+            run_log.count(dirty_bins=len(dirty_bins), changed_items=len(item_codes))
+
+            if not item_codes:
+                if not dry_run:
+                    mark_reorder_run_complete(run_started_at, dirty_bins)
+                return
 
     # Dictionary to store material requests grouped by (company, warehouse, mr_type)
     material_requests = {}
 
-    warehouse_company = frappe._dict(
-        frappe.db.sql(
-            """select name, company from `tabWarehouse`
-            where disabled=0"""
-        )
-    )
+    warehouse_company = get_warehouse_company_map()
 
     default_company = (
         erpnext.get_default_company()
@@ -54,40 +191,176 @@ def _execute_optimized_reorder():
     )
 
     # Get items that need reordering
-    items_to_consider = get_items_for_reorder_optimized()
+    with run_log.phase("item_load"):
+        items_to_consider = get_items_for_reorder_optimized(item_codes)
+
+    run_log.count(
+        items_considered=len(items_to_consider),
+        reorder_rows=sum(len(rows) for rows in items_to_consider.values()),
+    )
 
     if not items_to_consider:
+        if not dry_run:
+            mark_reorder_run_complete(run_started_at, dirty_bins)
         return
 
-    # Get projected quantities with optimized query
-    item_warehouse_projected_qty = get_item_warehouse_projected_qty_optimized(
-        items_to_consider
+    # Get projected quantities: leaf bins, then the group-warehouse rollup
+    item_codes = list(items_to_consider)
+    with run_log.phase("bin_load"):
+        item_warehouse_projected_qty = get_bin_projected_qty(item_codes)
+
+    run_log.count(
+        bins_loaded=sum(len(bins) for bins in item_warehouse_projected_qty.values())
     )
 
-    # Process each item and add to material request groups
-    for item_code, reorder_levels in items_to_consider.items():
-        for d in reorder_levels:
-            if d.has_variants:
-                continue
-
-            process_item_for_reorder(
-                item_code=item_code,
-                item_data=d,
-                item_warehouse_projected_qty=item_warehouse_projected_qty,
-                warehouse_company=warehouse_company,
-                default_company=default_company,
-                material_requests=material_requests,
+    with run_log.phase("rollup"):
+        warehouse_groups = get_reorder_warehouse_groups(items_to_consider)
+        rollup_group_projected_qty(
+            item_codes, warehouse_groups, item_warehouse_projected_qty
+        )
+
+    # Reorder MRs not yet reflected in projected qty count as incoming supply,
+    # otherwise every run orders the same shortage again
+    with run_log.phase("netting"):
+        pending_reorder_bins = net_pending_reorder_requests(
+            item_codes, warehouse_groups, item_warehouse_projected_qty
+        )
+
+    run_log.count(pending_reorder_bins=pending_reorder_bins)
+
+    with run_log.phase("planning"):
+        if planner == PLANNER_VECTORIZED:
+            from jain_machine_tools.stock.reorder_planner import plan_material_requests
+
+            material_requests = plan_material_requests(
+                items_to_consider,
+                item_warehouse_projected_qty,
+                warehouse_company,
+                default_company,
             )
+        else:
+            # Process each item and add to material request groups
+            for item_code, reorder_levels in items_to_consider.items():
+                for d in reorder_levels:
+                    if d.has_variants:
+                        continue
+
+                    process_item_for_reorder(
+                        item_code=item_code,
+                        item_data=d,
+                        item_warehouse_projected_qty=item_warehouse_projected_qty,
+                        warehouse_company=warehouse_company,
+                        default_company=default_company,
+                        material_requests=material_requests,
+                    )
+
+    run_log.count(
+        groups_planned=len(material_requests),
+        mr_lines=sum(len(lines) for lines in material_requests.values()),
+    )
 
+    mr_list = []
+    failed_bins = set()
     if material_requests:
-        return create_cumulative_material_requests(material_requests)
+        with run_log.phase("mr_insert"):
+            if dry_run:
+                mr_list = build_cumulative_material_requests(material_requests)
+            else:
+                mr_list, exceptions_list, failed_bins = create_cumulative_material_requests(
+                    material_requests, shard_by=shard_by, run_id=run_log.run_id
+                )
+
+                # Sharded runs count their errors in finalize_reorder_run
+                if not shard_by:
+                    run_log.count(errors_count=len(exceptions_list))
+
+        if dry_run or not shard_by:
+            run_log.count(material_requests_created=len(mr_list))
+
+    if not dry_run:
+        # Bins of MRs that failed to insert were marked dirty again, keep them for the next run
+        mark_reorder_run_complete(run_started_at, dirty_bins - failed_bins)
+
+    return mr_list
+
+
+def mark_bin_dirty(doc, method=None):
+    """
+    Hook Handler for Stock Ledger Entry on_submit
+    Records the (item, warehouse) bin so the next incremental run re-evaluates it
+    """
+    mark_bins_dirty([(doc.item_code, doc.warehouse)])
+
+
+def mark_bins_dirty(bins):
+    """Add (item_code, warehouse) pairs to the dirty set"""
+    members = [
+        json.dumps([item_code, warehouse])
+        for item_code, warehouse in bins
+        if item_code and warehouse
+    ]
+
+    if members:
+        frappe.cache.sadd(REORDER_DIRTY_BINS_KEY, *members)
 
 
-def get_items_for_reorder_optimized() -> dict:
+def get_dirty_bins():
+    """Return the (item_code, warehouse) pairs touched since the last run"""
+    return {
+        tuple(json.loads(frappe.safe_decode(member)))
+        for member in frappe.cache.smembers(REORDER_DIRTY_BINS_KEY) or []
+    }
+
+
+def get_changed_items_since(high_water_mark, dirty_bins):
+    """
+    Items to re-evaluate in an incremental run
+    - Items with a bin in the dirty set
+    - Items whose bin was modified after the high-water mark (covers
+      ordered / reserved / indented qty updates that do not post SLEs)
+    - Items edited after the high-water mark (reorder levels live on Item)
+    """
+    item_codes = {item_code for item_code, warehouse in dirty_bins}
+
+    item_codes.update(
+        frappe.db.sql_list(
+            """select distinct item_code from `tabBin`
+            where modified > %s""",
+            high_water_mark,
+        )
+    )
+
+    item_codes.update(
+        frappe.db.sql_list(
+            """select name from `tabItem`
+            where modified > %s""",
+            high_water_mark,
+        )
+    )
+
+    return item_codes
+
+
+def mark_reorder_run_complete(run_started_at, dirty_bins):
+    """
+    Advance the high-water mark and drop the dirty bins this run consumed.
+    Bins marked dirty while the run was in progress stay in the set.
+    """
+    frappe.db.set_default(REORDER_HIGH_WATER_MARK_KEY, str(run_started_at))
+
+    if dirty_bins:
+        frappe.cache.srem(
+            REORDER_DIRTY_BINS_KEY,
+            *[json.dumps(list(dirty_bin)) for dirty_bin in dirty_bins],
+        )
+
+
+def get_items_for_reorder_optimized(item_codes=None) -> dict:
     """
     Get items for reorder with optimized query
     - Single query instead of multiple
     - Only fetch required fields
+    - Restricted to item_codes (and their templates) when given
     """
     reorder_table = frappe.qb.DocType("Item Reorder")
     item_table = frappe.qb.DocType("Item")
@@ -124,19 +397,43 @@ def get_items_for_reorder_optimized() -> dict:
         )
     )
 
+    if item_codes is not None:
+        # Variants inherit reorder levels from their template, so the
+        # template rows are needed even when only the variant changed
+        query = query.where(
+            item_table.name.isin(
+                list(set(item_codes) | get_variant_templates(item_codes))
+            )
+        )
+
     data = query.run(as_dict=True)
     itemwise_reorder = frappe._dict({})
     for d in data:
         itemwise_reorder.setdefault(d.name, []).append(d)
 
     # Handle variants
-    itemwise_reorder = get_reorder_levels_for_variants(itemwise_reorder)
+    itemwise_reorder = get_reorder_levels_for_variants(itemwise_reorder, item_codes)
 
     return itemwise_reorder
 
 
-def get_reorder_levels_for_variants(itemwise_reorder):
-    """Get reorder levels for variant items"""
+def get_variant_templates(item_codes):
+    """Templates of the given variant items"""
+    return set(
+        frappe.get_all(
+            "Item",
+            filters={"name": ("in", list(item_codes)), "variant_of": ("is", "set")},
+            pluck="variant_of",
+        )
+    )
+
+
+def get_reorder_levels_for_variants(itemwise_reorder, item_codes=None):
+    """
+    Get reorder levels for variant items
+    When item_codes is given, only variants that changed themselves or whose
+    template changed are considered
+    """
     item_table = frappe.qb.DocType("Item")
 
     query = (
@@ -157,6 +454,12 @@ def get_reorder_levels_for_variants(itemwise_reorder):
         )
     )
 
+    if item_codes is not None:
+        item_codes = list(item_codes)
+        query = query.where(
+            item_table.name.isin(item_codes) | item_table.variant_of.isin(item_codes)
+        )
+
     variants_item = query.run(as_dict=True)
     for row in variants_item:
         if not itemwise_reorder.get(row.name) and itemwise_reorder.get(row.variant_of):
@@ -167,10 +470,139 @@ def get_reorder_levels_for_variants(itemwise_reorder):
     return itemwise_reorder
 
 
-def get_item_warehouse_projected_qty_optimized(items_to_consider):
+def get_item_warehouse_projected_qty_optimized(
+    items_to_consider, rollup_mode=ROLLUP_MODE_SQL
+):
+    """
+    Projected qty per item per warehouse, including group warehouses
+    - ROLLUP_MODE_SQL: leaf bins in one query, then one grouped lft/rgt range
+      query per warehouse group referenced by the reorder rows
+    - ROLLUP_MODE_PYTHON: every ancestor of every bin via the hierarchy cache
+
+    Both return {item_code: {warehouse: projected_qty}} for every warehouse
+    process_item_for_reorder looks up.
+    """
+    if rollup_mode == ROLLUP_MODE_PYTHON:
+        return get_item_warehouse_projected_qty_python(items_to_consider)
+
+    item_codes = list(items_to_consider.keys())
+    if not item_codes:
+        return {}
+
+    item_warehouse_projected_qty = get_bin_projected_qty(item_codes)
+    rollup_group_projected_qty(
+        item_codes,
+        get_reorder_warehouse_groups(items_to_consider),
+        item_warehouse_projected_qty,
+    )
+
+    return item_warehouse_projected_qty
+
+
+def get_bin_projected_qty(item_codes):
+    """Projected qty of every bin of the given items, keyed by item and warehouse"""
+    item_warehouse_projected_qty = {}
+
+    for item_code, warehouse, projected_qty in frappe.db.sql(
+        """select item_code, warehouse, projected_qty
+        from tabBin where item_code in ({})
+            and (warehouse != '' and warehouse is not null)""".format(
+            ", ".join(["%s"] * len(item_codes))
+        ),
+        item_codes,
+    ):
+        item_warehouse_projected_qty.setdefault(item_code, {})[warehouse] = flt(
+            projected_qty
+        )
+
+    return item_warehouse_projected_qty
+
+
+def get_reorder_warehouse_groups(items_to_consider):
+    """
+    Group warehouses the reorder rows read projected qty from, with their
+    nested-set bounds
+    """
+    warehouses = set()
+    for reorder_levels in items_to_consider.values():
+        for d in reorder_levels:
+            warehouses.add(d.warehouse_group or d.warehouse)
+
+    warehouse_tree = get_warehouse_tree()
+    return [
+        warehouse_tree[warehouse]
+        for warehouse in warehouses
+        if warehouse in warehouse_tree and warehouse_tree[warehouse].is_group
+    ]
+
+
+def rollup_group_projected_qty(item_codes, warehouse_groups, item_warehouse_projected_qty):
+    """
+    Add the summed projected qty of all enabled descendant bins for each
+    warehouse group, one grouped range query per group
+    """
+    for group in warehouse_groups:
+        for item_code, projected_qty in frappe.db.sql(
+            """select bin.item_code, sum(bin.projected_qty)
+            from `tabBin` bin
+            inner join `tabWarehouse` wh on wh.name = bin.warehouse
+            where wh.lft >= %s and wh.rgt <= %s
+                and wh.disabled = 0
+                and bin.item_code in ({})
+            group by bin.item_code""".format(", ".join(["%s"] * len(item_codes))),
+            [group.lft, group.rgt, *item_codes],
+        ):
+            item_warehouse_projected_qty.setdefault(item_code, {})[group.name] = flt(
+                projected_qty
+            )
+
+
+def net_pending_reorder_requests(item_codes, warehouse_groups, item_warehouse_projected_qty):
+    """
+    Add the qty of pending reorder MRs to projected qty
+    - Draft MRs marked custom_custom_material_request_type = "Reorder"
+      (submitted MRs are already counted in the bin's indented qty)
+    - One grouped query per (item, warehouse) for the whole run
+    - Credited to the warehouse and to every referenced group containing it
+
+    Returns the number of (item, warehouse) pairs with pending qty
+    """
+    if not item_codes:
+        return 0
+
+    pending = frappe.db.sql(
+        """select mri.item_code, mri.warehouse, wh.lft, wh.rgt, sum(mri.stock_qty)
+        from `tabMaterial Request Item` mri
+        inner join `tabMaterial Request` mr on mr.name = mri.parent
+        inner join `tabWarehouse` wh on wh.name = mri.warehouse
+        where mr.docstatus = 0
+            and mr.custom_custom_material_request_type = 'Reorder'
+            and wh.disabled = 0
+            and mri.item_code in ({})
+        group by mri.item_code, mri.warehouse, wh.lft, wh.rgt""".format(
+            ", ".join(["%s"] * len(item_codes))
+        ),
+        item_codes,
+    )
+
+    for item_code, warehouse, lft, rgt, pending_qty in pending:
+        pending_qty = flt(pending_qty)
+        item_projected_qty = item_warehouse_projected_qty.setdefault(item_code, {})
+        item_projected_qty[warehouse] = flt(item_projected_qty.get(warehouse)) + pending_qty
+
+        for group in warehouse_groups:
+            if group.lft < lft and rgt < group.rgt:
+                item_projected_qty[group.name] = (
+                    flt(item_projected_qty.get(group.name)) + pending_qty
+                )
+
+    return len(pending)
+
+
+def get_item_warehouse_projected_qty_python(items_to_consider):
     """
     Optimized version with warehouse hierarchy caching
-    - Builds warehouse hierarchy cache once
+    - Parent chains from the shared warehouse hierarchy cache
     - Reduces N+1 queries to single query
     """
     item_warehouse_projected_qty = {}
@@ -179,10 +611,6 @@ def get_item_warehouse_projected_qty_optimized(items_to_consider):
     if not items_to_consider:
         return item_warehouse_projected_qty
 
-    # Build warehouse hierarchy cache if not already built
-    if not _warehouse_cache:
-        build_warehouse_hierarchy_cache()
-
     # Single query to get all bin data
     for item_code, warehouse, projected_qty in frappe.db.sql(
         """select item_code, warehouse, projected_qty
@@ -213,51 +641,9 @@ def get_item_warehouse_projected_qty_optimized(items_to_consider):
     return item_warehouse_projected_qty
 
 
-def build_warehouse_hierarchy_cache():
-    """
-    Build warehouse hierarchy cache
-    - Single query to get all warehouse parent relationships
-    - Cached for the entire reorder run
-    """
-    global _warehouse_cache
-
-    # Get all warehouse parent relationships in one query
-    warehouse_data = frappe.db.sql(
-        """
-        SELECT name, parent_warehouse
-        FROM `tabWarehouse`
-        WHERE disabled = 0
-        """,
-        as_dict=True,
-    )
-
-    # Build cache
-    for row in warehouse_data:
-        _warehouse_cache[row.name] = {
-            "parent": row.parent_warehouse,
-            "hierarchy": [],
-        }
-
-    # Build hierarchy for each warehouse
-    for warehouse in _warehouse_cache.keys():
-        parents = []
-        current = warehouse
-        visited = set()  # Prevent infinite loops
-
-        while _warehouse_cache.get(current, {}).get("parent"):
-            parent = _warehouse_cache[current]["parent"]
-            if parent in visited:
-                break  # Circular reference protection
-            visited.add(parent)
-            parents.append(parent)
-            current = parent
-
-        _warehouse_cache[warehouse]["hierarchy"] = parents
-
-
 def get_parent_warehouses_cached(warehouse):
-    """Get parent warehouses from cache"""
-    return _warehouse_cache.get(warehouse, {}).get("hierarchy", [])
+    """Get parent warehouses from the shared warehouse hierarchy cache"""
+    return get_ancestors(warehouse)
 
 
 def process_item_for_reorder(
@@ -328,14 +714,44 @@ def process_item_for_reorder(
         )
 
 
-def create_cumulative_material_requests(material_requests):
+def create_cumulative_material_requests(material_requests, shard_by=None, run_id=None):
     """
     Create cumulative material requests
     - One MR per (company, warehouse, type) combination
     - Multiple items in single MR
+    - shard_by="company" / "warehouse" fans creation out to background jobs
+      on the long queue instead (see enqueue_reorder_shards)
+
+    Returns (mr_list, exceptions_list, failed_bins); when sharded, (run_id, [], set())
+    as the shards report their own results.
+    """
+    if shard_by:
+        return enqueue_reorder_shards(material_requests, shard_by, run_id=run_id), [], set()
+
+    mr_list, exceptions_list, failed_bins = _create_material_requests(material_requests)
+
+    # Send email notifications
+    company_wise_mr = frappe._dict({})
+    for mr in mr_list:
+        company_wise_mr.setdefault(mr.company, []).append(mr.name)
+
+    notify_reorder_results(company_wise_mr, exceptions_list)
+
+    return mr_list, exceptions_list, failed_bins
+
+
+def _create_material_requests(material_requests, run_id=None):
+    """
+    Insert and submit one MR per group, returns (mr_list, exceptions_list, failed_bins)
+    where failed_bins are the (item_code, warehouse) pairs of the groups that failed
+
+    With a run_id every MR is stamped with a run key and committed on its
+    own, so re-running the same groups for the same run skips the MRs that
+    already exist instead of creating duplicates.
     """
     mr_list = []
     exceptions_list = []
+    failed_bins = set()
 
     def _log_exception(mr):
         if frappe.local.message_log:
@@ -344,80 +760,34 @@ def create_cumulative_material_requests(material_requests):
         else:
             exceptions_list.append(frappe.get_traceback(with_context=True))
 
-        mr.log_error("Unable to create material request")
-
-    company_wise_mr = frappe._dict({})
+        if mr:
+            mr.log_error("Unable to create material request")
+        else:
+            frappe.log_error("Unable to create material request")
 
-    for group_key, items in material_requests.items():
-        company, warehouse, request_type = group_key
+    # Every UOM lookup for the run, before the first insert
+    uom_snapshot = prefetch_uom_snapshot(material_requests)
 
-        try:
-            if not items:
-                continue
-
-            mr = frappe.new_doc("Material Request")
-            mr.update(
-                {
-                    "company": company,
-                    "transaction_date": nowdate(),
-                    "material_request_type": "Material Transfer"
-                    if request_type == "Transfer"
-                    else request_type,
-                }
-            )
+    existing_requests = {}
+    if run_id:
+        existing_requests = get_existing_reorder_requests(
+            get_reorder_run_key(run_id, group_key) for group_key in material_requests
+        )
 
-            schedule_dates = []
-
-            for d in items:
-                d = frappe._dict(d)
-                item = d.get("item_details")
-                uom = item.stock_uom
-                conversion_factor = 1.0
-
-                if request_type == "Purchase":
-                    uom = item.purchase_uom or item.stock_uom
-                    if uom != item.stock_uom:
-                        conversion_factor = (
-                            frappe.db.get_value(
-                                "UOM Conversion Detail",
-                                {"parent": item.name, "uom": uom},
-                                "conversion_factor",
-                            )
-                            or 1.0
-                        )
-
-                must_be_whole_number = frappe.db.get_value(
-                    "UOM", uom, "must_be_whole_number", cache=True
-                )
-                qty = d.reorder_qty / conversion_factor
-                if must_be_whole_number:
-                    from math import ceil
-                    qty = ceil(qty)
+    for group_key, items in material_requests.items():
+        if not items:
+            continue
 
-                # Calculate schedule date
-                schedule_date = add_days(nowdate(), cint(item.lead_time_days))
-                schedule_dates.append(schedule_date)
+        run_key = get_reorder_run_key(run_id, group_key) if run_id else None
+        if run_key in existing_requests:
+            mr_list.append(frappe.get_doc("Material Request", existing_requests[run_key]))
+            continue
 
-                mr.append(
-                    "items",
-                    {
-                        "doctype": "Material Request Item",
-                        "item_code": d.item_code,
-                        "schedule_date": schedule_date,
-                        "qty": qty,
-                        "conversion_factor": conversion_factor,
-                        "uom": uom,
-                        "stock_uom": item.stock_uom,
-                        "warehouse": d.warehouse,
-                        "item_name": item.item_name,
-                        "description": item.description,
-                        "item_group": item.item_group,
-                        "brand": item.brand,
-                    },
-                )
+        mr = None
+        frappe.db.savepoint("jmt_reorder_mr")
 
-            mr.schedule_date = max(schedule_dates or [nowdate()])
-            mr.flags.ignore_mandatory = True
+        try:
+            mr = make_cumulative_material_request(group_key, items, uom_snapshot, run_key)
 
             # Set custom field if in auto reorder process
             frappe.flags.in_auto_reorder_process = True
@@ -425,94 +795,331 @@ def create_cumulative_material_requests(material_requests):
             mr.submit()
             frappe.flags.in_auto_reorder_process = False
 
-            mr_list.append(mr)
+            if run_id:
+                frappe.db.commit()
 
-            company_wise_mr.setdefault(company, []).append(mr)
+            mr_list.append(mr)
 
         except Exception:
             frappe.flags.in_auto_reorder_process = False
+            frappe.db.rollback(save_point="jmt_reorder_mr")
             _log_exception(mr)
 
-    # Send email notifications
-    if company_wise_mr:
-        if getattr(frappe.local, "reorder_email_notify", None) is None:
-            frappe.local.reorder_email_notify = cint(
-                frappe.db.get_value("Stock Settings", None, "reorder_email_notify")
-            )
+            # Retry these bins on the next incremental run
+            bins = {(d["item_code"], d["warehouse"]) for d in items}
+            failed_bins.update(bins)
+            mark_bins_dirty(bins)
+
+    return mr_list, exceptions_list, failed_bins
+
+
+def build_cumulative_material_requests(material_requests):
+    """Dry run: the unsaved MR per group that create_cumulative_material_requests would insert"""
+    uom_snapshot = prefetch_uom_snapshot(material_requests)
+    return [
+        make_cumulative_material_request(group_key, items, uom_snapshot)
+        for group_key, items in material_requests.items()
+        if items
+    ]
+
+
+def make_cumulative_material_request(group_key, items, uom_snapshot, run_key=None):
+    """Build (unsaved) the Material Request for one (company, warehouse, type) group"""
+    company, warehouse, request_type = group_key
+
+    mr = frappe.new_doc("Material Request")
+    mr.update(
+        {
+            "company": company,
+            "transaction_date": nowdate(),
+            "material_request_type": "Material Transfer"
+            if request_type == "Transfer"
+            else request_type,
+            "custom_reorder_run_key": run_key,
+        }
+    )
 
-        if frappe.local.reorder_email_notify:
-            send_email_notification(company_wise_mr)
+    schedule_dates = []
 
-    if exceptions_list:
-        notify_errors(exceptions_list)
+    for d in items:
+        row = build_material_request_item(d, request_type, uom_snapshot)
+        schedule_dates.append(row["schedule_date"])
+        mr.append("items", row)
 
-    return mr_list
+    mr.schedule_date = max(schedule_dates or [nowdate()])
+    mr.flags.ignore_mandatory = True
 
+    return mr
 
-def send_email_notification(company_wise_mr):
-    """Notify user about auto creation of Material Requests"""
-    for company, mr_list in company_wise_mr.items():
-        email_list = get_email_list(company)
 
-        if not email_list:
-            continue
+def notify_reorder_results(company_wise_mr, exceptions_list):
+    """
+    Queue the reorder notification and the error digest for a whole run
+    - company_wise_mr: {company: [Material Request name, ...]}
+    - Sent by a background job after commit, see stock/reorder_digest.py
+    """
+    from jain_machine_tools.stock.reorder_digest import enqueue_reorder_digest
+
+    enqueue_reorder_digest(company_wise_mr, exceptions_list)
+
+
+def get_reorder_run_key(run_id, group_key):
+    """Stable key for the MR a run creates for one (company, warehouse, type) group"""
+    digest = hashlib.sha1(json.dumps(list(group_key)).encode()).hexdigest()
+    return f"{run_id}-{digest}"
+
 
-        msg = frappe.render_template(
-            "templates/emails/reorder_item.html", {"mr_list": mr_list}
+def get_existing_reorder_requests(run_keys):
+    """Map run key -> submitted MR for the MRs a run already created"""
+    run_keys = list(run_keys)
+    if not run_keys:
+        return {}
+
+    return dict(
+        frappe.get_all(
+            "Material Request",
+            filters={"custom_reorder_run_key": ("in", run_keys), "docstatus": 1},
+            fields=["custom_reorder_run_key", "name"],
+            as_list=True,
         )
+    )
+
+
+def get_reorder_shard(group_key, shard_by):
+    """Shard name a (company, warehouse, type) group belongs to"""
+    company, warehouse, request_type = group_key
+
+    if shard_by == SHARD_BY_COMPANY:
+        return company
+    if shard_by == SHARD_BY_WAREHOUSE:
+        return f"{company}::{warehouse}"
+
+    frappe.throw(_("Unknown reorder shard mode: {0}").format(shard_by))
+
 
-        frappe.sendmail(
-            recipients=email_list,
-            subject=_("Auto Material Requests Generated"),
-            message=msg,
+def _reorder_run_cache_key(run_id, suffix):
+    return f"jmt_reorder_run::{run_id}::{suffix}"
+
+
+def enqueue_reorder_shards(material_requests, shard_by, run_id=None):
+    """
+    Fan MR creation out to one long-queue job per shard
+    - A run ID ties the shards together and keys their MRs
+    - A Redis counter tracks pending shards; the last shard to finish
+      enqueues finalize_reorder_run, which sends the single notification
+
+    Returns the run ID
+    """
+    shards = {}
+    for group_key, items in material_requests.items():
+        if items:
+            shards.setdefault(get_reorder_shard(group_key, shard_by), {})[group_key] = items
+
+    if not shards:
+        return
+
+    run_id = run_id or frappe.generate_hash(length=12)
+
+    # Raw counter (not pickled) so shards can DECR it atomically
+    frappe.cache.set(
+        frappe.cache.make_key(_reorder_run_cache_key(run_id, "pending")),
+        len(shards),
+        ex=REORDER_RUN_TTL,
+    )
+
+    for shard, shard_requests in shards.items():
+        frappe.enqueue(
+            "jain_machine_tools.stock.optimized_reorder.create_reorder_shard",
+            queue="long",
+            timeout=REORDER_RUN_TTL,
+            job_id=f"jmt_reorder::{run_id}::{shard}",
+            deduplicate=True,
+            enqueue_after_commit=True,
+            run_id=run_id,
+            shard=shard,
+            material_requests=shard_requests,
         )
 
+    return run_id
 
-def get_email_list(company):
-    """Get email list for notifications"""
-    users = get_company_wise_users(company)
-    user_table = frappe.qb.DocType("User")
-    role_table = frappe.qb.DocType("Has Role")
 
-    query = (
-        frappe.qb.from_(user_table)
-        .inner_join(role_table)
-        .on(user_table.name == role_table.parent)
-        .select(user_table.email)
-        .where(
-            (role_table.role.isin(["Purchase Manager", "Stock Manager"]))
-            & (user_table.name.notin(["Administrator", "All", "Guest"]))
-            & (user_table.enabled == 1)
-            & (user_table.docstatus < 2)
+def create_reorder_shard(run_id, shard, material_requests):
+    """
+    Background job: create the MRs for one shard of a reorder run
+    Safe to re-run, MRs already created for this run are reused
+    """
+    mr_names = []
+    exceptions_list = []
+
+    try:
+        mr_list, exceptions_list, _failed_bins = _create_material_requests(
+            material_requests, run_id=run_id
+        )
+        mr_names = [(mr.company, mr.name) for mr in mr_list]
+    except Exception:
+        exceptions_list.append(frappe.get_traceback(with_context=True))
+        frappe.log_error(f"Auto reorder shard failed: {shard}")
+    finally:
+        frappe.cache.hset(
+            _reorder_run_cache_key(run_id, "results"),
+            shard,
+            {"material_requests": mr_names, "exceptions": exceptions_list},
         )
+
+        remaining = frappe.cache.decr(
+            frappe.cache.make_key(_reorder_run_cache_key(run_id, "pending"))
+        )
+
+        if remaining <= 0:
+            frappe.enqueue(
+                "jain_machine_tools.stock.optimized_reorder.finalize_reorder_run",
+                queue="long",
+                job_id=f"jmt_reorder::{run_id}::finalize",
+                deduplicate=True,
+                enqueue_after_commit=True,
+                run_id=run_id,
+            )
+
+
+def finalize_reorder_run(run_id):
+    """Background job: queue one notification digest for all shards of a reorder run"""
+    done_key = _reorder_run_cache_key(run_id, "finalized")
+    if frappe.cache.get_value(done_key):
+        return
+
+    results_key = _reorder_run_cache_key(run_id, "results")
+    results = frappe.cache.hgetall(results_key) or {}
+
+    company_wise_mr = frappe._dict({})
+    exceptions_list = []
+    for result in results.values():
+        exceptions_list.extend(result.get("exceptions") or [])
+        for company, name in result.get("material_requests") or []:
+            company_wise_mr.setdefault(company, []).append(name)
+
+    frappe.cache.set_value(done_key, 1, expires_in_sec=REORDER_RUN_TTL)
+    notify_reorder_results(company_wise_mr, exceptions_list)
+
+    update_run_log(
+        run_id,
+        status=STATUS_COMPLETED,
+        finished_at=now_datetime(),
+        material_requests_created=sum(len(mrs) for mrs in company_wise_mr.values()),
+        errors_count=len(exceptions_list),
     )
 
-    if users:
-        query = query.where(user_table.name.isin(users))
+    # The run lock was handed over to the shards by optimized_reorder_item
+    lock_key = _reorder_run_cache_key(run_id, "lock")
+    release_reorder_lock(frappe.cache.get_value(lock_key))
 
-    emails = query.run(as_dict=True)
+    frappe.cache.delete_value(
+        [results_key, _reorder_run_cache_key(run_id, "pending"), lock_key]
+    )
 
-    return list(set([email.email for email in emails]))
 
+def prefetch_uom_snapshot(material_requests):
+    """
+    Load the UOM conversion factors and whole-number flags needed by every
+    line of the run in two set-based queries (lines already converted by
+    the vectorized planner need none)
+    """
+    return get_uom_snapshot(
+        (d["item_code"], get_order_uom(d["item_details"], request_type), d["item_details"].stock_uom)
+        for (company, warehouse, request_type), items in material_requests.items()
+        for d in items
+        if not d.get("uom")
+    )
 
-def get_company_wise_users(company):
-    """Get users with access to company"""
-    companies = [company]
 
-    if parent_company := frappe.db.get_value("Company", company, "parent_company"):
-        companies.append(parent_company)
+def get_uom_snapshot(item_uoms):
+    """
+    Load UOM conversion factors and whole-number flags for a whole run
+    - item_uoms: iterable of (item_code, uom, stock_uom)
+    - One query for conversion factors, one for UOM flags
 
-    users = frappe.get_all(
-        "User Permission",
-        filters={
-            "allow": "Company",
-            "for_value": ("in", companies),
-            "apply_to_all_doctypes": 1,
-        },
-        fields=["user"],
+    Returns frappe._dict(conversion_factors={(item_code, uom): factor},
+    whole_number_uoms={uom, ...})
+    """
+    item_codes = set()
+    uoms = set()
+    for item_code, uom, stock_uom in item_uoms:
+        if uom:
+            uoms.add(uom)
+            if uom != stock_uom:
+                item_codes.add(item_code)
+
+    conversion_factors = {}
+    if item_codes:
+        for item_code, uom, conversion_factor in frappe.db.sql(
+            """select parent, uom, conversion_factor
+            from `tabUOM Conversion Detail`
+            where parent in ({}) and uom in ({})""".format(
+                ", ".join(["%s"] * len(item_codes)), ", ".join(["%s"] * len(uoms))
+            ),
+            [*item_codes, *uoms],
+        ):
+            conversion_factors[(item_code, uom)] = flt(conversion_factor)
+
+    whole_number_uoms = set()
+    if uoms:
+        whole_number_uoms = set(
+            frappe.get_all(
+                "UOM",
+                filters={"name": ("in", list(uoms)), "must_be_whole_number": 1},
+                pluck="name",
+            )
+        )
+
+    return frappe._dict(
+        conversion_factors=conversion_factors,
+        whole_number_uoms=whole_number_uoms,
     )
 
-    return [user.user for user in users]
+
+def get_order_uom(item_details, request_type):
+    """UOM a reorder line is requested in"""
+    if request_type == "Purchase":
+        return item_details.get("purchase_uom") or item_details.get("stock_uom")
+    return item_details.get("stock_uom")
+
+
+def build_material_request_item(d, request_type, uom_snapshot):
+    """
+    Build one Material Request Item row from a reorder line
+    Reads UOM data from the prefetched snapshot only; no queries
+    """
+    d = frappe._dict(d)
+    item = d.get("item_details")
+
+    if d.get("uom"):
+        # Already converted by the vectorized planner
+        uom = d.uom
+        conversion_factor = d.conversion_factor
+        qty = d.qty
+    else:
+        uom = get_order_uom(item, request_type)
+        conversion_factor = 1.0
+        if uom != item.stock_uom:
+            conversion_factor = uom_snapshot.conversion_factors.get((d.item_code, uom)) or 1.0
+
+        qty = d.reorder_qty / conversion_factor
+        if uom in uom_snapshot.whole_number_uoms:
+            qty = ceil(qty)
+
+    return {
+        "doctype": "Material Request Item",
+        "item_code": d.item_code,
+        "schedule_date": add_days(nowdate(), cint(item.lead_time_days)),
+        "qty": qty,
+        "conversion_factor": conversion_factor,
+        "uom": uom,
+        "stock_uom": item.stock_uom,
+        "warehouse": d.warehouse,
+        "item_name": item.item_name,
+        "description": item.description,
+        "item_group": item.item_group,
+        "brand": item.brand,
+    }
 
 
 def notify_errors(exceptions_list):
@@ -0,0 +1,115 @@
+"""
+Digest notifications for JMT auto reorder
+- Runs as a background job after the reorder transaction commits
+- One roles / company-permissions query for every recipient of the run
+- One email per recipient covering all companies they can see
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+
+from jain_machine_tools.stock.optimized_reorder import notify_errors
+
+REORDER_NOTIFY_ROLES = ("Purchase Manager", "Stock Manager")
+
+
+def enqueue_reorder_digest(company_wise_mr, exceptions_list=None):
+	"""
+	Queue the post-run notifications
+	- company_wise_mr: {company: [Material Request name, ...]}
+	"""
+	if not company_wise_mr and not exceptions_list:
+		return
+
+	frappe.enqueue(
+		"jain_machine_tools.stock.reorder_digest.send_reorder_digest",
+		enqueue_after_commit=True,
+		company_wise_mr=company_wise_mr,
+		exceptions_list=exceptions_list or [],
+	)
+
+
+def send_reorder_digest(company_wise_mr, exceptions_list=None):
+	"""Background job: one Auto Material Requests email per recipient, then the error digest"""
+	if company_wise_mr and cint(frappe.db.get_single_value("Stock Settings", "reorder_email_notify")):
+		docs = {}
+		for email, companies in get_reorder_recipients(list(company_wise_mr)).items():
+			mr_list = []
+			for company in sorted(companies):
+				for name in company_wise_mr[company]:
+					if name not in docs:
+						docs[name] = frappe.get_doc("Material Request", name)
+					mr_list.append(docs[name])
+
+			frappe.sendmail(
+				recipients=[email],
+				subject=_("Auto Material Requests Generated"),
+				message=frappe.render_template("templates/emails/reorder_item.html", {"mr_list": mr_list}),
+			)
+
+	if exceptions_list:
+		notify_errors(exceptions_list)
+
+
+def get_reorder_recipients(companies):
+	"""
+	Map recipient email -> companies whose MRs they receive
+
+	Same rules as ERPNext's per-company lookup: users holding a reorder role
+	are notified for a company, unless someone has a Company user permission
+	(applying to all doctypes) on it or its parent, in which case only those
+	users are.
+	"""
+	companies = list(companies)
+	if not companies:
+		return {}
+
+	parent_company = dict(
+		frappe.get_all(
+			"Company",
+			filters={"name": ("in", companies)},
+			fields=["name", "parent_company"],
+			as_list=True,
+		)
+	)
+
+	role_holders = {}
+	permitted_users = {}
+	for source, user, email, company in frappe.db.sql(
+		"""
+        select 'role', u.name, u.email, null
+        from `tabUser` u
+        inner join `tabHas Role` hr on hr.parent = u.name
+        where hr.role in %(roles)s
+            and u.name not in ('Administrator', 'All', 'Guest')
+            and u.enabled = 1
+            and u.docstatus < 2
+        union all
+        select 'permission', up.user, null, up.for_value
+        from `tabUser Permission` up
+        where up.allow = 'Company'
+            and up.apply_to_all_doctypes = 1
+            and up.for_value in %(companies)s
+        """,
+		{
+			"roles": REORDER_NOTIFY_ROLES,
+			"companies": tuple({*companies, *filter(None, parent_company.values())}),
+		},
+	):
+		if source == "role":
+			if email:
+				role_holders[user] = email
+		else:
+			permitted_users.setdefault(company, set()).add(user)
+
+	recipients = {}
+	for company in companies:
+		users = set(permitted_users.get(company, ()))
+		users.update(permitted_users.get(parent_company.get(company), ()))
+
+		for user, email in role_holders.items():
+			if not users or user in users:
+				recipients.setdefault(email, set()).add(company)
+
+	return recipients
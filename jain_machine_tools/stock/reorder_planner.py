@@ -0,0 +1,182 @@
+"""
+Columnar reorder planner for JMT auto reorder
+- One Python pass over the reorder rows gathers reorder level, reorder qty,
+  projected qty and the warehouse / type / UOM columns into NumPy arrays
+- The reorder mask, deficiency / order qty, order UOM, UOM conversion and
+  whole-number rounding are array operations
+- Companies, conversion factors and (company, warehouse, type) groups are resolved
+  with np.unique(return_inverse=True): Python only touches each distinct warehouse,
+  (item, UOM) pair and group once, and np.bincount splits the rows into groups
+- Building the output line dicts is the one remaining per-hit Python loop
+- Emits the same material_requests structure as process_item_for_reorder
+"""
+
+import frappe
+import numpy as np
+
+from jain_machine_tools.stock.optimized_reorder import get_uom_snapshot
+
+
+def plan_material_requests(
+	items_to_consider,
+	item_warehouse_projected_qty,
+	warehouse_company,
+	default_company,
+	uom_snapshot=None,
+):
+	"""
+	Equivalent of running process_item_for_reorder over every reorder row, with
+	the qty arithmetic, UOM lookups and grouping done on arrays.
+
+	Lines carry the same keys as the row-by-row path plus the purchase
+	"uom", "conversion_factor" and converted "qty", so MR construction does
+	not have to resolve them again.
+	"""
+	# Rows are read with dict.get: attribute access on frappe._dict goes
+	# through __getattr__ and dominates the cost at this row count
+	rows = []
+	reorder_level = []
+	reorder_qty = []
+	projected_qty = []
+	warehouses = []
+	request_types = []
+	stock_uoms = []
+	purchase_uoms = []
+	for item_code, reorder_levels in items_to_consider.items():
+		item_projected_qty = item_warehouse_projected_qty.get(item_code) or {}
+		for d in reorder_levels:
+			# Templates are never ordered; disabled warehouses are skipped
+			if d.get("has_variants") or d.get("warehouse") not in warehouse_company:
+				continue
+
+			rows.append((item_code, d))
+			reorder_level.append(d.get("warehouse_reorder_level") or 0.0)
+			reorder_qty.append(d.get("warehouse_reorder_qty") or 0.0)
+			projected_qty.append(
+				item_projected_qty.get(d.get("warehouse_group") or d.get("warehouse")) or 0.0
+			)
+			# "" for missing values: np.unique cannot sort None next to strings
+			warehouses.append(d.get("warehouse"))
+			request_types.append(d.get("material_request_type") or "")
+			stock_uoms.append(d.get("stock_uom") or "")
+			purchase_uoms.append(d.get("purchase_uom") or "")
+
+	material_requests = {}
+	if not rows:
+		return material_requests
+
+	reorder_level = np.array(reorder_level, dtype=np.float64)
+	reorder_qty = np.array(reorder_qty, dtype=np.float64)
+	projected_qty = np.array(projected_qty, dtype=np.float64)
+
+	# Reorder when a level or qty is set and projected qty is at or below the level
+	needs_reorder = ((reorder_level != 0) | (reorder_qty != 0)) & (projected_qty <= reorder_level)
+	hits = np.flatnonzero(needs_reorder)
+	if not len(hits):
+		return material_requests
+
+	order_qty = np.maximum(reorder_qty[hits], reorder_level[hits] - projected_qty[hits])
+
+	item_codes = np.array([item_code for item_code, _d in rows], dtype=np.str_)[hits]
+	warehouses = np.array(warehouses, dtype=np.str_)[hits]
+	request_types = np.array(request_types, dtype=np.str_)[hits]
+	stock_uoms = np.array(stock_uoms, dtype=np.str_)[hits]
+	purchase_uoms = np.array(purchase_uoms, dtype=np.str_)[hits]
+
+	# get_order_uom on every row: purchase UOM for purchases when set, else stock UOM
+	order_uoms = np.where((request_types == "Purchase") & (purchase_uoms != ""), purchase_uoms, stock_uoms)
+
+	# Conversion factors per distinct (item, UOM) pair, spread back to the rows
+	item_uom_pairs, pair_index, pair_inverse = np.unique(
+		np.stack([item_codes, order_uoms], axis=1), axis=0, return_index=True, return_inverse=True
+	)
+	pair_inverse = pair_inverse.reshape(-1)
+	if uom_snapshot is None:
+		uom_snapshot = get_uom_snapshot(
+			(item_code, uom or None, stock_uom or None)
+			for (item_code, uom), stock_uom in zip(
+				item_uom_pairs.tolist(), stock_uoms[pair_index].tolist(), strict=True
+			)
+		)
+
+	conversion_factors = uom_snapshot.conversion_factors
+	pair_conversion_factor = np.array(
+		[conversion_factors.get((item_code, uom)) or 1.0 for item_code, uom in item_uom_pairs.tolist()],
+		dtype=np.float64,
+	)
+	conversion_factor = np.where(order_uoms == stock_uoms, 1.0, pair_conversion_factor[pair_inverse])
+	must_be_whole_number = np.isin(order_uoms, list(uom_snapshot.whole_number_uoms))
+
+	qty = order_qty / conversion_factor
+	qty = np.where(must_be_whole_number, np.ceil(qty), qty)
+
+	# Company per distinct warehouse
+	unique_warehouses, warehouse_inverse = np.unique(warehouses, return_inverse=True)
+	companies = np.array(
+		[warehouse_company.get(warehouse) or default_company for warehouse in unique_warehouses.tolist()],
+		dtype=np.str_,
+	)[warehouse_inverse.reshape(-1)]
+
+	# Group by (company, warehouse, type). np.unique sorts the groups; renumber them by
+	# first appearance, then a stable sort keeps group order and row order within each
+	# group the same as the row-by-row path
+	group_columns, first_row, group_inverse = np.unique(
+		np.stack([companies, warehouses, request_types], axis=1),
+		axis=0,
+		return_index=True,
+		return_inverse=True,
+	)
+	appearance = np.argsort(first_row, kind="stable")
+	group_rank = np.empty_like(appearance)
+	group_rank[appearance] = np.arange(len(appearance))
+	group_index = group_rank[group_inverse.reshape(-1)]
+
+	emit_order = np.argsort(group_index, kind="stable")
+	group_bounds = np.cumsum(np.bincount(group_index, minlength=len(appearance)))[:-1]
+
+	group_keys = [
+		(company, warehouse, request_type or None)
+		for company, warehouse, request_type in group_columns[appearance].tolist()
+	]
+	hits = hits.tolist()
+	order_uoms = order_uoms.tolist()
+	order_qty = order_qty.tolist()
+	conversion_factor = conversion_factor.tolist()
+	qty = qty.tolist()
+	must_be_whole_number = must_be_whole_number.tolist()
+
+	item_details_cache = {}
+	for group_key, group_rows in zip(group_keys, np.split(emit_order, group_bounds), strict=True):
+		lines = material_requests[group_key] = []
+		for i in group_rows.tolist():
+			item_code, d = rows[hits[i]]
+
+			item_details = item_details_cache.get(item_code)
+			if item_details is None:
+				item_details = item_details_cache[item_code] = frappe._dict(
+					{
+						"item_code": item_code,
+						"name": item_code,
+						"item_name": d.get("item_name"),
+						"item_group": d.get("item_group"),
+						"brand": d.get("brand"),
+						"description": d.get("description"),
+						"stock_uom": d.get("stock_uom"),
+						"purchase_uom": d.get("purchase_uom"),
+						"lead_time_days": d.get("lead_time_days"),
+					}
+				)
+
+			lines.append(
+				{
+					"item_code": item_code,
+					"warehouse": d.get("warehouse"),
+					"reorder_qty": order_qty[i],
+					"item_details": item_details,
+					"uom": order_uoms[i] or None,
+					"conversion_factor": conversion_factor[i],
+					"qty": int(qty[i]) if must_be_whole_number[i] else qty[i],
+				}
+			)
+
+	return material_requests
@@ -0,0 +1,82 @@
+"""
+Telemetry for JMT auto reorder runs
+- Wall time per phase (item load, bin load, rollup, netting, planning, MR insert)
+- Row counts and MRs created
+- Persisted as one Reorder Run Log per run
+"""
+
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import flt, now_datetime
+
+PHASES = ("item_load", "bin_load", "rollup", "netting", "planning", "mr_insert")
+
+STATUS_COMPLETED = "Completed"
+STATUS_QUEUED = "Queued"
+STATUS_FAILED = "Failed"
+STATUS_SKIPPED = "Skipped"
+
+
+class ReorderRunTracker:
+	"""Collects timings and counts while a reorder run executes"""
+
+	def __init__(self, mode, shard_by=None):
+		self.run_id = frappe.generate_hash(length=12)
+		self.current_phase = None
+		self.started_at = now_datetime()
+		self._started = time.perf_counter()
+		self.values = frappe._dict(
+			{
+				"run_id": self.run_id,
+				"mode": mode,
+				"shard_by": shard_by,
+				"started_at": self.started_at,
+			}
+		)
+		for phase in PHASES:
+			self.values[f"{phase}_seconds"] = 0.0
+
+	@contextmanager
+	def phase(self, name):
+		"""Add the wall time of the enclosed block to <name>_seconds"""
+		started = time.perf_counter()
+		outer_phase, self.current_phase = self.current_phase, name
+		try:
+			yield
+		finally:
+			self.values[f"{name}_seconds"] += time.perf_counter() - started
+			self.current_phase = outer_phase
+
+	def count(self, **counts):
+		self.values.update(counts)
+
+	def save(self, status, error=None):
+		"""Insert the Reorder Run Log; never lets a logging failure fail the run"""
+		self.values.update(
+			{
+				"status": status,
+				"finished_at": now_datetime(),
+				"total_seconds": time.perf_counter() - self._started,
+			}
+		)
+		if error:
+			self.values.error_log = error
+			self.values.errors_count = (self.values.errors_count or 0) + 1
+
+		for phase in PHASES:
+			self.values[f"{phase}_seconds"] = flt(self.values[f"{phase}_seconds"], 3)
+		self.values.total_seconds = flt(self.values.total_seconds, 3)
+
+		try:
+			frappe.get_doc({"doctype": "Reorder Run Log", **self.values}).insert(ignore_permissions=True)
+		except Exception:
+			frappe.log_error("Unable to save Reorder Run Log")
+
+
+def update_run_log(run_id, **values):
+	"""Update the log of a run after the fact (sharded runs finish in background jobs)"""
+	name = frappe.db.get_value("Reorder Run Log", {"run_id": run_id})
+	if name:
+		frappe.db.set_value("Reorder Run Log", name, values)
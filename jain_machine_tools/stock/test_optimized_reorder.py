@@ -0,0 +1,111 @@
+# Copyright (c) 2026, Praxon Technovation and Contributors
+# See license.txt
+
+import json
+from unittest.mock import patch
+
+import frappe
+from erpnext.stock.doctype.item.test_item import make_item
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, now_datetime
+
+from jain_machine_tools.stock.optimized_reorder import (
+	REORDER_DIRTY_BINS_KEY,
+	REORDER_HIGH_WATER_MARK_KEY,
+	_execute_optimized_reorder,
+	build_material_request_item,
+	get_dirty_bins,
+	mark_bins_dirty,
+	prefetch_uom_snapshot,
+)
+
+
+def _make_material_requests(lines):
+	material_requests = {}
+	for i in range(lines):
+		item_code = f"_Test Reorder Item {i}"
+		request_type = "Purchase" if i % 2 else "Transfer"
+		material_requests.setdefault(("_Test Company", "_Test Warehouse - _TC", request_type), []).append(
+			{
+				"item_code": item_code,
+				"warehouse": "_Test Warehouse - _TC",
+				"reorder_qty": 10,
+				"item_details": frappe._dict(
+					{
+						"item_code": item_code,
+						"name": item_code,
+						"item_name": item_code,
+						"stock_uom": "Nos",
+						"purchase_uom": "Box",
+						"lead_time_days": 2,
+					}
+				),
+			}
+		)
+	return material_requests
+
+
+class TestOptimizedReorder(FrappeTestCase):
+	def test_uom_prefetch_query_count_is_constant(self):
+		for lines in (10, 500):
+			material_requests = _make_material_requests(lines)
+
+			# Conversion factors + whole-number UOMs, regardless of line count
+			with self.assertQueryCount(2):
+				uom_snapshot = prefetch_uom_snapshot(material_requests)
+
+			with self.assertQueryCount(0):
+				for (_company, _warehouse, request_type), items in material_requests.items():
+					for d in items:
+						build_material_request_item(d, request_type, uom_snapshot)
+
+	def test_line_builder_applies_snapshot(self):
+		material_requests = _make_material_requests(2)
+		uom_snapshot = frappe._dict(
+			conversion_factors={("_Test Reorder Item 1", "Box"): 3.0},
+			whole_number_uoms={"Box"},
+		)
+
+		transfer_line, purchase_line = (
+			build_material_request_item(d, request_type, uom_snapshot)
+			for (_company, _warehouse, request_type), items in material_requests.items()
+			for d in items
+		)
+
+		self.assertEqual(transfer_line["uom"], "Nos")
+		self.assertEqual(transfer_line["qty"], 10)
+		self.assertEqual(purchase_line["uom"], "Box")
+		self.assertEqual(purchase_line["conversion_factor"], 3.0)
+		self.assertEqual(purchase_line["qty"], 4)
+
+	def test_failed_request_bins_stay_dirty(self):
+		warehouse = "_Test Warehouse - _TC"
+		item_code = make_item(
+			"_Test JMT Reorder Retry Item",
+			{
+				"is_stock_item": 1,
+				"reorder_levels": [
+					{
+						"warehouse": warehouse,
+						"warehouse_reorder_level": 100,
+						"warehouse_reorder_qty": 100,
+						"material_request_type": "Purchase",
+					}
+				],
+			},
+		).name
+		dirty_bin = (item_code, warehouse)
+
+		# High-water mark in the future: the run considers the dirty bins only
+		frappe.db.set_default(REORDER_HIGH_WATER_MARK_KEY, str(add_days(now_datetime(), 1)))
+		mark_bins_dirty([dirty_bin])
+		self.addCleanup(frappe.cache.srem, REORDER_DIRTY_BINS_KEY, json.dumps(list(dirty_bin)))
+
+		with patch(
+			"jain_machine_tools.stock.optimized_reorder.make_cumulative_material_request",
+			side_effect=frappe.ValidationError("MR insert failed"),
+		) as make_request:
+			_execute_optimized_reorder()
+
+		self.assertTrue(make_request.called)
+		self.assertIn(dirty_bin, get_dirty_bins())
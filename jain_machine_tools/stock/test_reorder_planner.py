@@ -0,0 +1,136 @@
+# Copyright (c) 2026, Praxon Technovation and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from jain_machine_tools.stock.optimized_reorder import (
+	build_material_request_item,
+	process_item_for_reorder,
+)
+from jain_machine_tools.stock.reorder_planner import plan_material_requests
+
+WAREHOUSE_COMPANY = {
+	"_Test Planner WH A - C1": "Company 1",
+	"_Test Planner WH B - C1": "Company 1",
+	"_Test Planner WH C - C2": "Company 2",
+	# Falls back to the default company
+	"_Test Planner WH D": None,
+}
+UOM_SNAPSHOT = frappe._dict(
+	conversion_factors={
+		("_Test Planner Item 1", "Box"): 12.0,
+		("_Test Planner Item 2", "Pack"): 2.5,
+		("_Test Planner Item 4", "Box"): 10.0,
+	},
+	whole_number_uoms={"Box", "Nos"},
+)
+
+
+def _reorder_row(item_code, warehouse, request_type, level, qty, stock_uom="Nos", purchase_uom=None):
+	return frappe._dict(
+		name=item_code,
+		item_name=item_code,
+		warehouse=warehouse,
+		warehouse_group=None,
+		material_request_type=request_type,
+		warehouse_reorder_level=level,
+		warehouse_reorder_qty=qty,
+		stock_uom=stock_uom,
+		purchase_uom=purchase_uom,
+		has_variants=0,
+		lead_time_days=3,
+	)
+
+
+def _make_fixture():
+	items_to_consider = {
+		"_Test Planner Item 1": [
+			_reorder_row(
+				"_Test Planner Item 1", "_Test Planner WH A - C1", "Purchase", 20, 5, purchase_uom="Box"
+			),
+			_reorder_row(
+				"_Test Planner Item 1", "_Test Planner WH C - C2", "Transfer", 10, 0, purchase_uom="Box"
+			),
+			_reorder_row("_Test Planner Item 1", "_Test Planner WH D", "Purchase", 5, 5, purchase_uom="Box"),
+		],
+		"_Test Planner Item 2": [
+			_reorder_row(
+				"_Test Planner Item 2", "_Test Planner WH A - C1", "Purchase", 10, 7.5, "Kg", "Pack"
+			),
+			_reorder_row("_Test Planner Item 2", "_Test Planner WH B - C1", "Purchase", 10, 10, "Kg", "Pack"),
+			# Disabled warehouse
+			_reorder_row("_Test Planner Item 2", "_Test Disabled WH", "Purchase", 10, 10, "Kg", "Pack"),
+		],
+		"_Test Planner Item 3": [
+			# Above the reorder level
+			_reorder_row("_Test Planner Item 3", "_Test Planner WH A - C1", "Purchase", 10, 10),
+			_reorder_row("_Test Planner Item 3", "_Test Planner WH C - C2", "Manufacture", 0, 4),
+		],
+		"_Test Planner Item 4": [
+			_reorder_row(
+				"_Test Planner Item 4", "_Test Planner WH B - C1", "Purchase", 30, 10, purchase_uom="Box"
+			),
+			_reorder_row(
+				"_Test Planner Item 4", "_Test Planner WH A - C1", "Purchase", 30, 10, purchase_uom="Box"
+			),
+		],
+	}
+	item_warehouse_projected_qty = {
+		"_Test Planner Item 1": {"_Test Planner WH A - C1": -4, "_Test Planner WH C - C2": 3},
+		"_Test Planner Item 2": {"_Test Planner WH A - C1": 8, "_Test Planner WH B - C1": 25},
+		"_Test Planner Item 3": {"_Test Planner WH A - C1": 15},
+		"_Test Planner Item 4": {"_Test Planner WH B - C1": 1, "_Test Planner WH A - C1": 30},
+	}
+	return items_to_consider, item_warehouse_projected_qty
+
+
+def _material_request_lines(material_requests):
+	return {
+		group_key: [build_material_request_item(d, group_key[2], UOM_SNAPSHOT) for d in items]
+		for group_key, items in material_requests.items()
+	}
+
+
+class TestReorderPlanner(FrappeTestCase):
+	def test_planners_build_the_same_material_requests(self):
+		items_to_consider, item_warehouse_projected_qty = _make_fixture()
+
+		row_by_row = {}
+		for item_code, reorder_levels in items_to_consider.items():
+			for d in reorder_levels:
+				process_item_for_reorder(
+					item_code=item_code,
+					item_data=d,
+					item_warehouse_projected_qty=item_warehouse_projected_qty,
+					warehouse_company=WAREHOUSE_COMPANY,
+					default_company="_Test Company",
+					material_requests=row_by_row,
+				)
+
+		vectorized = plan_material_requests(
+			items_to_consider,
+			item_warehouse_projected_qty,
+			WAREHOUSE_COMPANY,
+			"_Test Company",
+			uom_snapshot=UOM_SNAPSHOT,
+		)
+
+		# Same groups in the same order, same lines in the same order
+		self.assertEqual(list(vectorized), list(row_by_row))
+		self.assertEqual(_material_request_lines(vectorized), _material_request_lines(row_by_row))
+
+		self.assertEqual(
+			list(vectorized),
+			[
+				("Company 1", "_Test Planner WH A - C1", "Purchase"),
+				("Company 2", "_Test Planner WH C - C2", "Transfer"),
+				("_Test Company", "_Test Planner WH D", "Purchase"),
+				("Company 2", "_Test Planner WH C - C2", "Manufacture"),
+				("Company 1", "_Test Planner WH B - C1", "Purchase"),
+			],
+		)
+
+		# 24 Nos short at WH A ordered in boxes of 12, rounded up to whole boxes
+		first_line = vectorized[("Company 1", "_Test Planner WH A - C1", "Purchase")][0]
+		self.assertEqual((first_line["uom"], first_line["qty"]), ("Box", 2))
@@ -0,0 +1,287 @@
+"""
+Content-addressed cache for rendered barcode images
+- Key: sha256 of (serial_no, barcode_type, render options, image format)
+- Level 1: per-process LRU of PNG / SVG bytes, capped by entry count
+- Level 2: PNG / SVG files under the site's private files (jmt_barcode_cache/), capped by
+  total size, least recently used files evicted first
+- Hits return the stored image without importing python-barcode or Pillow
+
+Site config: jmt_barcode_memory_cache_size (entries, default 2048) and
+jmt_barcode_disk_cache_mb (default 200). Hit / miss counters are kept per process and
+flushed to Redis at most once a second; get_barcode_cache_stats reports both.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from io import BytesIO
+
+import frappe
+
+from jain_machine_tools.utils.barcode_svg import compact_svg
+
+CACHE_FOLDER = "jmt_barcode_cache"
+STATS_KEY = "jmt_barcode_cache_stats"
+DEFAULT_MEMORY_CACHE_SIZE = 2048
+DEFAULT_DISK_CACHE_MB = 200
+
+IMAGE_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+CACHE_FILE_EXTENSIONS = tuple(f".{image_format}" for image_format in IMAGE_FORMATS)
+
+# Check the disk cap after this many files written by the process
+DISK_CHECK_INTERVAL = 100
+
+DEFAULT_RENDER_OPTIONS = {
+	"module_height": 10.0,  # Height of barcode bars in mm (reduced for 10 per page)
+	"module_width": 0.20,  # Width of narrowest bar in mm (slightly reduced)
+	"quiet_zone": 2.5,  # White space around barcode (reduced)
+	"font_size": 0,  # Don't render text below barcode (we'll show it separately)
+	"text_distance": 1.0,
+	"background": "white",
+	"foreground": "black",
+	"write_text": False,  # Disable text rendering in barcode
+	"dpi": 300,  # High DPI for better quality
+}
+
+STAT_FIELDS = ("memory_hits", "disk_hits", "misses", "evictions")
+
+_memory_cache = OrderedDict()
+_stats = dict.fromkeys(STAT_FIELDS, 0)
+_unflushed = dict.fromkeys(STAT_FIELDS, 0)
+_state = {"last_flush": 0.0, "writes": 0}
+
+
+def get_barcode_data_uri(serial_no, barcode_type="Code128", options=None, image_format="png"):
+	"""Cached PNG or SVG data URI for a barcode; raises if rendering fails"""
+	return to_data_uri(get_barcode(serial_no, barcode_type, options, image_format), image_format)
+
+
+def get_barcode(serial_no, barcode_type="Code128", options=None, image_format="png"):
+	"""Cached PNG or SVG bytes for a barcode; raises if rendering fails"""
+	options = get_render_options(options)
+	key = get_cache_key(serial_no, barcode_type, options, image_format)
+
+	image = get_cached_image(key, image_format)
+	if image:
+		return image
+
+	image = render_barcode(serial_no, barcode_type, options, image_format)
+	return store_barcode(key, image, image_format)
+
+
+def get_cached_image(key, image_format="png"):
+	"""Image bytes from memory or disk, None on a miss"""
+	image = _memory_cache.get(key)
+	if image:
+		_memory_cache.move_to_end(key)
+		_count("memory_hits")
+		return image
+
+	image = _read_file(_get_cache_path(key, image_format))
+	if not image:
+		_count("misses")
+		return None
+
+	_count("disk_hits")
+	_remember(key, image)
+	return image
+
+
+def store_barcode(key, image, image_format="png"):
+	"""Cache a freshly rendered image on disk and in memory; returns it"""
+	_write_file(_get_cache_path(key, image_format), image)
+	_remember(key, image)
+	return image
+
+
+def render_barcode(serial_no, barcode_type="Code128", options=None, image_format="png"):
+	"""
+	Render a barcode to PNG bytes (python-barcode / Pillow) or compact SVG bytes
+	(python-barcode's SVGWriter, see barcode_svg.compact_svg); no caching, no site access
+	"""
+	import barcode
+	from barcode.writer import ImageWriter, SVGWriter
+
+	if image_format not in IMAGE_FORMATS:
+		raise ValueError(f"Unsupported barcode image format: {image_format}")
+
+	writer = SVGWriter() if image_format == "svg" else ImageWriter()
+	barcode_class = barcode.get_barcode_class(barcode_type)
+	barcode_instance = barcode_class(str(serial_no), writer=writer)
+
+	buffer = BytesIO()
+	barcode_instance.write(buffer, options=options or DEFAULT_RENDER_OPTIONS)
+	if image_format == "svg":
+		return compact_svg(buffer.getvalue())
+
+	return buffer.getvalue()
+
+
+def get_render_options(options=None):
+	return {**DEFAULT_RENDER_OPTIONS, **(options or {})}
+
+
+def to_data_uri(image, image_format="png"):
+	return f"data:{IMAGE_FORMATS[image_format]};base64,{base64.b64encode(image).decode('utf-8')}"
+
+
+def get_cache_key(serial_no, barcode_type, options, image_format="png"):
+	payload = json.dumps([str(serial_no), barcode_type, options, image_format], sort_keys=True, default=str)
+	return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@frappe.whitelist()
+def get_barcode_cache_stats():
+	"""Site-wide counters (Redis), this process's counters and the current cache sizes"""
+	frappe.only_for("System Manager")
+	_flush_stats(force=True)
+
+	site_stats = {field: int(frappe.cache.get(_get_stats_key(field)) or 0) for field in STAT_FIELDS}
+	lookups = sum(site_stats.get(field, 0) for field in ("memory_hits", "disk_hits", "misses"))
+	files, size = _get_disk_usage()
+
+	return {
+		"site": site_stats,
+		"hit_ratio": round(1 - site_stats.get("misses", 0) / lookups, 4) if lookups else None,
+		"process": dict(_stats),
+		"memory_entries": len(_memory_cache),
+		"memory_limit": _get_memory_limit(),
+		"disk_files": files,
+		"disk_mb": round(size / (1024 * 1024), 2),
+		"disk_limit_mb": _get_disk_limit() / (1024 * 1024),
+	}
+
+
+@frappe.whitelist()
+def clear_barcode_cache():
+	"""Drop every cached barcode on disk and in this process, and reset the counters"""
+	frappe.only_for("System Manager")
+
+	_memory_cache.clear()
+	folder = _get_cache_folder()
+	for path, _size, _mtime in _iter_cache_files(folder):
+		_remove(path)
+
+	for field in STAT_FIELDS:
+		frappe.cache.delete(_get_stats_key(field))
+		_stats[field] = 0
+		_unflushed[field] = 0
+
+
+def _remember(key, image):
+	_memory_cache[key] = image
+	limit = _get_memory_limit()
+	while len(_memory_cache) > limit:
+		_memory_cache.popitem(last=False)
+
+
+def _read_file(path):
+	try:
+		with open(path, "rb") as f:
+			image = f.read()
+	except OSError:
+		return None
+
+	# Recently used files survive disk eviction
+	try:
+		os.utime(path)
+	except OSError:
+		pass
+
+	return image
+
+
+def _write_file(path, image):
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+
+	# Write then rename, so a concurrent reader never sees a partial file
+	tmp_path = f"{path}.{os.getpid()}.tmp"
+	with open(tmp_path, "wb") as f:
+		f.write(image)
+	os.replace(tmp_path, path)
+
+	_state["writes"] += 1
+	if _state["writes"] % DISK_CHECK_INTERVAL == 0:
+		_evict_disk()
+
+
+def _evict_disk():
+	"""Remove least recently used files until the cache is under its size cap"""
+	files = sorted(_iter_cache_files(_get_cache_folder()), key=lambda file: file[2])
+	total = sum(size for _path, size, _mtime in files)
+	limit = _get_disk_limit()
+
+	for path, size, _mtime in files:
+		if total <= limit:
+			break
+		_remove(path)
+		total -= size
+		_count("evictions")
+
+
+def _get_disk_usage():
+	files = list(_iter_cache_files(_get_cache_folder()))
+	return len(files), sum(size for _path, size, _mtime in files)
+
+
+def _iter_cache_files(folder):
+	for root, _dirs, filenames in os.walk(folder):
+		for filename in filenames:
+			if not filename.endswith(CACHE_FILE_EXTENSIONS):
+				continue
+			path = os.path.join(root, filename)
+			try:
+				stat = os.stat(path)
+			except OSError:
+				continue
+			yield path, stat.st_size, stat.st_mtime
+
+
+def _remove(path):
+	try:
+		os.remove(path)
+	except OSError:
+		pass
+
+
+def _get_cache_folder():
+	return frappe.get_site_path("private", "files", CACHE_FOLDER)
+
+
+def _get_cache_path(key, image_format="png"):
+	# Two-character fan-out keeps directories small
+	return os.path.join(_get_cache_folder(), key[:2], f"{key}.{image_format}")
+
+
+def _get_memory_limit():
+	return int(frappe.conf.get("jmt_barcode_memory_cache_size") or DEFAULT_MEMORY_CACHE_SIZE)
+
+
+def _get_disk_limit():
+	return float(frappe.conf.get("jmt_barcode_disk_cache_mb") or DEFAULT_DISK_CACHE_MB) * 1024 * 1024
+
+
+def _count(field):
+	_stats[field] += 1
+	_unflushed[field] += 1
+	_flush_stats()
+
+
+def _flush_stats(force=False):
+	now = time.monotonic()
+	if not force and now - _state["last_flush"] < 1:
+		return
+
+	_state["last_flush"] = now
+	for field in STAT_FIELDS:
+		if _unflushed[field]:
+			frappe.cache.incrby(_get_stats_key(field), _unflushed[field])
+			_unflushed[field] = 0
+
+
+def _get_stats_key(field):
+	# Raw Redis counters (incrby / get), not pickled values
+	return frappe.cache.make_key(f"{STATS_KEY}:{field}")
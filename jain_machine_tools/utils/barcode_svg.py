@@ -0,0 +1,104 @@
+"""
+Compact SVG barcodes for print
+- compact_svg: python-barcode's SVGWriter emits one <rect> per bar, with mm units and
+  pretty-printed XML; this folds the bars into one <path> per colour on a viewBox in mm,
+  which is several times smaller
+- get_svg_symbol / get_svg_use: the same drawing as a <symbol> emitted once per
+  document and referenced by <use> wherever the barcode is printed again
+"""
+
+import re
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+
+_TAG = re.compile(r"<(svg|rect|text)\b([^>]*)>")
+_ATTR = re.compile(r'([\w:-]+)="([^"]*)"')
+_FILL = re.compile(r"fill:\s*([^;]+)")
+_COMPACT_SVG = re.compile(r'^<svg [^>]*width="([\d.]+)mm" height="([\d.]+)mm"[^>]*>(.*)</svg>$', re.S)
+
+
+def compact_svg(svg):
+	"""
+	SVGWriter output as one <path> per colour. Barcodes with a human readable text line
+	are only stripped of whitespace and comments, since the text is not redrawn.
+	"""
+	text = svg.decode("utf-8") if isinstance(svg, bytes) else svg
+
+	width = height = background = None
+	bars = {}
+	for tag, attributes in _TAG.findall(text):
+		attributes = dict(_ATTR.findall(attributes))
+		if tag == "text":
+			return _minify(text)
+
+		if tag == "svg":
+			width, height = _mm(attributes["width"]), _mm(attributes["height"])
+			continue
+
+		fill = _get_fill(attributes)
+		if attributes.get("width", "").endswith("%"):
+			background = fill
+			continue
+
+		x, y = _mm(attributes["x"]), _mm(attributes["y"])
+		w, h = _mm(attributes["width"]), _mm(attributes["height"])
+		bars.setdefault(fill, []).append(f"M{_fmt(x)} {_fmt(y)}h{_fmt(w)}v{_fmt(h)}h-{_fmt(w)}z")
+
+	if width is None:
+		return _minify(text)
+
+	body = f'<rect width="100%" height="100%" fill="{background}"/>' if background else ""
+	body += "".join(f'<path fill="{fill}" d="{"".join(path)}"/>' for fill, path in bars.items())
+
+	return (
+		f'<svg xmlns="{SVG_NS}" width="{_fmt(width)}mm" height="{_fmt(height)}mm" '
+		f'viewBox="0 0 {_fmt(width)} {_fmt(height)}">{body}</svg>'
+	).encode()
+
+
+def get_svg_symbol(svg, symbol_id):
+	"""
+	(<symbol> markup in a hidden <svg>, width mm, height mm) for a compact_svg drawing,
+	None if the SVG is not one compact_svg produced
+	"""
+	text = svg.decode("utf-8") if isinstance(svg, bytes) else svg
+	match = _COMPACT_SVG.match(text)
+	if not match:
+		return None
+
+	width, height, body = match.groups()
+	symbol = (
+		f'<svg xmlns="{SVG_NS}" style="position:absolute;width:0;height:0;overflow:hidden">'
+		f'<symbol id="{symbol_id}" viewBox="0 0 {width} {height}">{body}</symbol></svg>'
+	)
+	return symbol, width, height
+
+
+def get_svg_use(symbol_id, width, height):
+	# xlink:href for wkhtmltopdf's WebKit, href for current browsers
+	return (
+		f'<svg xmlns="{SVG_NS}" xmlns:xlink="{XLINK_NS}" width="{width}mm" height="{height}mm" '
+		f'viewBox="0 0 {width} {height}"><use xlink:href="#{symbol_id}" href="#{symbol_id}"/></svg>'
+	)
+
+
+def _minify(text):
+	text = re.sub(r"<\?xml.*?\?>|<!DOCTYPE.*?>|<!--.*?-->", "", text, flags=re.S)
+	return re.sub(r">\s+<", "><", text).strip().encode("utf-8")
+
+
+def _get_fill(attributes):
+	if attributes.get("fill"):
+		return attributes["fill"]
+
+	match = _FILL.search(attributes.get("style", ""))
+	return match.group(1).strip() if match else "black"
+
+
+def _mm(value):
+	return float(value[:-2] if value.endswith("mm") else value)
+
+
+def _fmt(value):
+	return f"{value:.3f}".rstrip("0").rstrip(".")
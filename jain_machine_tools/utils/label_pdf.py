@@ -0,0 +1,337 @@
+"""
+Direct-to-PDF label sheets, without HTML or wkhtmltopdf
+- Writes PDF 1.4 by hand: Helvetica / Helvetica-Bold (standard fonts, not embedded),
+  barcodes drawn as filled rectangles from python-barcode's module pattern, one
+  Flate-compressed content stream per page
+- iter_label_pdf yields the file page by page, so it can be streamed to the client
+  while later pages are still being laid out
+- Layouts are in mm: LABEL_LAYOUTS presets, any key can be overridden
+
+No site access here: labels are plain dicts prepared by the caller.
+"""
+
+import zlib
+
+MM = 72 / 25.4
+
+LABEL_LAYOUTS = {
+	# Same sheet as the HTML label sheet: 2 x 5 labels of 105 x 56 mm on A4
+	"A4 10 Up": {
+		"page_width": 210,
+		"page_height": 297,
+		"columns": 2,
+		"rows": 5,
+		"label_width": 105,
+		"label_height": 56,
+		"margin_top": 8.5,
+		"margin_left": 0,
+	},
+	# Serial No Barcode Format: 2 x 4 labels of 105 x 70 mm on A4
+	"A4 8 Up": {
+		"page_width": 210,
+		"page_height": 297,
+		"columns": 2,
+		"rows": 4,
+		"label_width": 105,
+		"label_height": 70,
+		"margin_top": 8.5,
+		"margin_left": 0,
+	},
+	# Serial No Single Barcode Format: one 4 x 3 in label per page, for label printers
+	"Single 4x3 in": {
+		"page_width": 101.6,
+		"page_height": 76.2,
+		"columns": 1,
+		"rows": 1,
+		"label_width": 101.6,
+		"label_height": 76.2,
+		"margin_top": 0,
+		"margin_left": 0,
+	},
+}
+DEFAULT_LABEL_LAYOUT = "A4 10 Up"
+
+LAYOUT_DEFAULTS = {
+	"gap_x": 0,
+	"gap_y": 0,
+	"padding": 3,
+	"border": 1,
+	"barcode_height": 18,  # mm, shrunk if the text lines leave less room
+	"module_width": 0.33,  # mm, widest bar module; narrowed to fit the label
+	"quiet_zone": 10,  # modules of white space each side of the barcode
+	"brand_font_size": 10,  # pt
+	"serial_font_size": 10,
+	"text_font_size": 8,
+	"show_brand": 1,
+	"show_dates": 1,
+}
+INTEGER_LAYOUT_KEYS = ("columns", "rows", "border", "quiet_zone", "show_brand", "show_dates")
+
+# Helvetica / Helvetica-Bold advance widths (1/1000 em) for ASCII 32-126, from the AFMs
+# fmt: off
+_HELVETICA_WIDTHS = (
+	278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+	556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+	1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+	667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+	333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+	556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_HELVETICA_BOLD_WIDTHS = (
+	278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+	556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+	975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+	667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+	333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+	611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+)
+# fmt: on
+BARCODE_FAILED_TEXT = "Barcode Failed"
+FONTS = {"F1": ("Helvetica", _HELVETICA_WIDTHS), "F2": ("Helvetica-Bold", _HELVETICA_BOLD_WIDTHS)}
+
+
+def get_label_layout(name=None, overrides=None):
+	"""Preset merged with the defaults and any overrides; raises ValueError on a bad layout"""
+	if (name or DEFAULT_LABEL_LAYOUT) not in LABEL_LAYOUTS:
+		raise ValueError(f"Unknown label layout: {name}")
+
+	layout = {**LAYOUT_DEFAULTS, **LABEL_LAYOUTS[name or DEFAULT_LABEL_LAYOUT]}
+	for key, value in (overrides or {}).items():
+		if key not in layout:
+			raise ValueError(f"Unknown label layout setting: {key}")
+		layout[key] = value
+
+	for key, value in layout.items():
+		layout[key] = int(value) if key in INTEGER_LAYOUT_KEYS else float(value)
+
+	if layout["columns"] < 1 or layout["rows"] < 1:
+		raise ValueError("A label layout needs at least one column and one row")
+
+	return layout
+
+
+def build_label_pdf(labels, layout=None):
+	return b"".join(iter_label_pdf(labels, layout))
+
+
+def iter_label_pdf(labels, layout=None):
+	"""
+	Yield the PDF for labels in chunks, one page at a time.
+
+	Each label is a dict with serial_no and optionally brand, item_code,
+	manufacturing_date, expiry_date (display strings), barcode_type (default Code128)
+	and modules (a precomputed "1010..." bar pattern; "" for a serial that could not be
+	encoded, which gets BARCODE_FAILED_TEXT in place of the bars).
+	"""
+	layout = layout or get_label_layout()
+	writer = _PDFWriter()
+	per_page = layout["columns"] * layout["rows"]
+
+	yield writer.header()
+	yield writer.add_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+	for number, (_font_id, (base_font, _widths)) in enumerate(FONTS.items(), start=3):
+		yield writer.add_object(
+			number,
+			f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>".encode(),
+		)
+
+	page_size = f"[0 0 {_num(layout['page_width'] * MM)} {_num(layout['page_height'] * MM)}]"
+	fonts = " ".join(f"/{font_id} {number} 0 R" for number, font_id in enumerate(FONTS, start=3))
+	page_objects = []
+
+	page = []
+	for label in labels:
+		page.append(label)
+		if len(page) == per_page:
+			yield _write_page(writer, page_objects, page, layout, page_size, fonts)
+			page = []
+
+	if page or not page_objects:
+		yield _write_page(writer, page_objects, page, layout, page_size, fonts)
+
+	kids = " ".join(f"{number} 0 R" for number in page_objects)
+	yield writer.add_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_objects)} >>".encode())
+	yield writer.trailer(root=1)
+
+
+def get_barcode_modules(code, barcode_type="Code128"):
+	"""Bar pattern of a barcode as a "1010..." string (1 = bar), from python-barcode"""
+	import barcode
+
+	barcode_class = barcode.get_barcode_class(barcode_type)
+	return "".join(barcode_class(str(code)).build())
+
+
+def get_text_width(text, font_id, size):
+	widths = FONTS[font_id][1]
+	return sum(widths[ord(char) - 32] if 32 <= ord(char) <= 126 else 556 for char in text) * size / 1000
+
+
+def _write_page(writer, page_objects, labels, layout, page_size, fonts):
+	page_number = 5 + 2 * len(page_objects)
+	content = zlib.compress(_draw_page(labels, layout).encode("latin-1"))
+	page_objects.append(page_number)
+
+	return writer.add_object(
+		page_number,
+		(
+			f"<< /Type /Page /Parent 2 0 R /MediaBox {page_size} "
+			f"/Resources << /Font << {fonts} >> >> /Contents {page_number + 1} 0 R >>"
+		).encode(),
+	) + writer.add_object(
+		page_number + 1,
+		f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode() + content + b"\nendstream",
+	)
+
+
+def _draw_page(labels, layout):
+	ops = []
+	columns = layout["columns"]
+	for i, label in enumerate(labels):
+		row, column = divmod(i, columns)
+		left = (layout["margin_left"] + column * (layout["label_width"] + layout["gap_x"])) * MM
+		top = (
+			layout["page_height"] - layout["margin_top"] - row * (layout["label_height"] + layout["gap_y"])
+		) * MM
+		_draw_label(ops, label, layout, left, top)
+
+	return "\n".join(ops)
+
+
+def _draw_label(ops, label, layout, left, top):
+	width = layout["label_width"] * MM
+	height = layout["label_height"] * MM
+	padding = layout["padding"] * MM
+	inner_width = width - 2 * padding
+
+	if layout["border"]:
+		ops.append(f"0.5 w {_num(left)} {_num(top - height)} {_num(width)} {_num(height)} re S")
+
+	lines_above = []
+	if layout["show_brand"] and label.get("brand"):
+		lines_above.append((label["brand"], "F2", layout["brand_font_size"]))
+
+	lines_below = [(label.get("serial_no") or "", "F2", layout["serial_font_size"])]
+	if label.get("item_code"):
+		lines_below.append((label["item_code"], "F1", layout["text_font_size"]))
+	if layout["show_dates"]:
+		dates = "   ".join(
+			f"{caption}: {label[key]}"
+			for caption, key in (("Mfg", "manufacturing_date"), ("Exp", "expiry_date"))
+			if label.get(key)
+		)
+		if dates:
+			lines_below.append((dates, "F1", layout["text_font_size"]))
+
+	gap = 1 * MM
+	text_height = sum(size * 1.2 for _text, _font, size in lines_above + lines_below)
+	barcode_height = min(layout["barcode_height"] * MM, height - 2 * padding - text_height - 2 * gap)
+
+	cursor = top - padding
+	for text, font_id, size in lines_above:
+		cursor = _draw_text_line(ops, text, font_id, size, left + padding, inner_width, cursor)
+
+	cursor -= gap
+	if barcode_height > 0:
+		modules = label.get("modules")
+		if modules is None:
+			modules = get_barcode_modules(
+				label.get("serial_no") or "", label.get("barcode_type") or "Code128"
+			)
+
+		if modules:
+			_draw_barcode(
+				ops, modules, layout, left + padding, inner_width, cursor - barcode_height, barcode_height
+			)
+		else:
+			size = layout["text_font_size"]
+			_draw_text_line(
+				ops,
+				BARCODE_FAILED_TEXT,
+				"F2",
+				size,
+				left + padding,
+				inner_width,
+				cursor - (barcode_height - size * 1.2) / 2,
+			)
+		cursor -= barcode_height
+	cursor -= gap
+
+	for text, font_id, size in lines_below:
+		cursor = _draw_text_line(ops, text, font_id, size, left + padding, inner_width, cursor)
+
+
+def _draw_text_line(ops, text, font_id, size, left, width, cursor):
+	"""Centred single line below cursor, shrunk to fit the width; returns the new cursor"""
+	line_height = size * 1.2
+	text_width = get_text_width(text, font_id, size)
+	if text_width > width:
+		size = size * width / text_width
+		text_width = width
+
+	baseline = cursor - line_height + (line_height - size) / 2 + size * 0.2
+	x = left + (width - text_width) / 2
+	ops.append(f"BT /{font_id} {_num(size)} Tf {_num(x)} {_num(baseline)} Td ({_escape(text)}) Tj ET")
+	return cursor - line_height
+
+
+def _draw_barcode(ops, modules, layout, left, width, bottom, height):
+	"""Bars as filled rectangles, centred, narrowed to fit the width with its quiet zones"""
+	count = len(modules) + 2 * layout["quiet_zone"]
+	module_width = min(layout["module_width"] * MM, width / count) if count else 0
+	x = left + (width - len(modules) * module_width) / 2
+
+	rects = []
+	run_start = None
+	for i, module in enumerate(modules + "0"):
+		if module == "1" and run_start is None:
+			run_start = i
+		elif module != "1" and run_start is not None:
+			rects.append(
+				f"{_num(x + run_start * module_width)} {_num(bottom)} "
+				f"{_num((i - run_start) * module_width)} {_num(height)} re"
+			)
+			run_start = None
+
+	if rects:
+		ops.append("\n".join(rects) + "\nf")
+
+
+def _escape(text):
+	text = str(text).encode("cp1252", "replace").decode("latin-1")
+	return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _num(value):
+	return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+class _PDFWriter:
+	"""Byte offsets of numbered objects, for the cross-reference table"""
+
+	def __init__(self):
+		self.position = 0
+		self.offsets = {}
+
+	def header(self):
+		return self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+	def add_object(self, number, body):
+		self.offsets[number] = self.position
+		return self._emit(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+	def trailer(self, root):
+		size = max(self.offsets) + 1
+		xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+		for number in range(1, size):
+			if number in self.offsets:
+				xref.append(f"{self.offsets[number]:010d} 00000 n \n")
+			else:
+				xref.append("0000000000 65535 f \n")
+
+		xref.append(f"trailer\n<< /Size {size} /Root {root} 0 R >>\nstartxref\n{self.position}\n%%EOF\n")
+		return self._emit("".join(xref).encode())
+
+	def _emit(self, data):
+		self.position += len(data)
+		return data
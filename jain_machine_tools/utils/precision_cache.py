@@ -0,0 +1,69 @@
+"""
+Per-doctype field precision cache
+- {fieldname: precision} for every Float / Currency / Percent field of a doctype
+- Resolved once per worker from doctype meta and System Settings defaults
+- A version key in Redis invalidates every worker's copy, bumped by Custom Field /
+  Property Setter changes and System Settings updates
+
+Lets per-row rounding in totals hooks use a dict lookup instead of doc.precision(),
+which walks meta on every new row document.
+"""
+
+import frappe
+from frappe.model.meta import get_field_precision
+
+PRECISION_VERSION_KEY = "jmt_precision_version"
+
+PRECISION_FIELDTYPES = ("Currency", "Float", "Percent")
+
+# Process-local copy: {"version": str, "doctypes": {doctype: {fieldname: precision}}}
+_local_precisions = {}
+
+
+def get_precision_map(doctype):
+	"""Return {fieldname: precision} for the numeric fields of a doctype"""
+	version = frappe.cache.get_value(PRECISION_VERSION_KEY)
+	if not version:
+		version = _bump_version()
+
+	if _local_precisions.get("version") != version:
+		_local_precisions.clear()
+		_local_precisions.update({"version": version, "doctypes": {}})
+
+	doctypes = _local_precisions["doctypes"]
+	if doctype not in doctypes:
+		doctypes[doctype] = _build_precision_map(doctype)
+
+	return doctypes[doctype]
+
+
+def get_child_precision_map(doc, table_fieldname="items"):
+	"""Precision map of the child doctype behind a table field, empty if the field does not exist"""
+	table_field = doc.meta.get_field(table_fieldname)
+	if not table_field or not table_field.options:
+		return {}
+
+	return get_precision_map(table_field.options)
+
+
+def invalidate_precision_cache(doc=None, method=None):
+	"""
+	Hook Handler for Custom Field / Property Setter on_update / on_trash and System Settings on_update
+	Precision defaults apply across doctypes, so every worker's whole table is dropped
+	"""
+	_bump_version()
+	_local_precisions.clear()
+
+
+def _bump_version():
+	version = frappe.generate_hash(length=10)
+	frappe.cache.set_value(PRECISION_VERSION_KEY, version)
+	return version
+
+
+def _build_precision_map(doctype):
+	return {
+		df.fieldname: get_field_precision(df)
+		for df in frappe.get_meta(doctype).fields
+		if df.fieldtype in PRECISION_FIELDTYPES
+	}
@@ -0,0 +1,78 @@
+# Copyright (c) 2026, Praxon Technovation and Contributors
+# See license.txt
+
+import zlib
+
+from frappe.tests.utils import FrappeTestCase
+
+from jain_machine_tools.utils.label_pdf import build_label_pdf, get_label_layout
+
+MODULES = "11010010000" + "10110011100" * 8 + "1100011101011"
+
+
+def _make_labels(count):
+	return [
+		{
+			"serial_no": f"SN-{i:05d}",
+			"item_code": "ITEM (A)",
+			"brand": "BRAND",
+			"manufacturing_date": "17-10-2026",
+			"expiry_date": "17-10-2027",
+			"modules": MODULES,
+		}
+		for i in range(count)
+	]
+
+
+class TestLabelPDF(FrappeTestCase):
+	def test_cross_reference_offsets(self):
+		pdf = build_label_pdf(_make_labels(23), get_label_layout("A4 10 Up"))
+
+		startxref = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+		lines = pdf[startxref:].split(b"\n")
+		self.assertEqual(lines[0], b"xref")
+
+		size = int(lines[1].split()[1])
+		# Catalog, pages, two fonts, then a page and its content per 10 labels
+		self.assertEqual(size, 5 + 2 * 3)
+		for number in range(1, size):
+			offset = int(lines[2 + number][:10])
+			self.assertTrue(pdf[offset:].startswith(f"{number} 0 obj".encode()))
+
+		self.assertIn(b"/Count 3", pdf)
+
+	def test_page_content(self):
+		pdf = build_label_pdf(_make_labels(1), get_label_layout("Single 4x3 in"))
+
+		start = pdf.index(b"stream\n") + len(b"stream\n")
+		content = zlib.decompress(pdf[start : pdf.index(b"\nendstream")]).decode("latin-1")
+
+		self.assertIn("(SN-00000) Tj", content)
+		self.assertIn("(ITEM \\(A\\)) Tj", content)
+		self.assertIn("(Mfg: 17-10-2026   Exp: 17-10-2027) Tj", content)
+		# One rectangle per run of bars
+		self.assertEqual(content.count(" re\n"), MODULES.count("01") + 1)
+
+	def test_unencodable_serial(self):
+		# download_label_pdf leaves modules "" when the serial cannot be encoded in Code128
+		labels = _make_labels(2)
+		labels[0].update(serial_no="नमस्ते", modules="")
+
+		pdf = build_label_pdf(labels, get_label_layout("A4 10 Up"))
+		self.assertTrue(pdf.endswith(b"%%EOF\n"))
+
+		start = pdf.index(b"stream\n") + len(b"stream\n")
+		content = zlib.decompress(pdf[start : pdf.index(b"\nendstream")]).decode("latin-1")
+
+		self.assertEqual(content.count("(Barcode Failed) Tj"), 1)
+		self.assertIn("(SN-00001) Tj", content)
+		# Bars for the second label only
+		self.assertEqual(content.count(" re\n"), MODULES.count("01") + 1)
+
+	def test_layout_overrides(self):
+		layout = get_label_layout("A4 8 Up", {"columns": "3", "padding": 2})
+		self.assertEqual(layout["columns"], 3)
+		self.assertEqual(layout["padding"], 2.0)
+
+		self.assertRaises(ValueError, get_label_layout, "Unknown")
+		self.assertRaises(ValueError, get_label_layout, None, {"colour": "red"})
@@ -0,0 +1,149 @@
+"""
+Shared warehouse hierarchy cache
+- One snapshot of every warehouse: company, parent, ancestors, is_group, disabled, lft/rgt
+- Kept in Redis for all workers and in process memory per worker
+- A version key in Redis invalidates both, bumped by Warehouse on_update / on_trash / after_rename
+  and again after the transaction commits or rolls back
+
+In steady state a lookup costs one Redis GET (the version) and no DB query.
+"""
+
+import frappe
+
+WAREHOUSE_TREE_KEY = "jmt_warehouse_tree"
+WAREHOUSE_TREE_VERSION_KEY = "jmt_warehouse_tree_version"
+
+# Process-local copy: {"version": str, "warehouses": {name: _dict}}
+_local_tree = {}
+
+
+def get_warehouse_tree():
+	"""Return {warehouse: _dict(name, company, parent, ancestors, is_group, disabled, lft, rgt)}"""
+	version = frappe.cache.get_value(WAREHOUSE_TREE_VERSION_KEY)
+
+	if version and _local_tree.get("version") == version:
+		return _local_tree["warehouses"]
+
+	tree = frappe.cache.get_value(WAREHOUSE_TREE_KEY) if version else None
+	if not tree or tree.get("version") != version:
+		if not version:
+			version = _bump_version()
+		tree = {"version": version, "warehouses": _build_warehouse_tree()}
+		frappe.cache.set_value(WAREHOUSE_TREE_KEY, tree)
+
+	_local_tree.clear()
+	_local_tree.update(tree)
+	return tree["warehouses"]
+
+
+def get_warehouse(warehouse):
+	return get_warehouse_tree().get(warehouse)
+
+
+def get_ancestors(warehouse):
+	"""Parent chain of a warehouse, nearest first"""
+	details = get_warehouse(warehouse)
+	return list(details.ancestors) if details else []
+
+
+def get_descendants(warehouse, include_groups=False, include_disabled=False):
+	"""Warehouses below a group (lft/rgt range), excluding the group itself"""
+	tree = get_warehouse_tree()
+	group = tree.get(warehouse)
+	if not group:
+		return []
+
+	return [
+		d.name
+		for d in tree.values()
+		if group.lft < d.lft
+		and d.rgt < group.rgt
+		and (include_groups or not d.is_group)
+		and (include_disabled or not d.disabled)
+	]
+
+
+def get_warehouse_company_map(include_disabled=False):
+	"""{warehouse: company}, enabled warehouses only by default"""
+	return frappe._dict(
+		{d.name: d.company for d in get_warehouse_tree().values() if include_disabled or not d.disabled}
+	)
+
+
+def get_leaf_warehouses(include_disabled=False):
+	"""Sorted names of non-group warehouses"""
+	return sorted(
+		d.name
+		for d in get_warehouse_tree().values()
+		if not d.is_group and (include_disabled or not d.disabled)
+	)
+
+
+def invalidate_warehouse_tree(doc=None, method=None):
+	"""
+	Hook Handler for Warehouse on_update / on_trash / after_rename
+	Any change can shift lft/rgt of other warehouses, so the whole snapshot is dropped
+
+	Dropped now, and again once the transaction ends: until then another worker can
+	rebuild from the pre-commit lft/rgt (or this one from uncommitted rows) and cache
+	that under the new version.
+	"""
+	_drop_warehouse_tree()
+
+	if not frappe.flags.jmt_warehouse_tree_drop_queued:
+		frappe.flags.jmt_warehouse_tree_drop_queued = True
+		frappe.db.after_commit.add(_drop_warehouse_tree_after_transaction)
+		frappe.db.after_rollback.add(_drop_warehouse_tree_after_transaction)
+
+
+def _drop_warehouse_tree_after_transaction():
+	frappe.flags.jmt_warehouse_tree_drop_queued = False
+	_drop_warehouse_tree()
+
+
+def _drop_warehouse_tree():
+	frappe.cache.delete_value(WAREHOUSE_TREE_KEY)
+	_bump_version()
+	_local_tree.clear()
+
+
+def _bump_version():
+	version = frappe.generate_hash(length=10)
+	frappe.cache.set_value(WAREHOUSE_TREE_VERSION_KEY, version)
+	return version
+
+
+def _build_warehouse_tree():
+	rows = frappe.get_all(
+		"Warehouse",
+		fields=["name", "company", "parent_warehouse", "is_group", "disabled", "lft", "rgt"],
+	)
+
+	parents = {row.name: row.parent_warehouse for row in rows}
+	warehouses = {}
+
+	for row in rows:
+		ancestors = []
+		visited = set()
+		current = row.parent_warehouse
+
+		# Circular reference protection
+		while current and current not in visited:
+			visited.add(current)
+			ancestors.append(current)
+			current = parents.get(current)
+
+		warehouses[row.name] = frappe._dict(
+			{
+				"name": row.name,
+				"company": row.company,
+				"parent": row.parent_warehouse,
+				"ancestors": tuple(ancestors),
+				"is_group": row.is_group,
+				"disabled": row.disabled,
+				"lft": row.lft,
+				"rgt": row.rgt,
+			}
+		)
+
+	return warehouses